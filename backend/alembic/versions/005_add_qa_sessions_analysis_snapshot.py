@@ -0,0 +1,25 @@
+"""add analysis_snapshot to qa_sessions
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-10-20 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.core.types import JSONB as CustomJSONB
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Requirement versions and questions seen by each round (incremental refinement)
+    op.add_column('qa_sessions', sa.Column('analysis_snapshot', CustomJSONB(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('qa_sessions', 'analysis_snapshot')
@@ -0,0 +1,35 @@
+"""add delta storage to requirements_versions
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-10-27 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.core.types import JSONB as CustomJSONB
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Versions between snapshots keep a reverse JSON patch instead of full data
+    op.add_column('requirements_versions', sa.Column('delta', CustomJSONB(), nullable=True))
+    op.alter_column('requirements_versions', 'data', nullable=True)
+    op.create_check_constraint(
+        'ck_requirements_versions_data_or_delta',
+        'requirements_versions',
+        'data IS NOT NULL OR delta IS NOT NULL'
+    )
+
+
+def downgrade() -> None:
+    # Run compact_requirement_versions_task with REQUIREMENTS_VERSION_DELTAS=False first,
+    # so every row holds full data again
+    op.drop_constraint('ck_requirements_versions_data_or_delta', 'requirements_versions', type_='check')
+    op.alter_column('requirements_versions', 'data', nullable=False)
+    op.drop_column('requirements_versions', 'delta')
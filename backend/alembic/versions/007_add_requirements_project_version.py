@@ -0,0 +1,40 @@
+"""stamp requirement rows with the project requirements_version
+
+Revision ID: 007
+Revises: 006
+Create Date: 2025-11-03 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Project requirements_version each row's content was written under (existing rows: 1)
+    op.add_column('requirements', sa.Column('project_version', sa.Integer, nullable=False, server_default='1'))
+    op.add_column('requirements_versions', sa.Column('project_version', sa.Integer, nullable=False, server_default='1'))
+
+    # Point-in-time snapshots: newest archived row per requirement as of a project version or a timestamp
+    op.create_index(
+        'ix_requirements_versions_req_project_version',
+        'requirements_versions',
+        ['requirement_id', 'project_version', 'version']
+    )
+    op.create_index(
+        'ix_requirements_versions_req_created_at',
+        'requirements_versions',
+        ['requirement_id', 'created_at']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_requirements_versions_req_created_at', 'requirements_versions')
+    op.drop_index('ix_requirements_versions_req_project_version', 'requirements_versions')
+    op.drop_column('requirements_versions', 'project_version')
+    op.drop_column('requirements', 'project_version')
@@ -0,0 +1,30 @@
+"""index listing sort keys for keyset pagination
+
+Revision ID: 008
+Revises: 007
+Create Date: 2025-11-10 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Cursor pages seek on (created_at, id) instead of scanning past an OFFSET
+    op.create_index('ix_projects_created_at_id', 'projects', ['created_at', 'id'])
+    op.create_index(
+        'ix_requirements_project_created_at_id',
+        'requirements',
+        ['project_id', 'created_at', 'id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_requirements_project_created_at_id', 'requirements')
+    op.drop_index('ix_projects_created_at_id', 'projects')
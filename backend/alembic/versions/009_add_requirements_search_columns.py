@@ -0,0 +1,54 @@
+"""add requirement search columns and full-text index
+
+Revision ID: 009
+Revises: 008
+Create Date: 2025-11-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Filter columns copied out of data by the application on every write
+    op.add_column('requirements', sa.Column('prioridade', sa.Text, nullable=True))
+    op.add_column(
+        'requirements',
+        sa.Column('dependencias', ARRAY(sa.Text), nullable=False, server_default=sa.text("'{}'"))
+    )
+    op.execute("""
+        UPDATE requirements SET
+            prioridade = data->>'prioridade',
+            dependencias = CASE
+                WHEN jsonb_typeof(data->'dependencias') = 'array'
+                THEN ARRAY(SELECT jsonb_array_elements_text(data->'dependencias'))
+                ELSE '{}'
+            END
+    """)
+    op.create_index('ix_requirements_project_prioridade', 'requirements', ['project_id', 'prioridade'])
+    op.execute('CREATE INDEX ix_requirements_dependencias_gin ON requirements USING GIN (dependencias)')
+
+    # Description and acceptance criteria, kept current by PostgreSQL itself ('simple': no stemming)
+    op.execute("""
+        ALTER TABLE requirements ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            to_tsvector('simple'::regconfig, coalesce(data->>'descricao', ''))
+            || jsonb_to_tsvector('simple'::regconfig, coalesce(data->'criterios_aceitacao', '[]'::jsonb), '["string"]')
+        ) STORED
+    """)
+    op.execute('CREATE INDEX ix_requirements_search_vector ON requirements USING GIN (search_vector)')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_requirements_search_vector', 'requirements')
+    op.drop_column('requirements', 'search_vector')
+    op.drop_index('ix_requirements_dependencias_gin', 'requirements')
+    op.drop_index('ix_requirements_project_prioridade', 'requirements')
+    op.drop_column('requirements', 'dependencias')
+    op.drop_column('requirements', 'prioridade')
@@ -0,0 +1,41 @@
+"""store requirement version columns as integers
+
+Revision ID: 010
+Revises: 009
+Create Date: 2025-11-24 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+VERSION_COLUMNS = [('requirements', 'version'), ('requirements_versions', 'version')]
+
+
+def upgrade() -> None:
+    # Migration 001 already creates INTEGER columns; schemas created from the
+    # models while they declared JSONB hold JSON numbers and are converted here
+    inspector = sa.inspect(op.get_bind())
+    for table, column in VERSION_COLUMNS:
+        existing = next(c for c in inspector.get_columns(table) if c['name'] == column)
+        if isinstance(existing['type'], sa.Integer):
+            continue
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(
+                column,
+                type_=sa.Integer,
+                existing_type=existing['type'],
+                existing_nullable=False,
+                postgresql_using=f"({column} #>> '{{}}')::integer"
+            )
+
+
+def downgrade() -> None:
+    # Integer is the type migration 001 created; nothing to restore
+    pass
@@ -0,0 +1,40 @@
+"""index project-scoped listings by their sort key
+
+Revision ID: 011
+Revises: 010
+Create Date: 2025-12-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Project-scoped listings ordered by time: filter and sort served by one index range scan
+    op.create_index(
+        'ix_requirements_gateway_audit_project_created_at',
+        'requirements_gateway_audit',
+        ['project_id', 'created_at']
+    )
+    op.create_index('ix_code_repos_project_created_at', 'code_repos', ['project_id', 'created_at'])
+
+    # Single-column indexes now covered by a composite (or unique constraint) with the same leading column
+    op.drop_index('ix_requirements_gateway_audit_project_id', 'requirements_gateway_audit')
+    op.drop_index('ix_code_repos_project_id', 'code_repos')
+    op.drop_index('ix_qa_sessions_project_id', 'qa_sessions')  # ix_qa_sessions_project_round
+    op.drop_index('ix_requirements_versions_requirement_id', 'requirements_versions')  # uq_requirements_versions_req_version
+
+
+def downgrade() -> None:
+    op.create_index('ix_requirements_versions_requirement_id', 'requirements_versions', ['requirement_id'])
+    op.create_index('ix_qa_sessions_project_id', 'qa_sessions', ['project_id'])
+    op.create_index('ix_code_repos_project_id', 'code_repos', ['project_id'])
+    op.create_index('ix_requirements_gateway_audit_project_id', 'requirements_gateway_audit', ['project_id'])
+    op.drop_index('ix_code_repos_project_created_at', 'code_repos')
+    op.drop_index('ix_requirements_gateway_audit_project_created_at', 'requirements_gateway_audit')
@@ -0,0 +1,24 @@
+"""add a per-project revision counter for requirement writes
+
+Revision ID: 012
+Revises: 011
+Create Date: 2025-12-08 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Incremented in the same transaction as every requirement write; cached dependency graphs compare it
+    op.add_column('projects', sa.Column('graph_revision', sa.Integer, nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('projects', 'graph_revision')
@@ -1,14 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
+from datetime import datetime
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER,
+    decode_cursor, encode_cursor, keyset_page, parse_fields
+)
 from app.models.project import Project, Requirement, RequirementVersion
 from app.schemas.project import (
     ProjectCreate, ProjectRead, ProjectUpdate,
     RequirementsBulkUpsert, RequirementRead, RequirementUpsert,
-    RequirementVersionRead, RequirementUpdateResponse
+    RequirementVersionRead, RequirementUpdateResponse,
+    RequirementsImportBatch, RequirementsImportResult, RequirementDependents,
+    RequirementsValidationResponse, RequirementsSnapshot,
+    RequirementDiff, RequirementsDiffBatch, PriorityEnum
 )
+from app.services.requirement_import import iter_requirement_batches
 from app.services.requirement_service import RequirementService
 from app.core.logging_config import get_logger
 
@@ -16,6 +29,16 @@ router = APIRouter(prefix="/projects", tags=["projects"])
 logger = get_logger(__name__)
 
 
+def _page_response(items, fields: Optional[List[str]], response: Response, next_cursor: Optional[str]):
+    """Attach the next-page cursor; with `fields`, return only those keys (skipping the full model)"""
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    if fields is None:
+        response.headers.update(headers)
+        return items
+    content = jsonable_encoder([{field: getattr(item, field) for field in fields} for item in items])
+    return JSONResponse(content=content, headers=headers)
+
+
 @router.post("", response_model=ProjectRead, status_code=status.HTTP_201_CREATED)
 def create_project(
     project: ProjectCreate,
@@ -38,12 +61,27 @@ def create_project(
 
 @router.get("", response_model=List[ProjectRead])
 def list_projects(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """List all projects"""
-    projects = db.query(Project).offset(skip).limit(limit).all()
+    """
+    List all projects, ordered by (created_at, id).
+    
+    Pass the X-Next-Cursor header of a full page as `cursor` to read the next
+    one; unlike `skip`, its cost does not grow with depth. The two cannot be
+    combined.
+    """
+    if cursor and skip:
+        raise HTTPException(status_code=422, detail="Use either 'cursor' or 'skip', not both")
+    after = decode_cursor(cursor, datetime, UUID) if cursor else None
+    query = keyset_page(db.query(Project), (Project.created_at, Project.id), after, limit)
+    projects = query.offset(skip).all()
+    
+    if len(projects) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(projects[-1].created_at, projects[-1].id)
     return projects
 
 
@@ -130,19 +168,219 @@ def bulk_upsert_requirements(
     return requirements
 
 
+@router.post("/{project_id}/requirements/validate", response_model=RequirementsValidationResponse)
+def validate_requirements(
+    project_id: UUID,
+    bulk_data: RequirementsBulkUpsert,
+    db: Session = Depends(get_db)
+):
+    """
+    Dry-run of the bulk upsert: validate every requirement and write nothing.
+    
+    Returns one ValidationResult per requirement, in request order. Stored
+    dependency codes are resolved with one query for the whole batch.
+    """
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    results = RequirementService.validate_requirements(
+        db=db,
+        project_id=project_id,
+        requirements=bulk_data.requirements
+    )
+    return RequirementsValidationResponse(
+        valid=all(result.valid for result in results),
+        results=results
+    )
+
+
+@router.post("/{project_id}/requirements/import", response_model=RequirementsImportResult)
+async def import_requirements(
+    project_id: UUID,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Stream-import requirements from an NDJSON body (one requirement object per line).
+    
+    The body is read incrementally (plain or chunked upload) and every
+    REQUIREMENTS_IMPORT_BATCH_SIZE lines are validated and upserted in their own
+    transaction, so memory stays bounded by the batch size. Dependencies may
+    reference codes from the same or earlier batches. If a line or batch fails,
+    the error detail lists the batches that were already committed.
+    """
+    logger.info(f"Streaming requirements import for project {project_id}")
+    
+    project = await run_in_threadpool(db.get, Project, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    result = RequirementsImportResult()
+    batches = iter_requirement_batches(
+        request.stream(),
+        batch_size=settings.REQUIREMENTS_IMPORT_BATCH_SIZE,
+        max_line_bytes=settings.REQUIREMENTS_IMPORT_MAX_LINE_BYTES
+    )
+    
+    try:
+        async for first_line, last_line, batch in batches:
+            requirements = await run_in_threadpool(
+                RequirementService.bulk_upsert_requirements,
+                db=db,
+                project_id=project_id,
+                requirements=batch
+            )
+            created = sum(1 for req in requirements if req.version == 1)
+            progress = RequirementsImportBatch(
+                batch=len(result.batches) + 1,
+                first_line=first_line,
+                last_line=last_line,
+                created=created,
+                updated=len(requirements) - created
+            )
+            result.batches.append(progress)
+            result.total += len(requirements)
+            result.created += progress.created
+            result.updated += progress.updated
+            
+            logger.info(
+                "Requirements import batch committed",
+                extra={
+                    "project_id": str(project_id),
+                    "batch": progress.batch,
+                    "lines": f"{first_line}-{last_line}",
+                    "imported": result.total
+                }
+            )
+    except HTTPException as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail={
+                "message": f"Import stopped after {len(result.batches)} committed batches",
+                "error": e.detail,
+                "imported": result.model_dump()
+            }
+        )
+    
+    logger.info(f"Imported {result.total} requirements in {len(result.batches)} batches")
+    return result
+
+
 @router.get("/{project_id}/requirements", response_model=List[RequirementRead])
 def get_project_requirements(
     project_id: UUID,
+    response: Response,
     version: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get project requirements (optionally at specific version)"""
+    """
+    Get project requirements (optionally at specific version).
+    
+    `limit`/`cursor` page by (created_at, id); the next cursor is returned in
+    the X-Next-Cursor header. `fields=id,code,version` returns only those
+    fields, so listings can skip the `data` body.
+    """
+    selected = parse_fields(fields, RequirementRead.model_fields)
+    after = decode_cursor(cursor, datetime, UUID) if cursor else None
+    if after is not None and limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    
     requirements = RequirementService.get_requirements_by_version(
         db=db,
         project_id=project_id,
-        version=version
+        version=version,
+        limit=limit,
+        after=after,
+        fields=selected
     )
-    return requirements
+    
+    next_cursor = None
+    if limit is not None and len(requirements) == limit:
+        next_cursor = encode_cursor(requirements[-1].created_at, requirements[-1].id)
+    return _page_response(requirements, selected, response, next_cursor)
+
+
+@router.get("/{project_id}/requirements/search", response_model=List[RequirementRead])
+def search_requirements(
+    project_id: UUID,
+    q: Optional[str] = Query(None, min_length=1, max_length=500),
+    prioridade: Optional[PriorityEnum] = None,
+    depends_on: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    """
+    Search requirements by description and acceptance criteria (`q`, best
+    matches first), optionally filtered by priority and by a code they depend on
+    """
+    return RequirementService.search_requirements(
+        db=db,
+        project_id=project_id,
+        q=q,
+        prioridade=prioridade.value if prioridade else None,
+        depends_on=depends_on,
+        limit=limit
+    )
+
+
+@router.get("/{project_id}/requirements/snapshot", response_model=RequirementsSnapshot)
+def get_requirements_snapshot(
+    project_id: UUID,
+    version: Optional[int] = None,
+    at: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get all requirements as of a project requirements_version (`version`)
+    or a timestamp (`at`), including content since archived to history
+    """
+    requirements = RequirementService.get_requirements_snapshot(
+        db=db,
+        project_id=project_id,
+        project_version=version,
+        at=at
+    )
+    return RequirementsSnapshot(
+        project_id=project_id,
+        version=version,
+        at=at,
+        requirements=requirements
+    )
+
+
+@router.post("/{project_id}/requirements/diff", response_model=List[RequirementDiff])
+def get_requirements_diff(
+    project_id: UUID,
+    batch: RequirementsDiffBatch,
+    db: Session = Depends(get_db)
+):
+    """Changed paths between versions for many requirements of a project at once"""
+    return RequirementService.get_requirement_diffs(
+        db=db,
+        project_id=project_id,
+        queries=batch.diffs
+    )
+
+
+@router.get("/{project_id}/requirements/{code}/dependents", response_model=RequirementDependents)
+def get_requirement_dependents(
+    project_id: UUID,
+    code: str,
+    transitive: bool = True,
+    db: Session = Depends(get_db)
+):
+    """Get requirements that depend on a code (all transitive dependents by default)"""
+    dependents = RequirementService.get_requirement_dependents(
+        db=db,
+        project_id=project_id,
+        code=code,
+        transitive=transitive
+    )
+    return RequirementDependents(code=code, transitive=transitive, dependents=dependents)
 
 
 @router.put("/requirements/{requirement_id}", response_model=RequirementUpdateResponse)
@@ -194,21 +432,61 @@ def update_requirement_patch(
 @router.get("/requirements/{requirement_id}/versions", response_model=List[RequirementVersionRead])
 def get_requirement_versions(
     requirement_id: UUID,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get all versions of a requirement"""
+    """
+    Get versions of a requirement, newest first.
+    
+    `limit`/`cursor` page by version (next cursor in the X-Next-Cursor
+    header); `fields` selects the returned fields, and leaving out `data`
+    skips loading and rebuilding version bodies.
+    """
+    selected = parse_fields(fields, RequirementVersionRead.model_fields)
+    before = decode_cursor(cursor, int)[0] if cursor else None
+    if before is not None and limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    
     versions = RequirementService.get_requirement_versions(
         db=db,
-        requirement_id=requirement_id
+        requirement_id=requirement_id,
+        limit=limit,
+        before=before,
+        include_data=selected is None or "data" in selected
     )
     
-    if not versions:
+    if not versions and before is None:
         # Check if requirement exists
         req = db.query(Requirement).filter(Requirement.id == requirement_id).first()
         if not req:
             raise HTTPException(status_code=404, detail="Requirement not found")
     
-    return versions
+    next_cursor = None
+    if limit is not None and len(versions) == limit:
+        next_cursor = encode_cursor(versions[-1].version)
+    return _page_response(versions, selected, response, next_cursor)
+
+
+@router.get("/requirements/{requirement_id}/diff", response_model=RequirementDiff)
+def get_requirement_diff(
+    requirement_id: UUID,
+    from_version: int = Query(..., alias="from", ge=1),
+    to_version: Optional[int] = Query(None, alias="to", ge=1),
+    db: Session = Depends(get_db)
+):
+    """
+    Changed paths between two versions of a requirement, as JSON Patch
+    operations; `to` defaults to the current version.
+    """
+    return RequirementService.get_requirement_diff(
+        db=db,
+        requirement_id=requirement_id,
+        from_version=from_version,
+        to_version=to_version
+    )
 
 
 @router.get("/requirements/{requirement_id}/versions/{version}", response_model=RequirementVersionRead)
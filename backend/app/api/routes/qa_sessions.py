@@ -2,12 +2,14 @@
 QA Sessions API Routes - Requirement Refinement (R3)
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 import uuid as uuid_lib
 import logging
 
-from app.core.database import get_db
+from app.core.database import get_async_db, get_db
 from app.models.project import Project
 from app.models.qa_session import QASession
 from app.schemas.qa_session import (
@@ -17,6 +19,7 @@ from app.schemas.qa_session import (
     QASessionListResponse
 )
 from app.tasks.analyst import refine_requirements
+from app.services.heuristic_rules import rule_registry
 
 logger = logging.getLogger(__name__)
 
@@ -88,6 +91,15 @@ async def refine_project_requirements(
             detail=f"Project must be in {valid_states} state. Current: {project.status}"
         )
     
+    # Validate heuristic rule names before enqueuing
+    if request.disabled_rules:
+        unknown_rules = sorted(set(request.disabled_rules) - set(rule_registry.names()))
+        if unknown_rules:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown heuristic rules: {unknown_rules}. Available: {rule_registry.names()}"
+            )
+    
     # Generate request_id if not provided
     if request.request_id is None:
         request.request_id = str(uuid_lib.uuid4())
@@ -109,7 +121,8 @@ async def refine_project_requirements(
             "project_id": str(project_id),
             "max_rounds": request.max_rounds,
             "request_id": request.request_id,
-            "answers": answers_data
+            "answers": answers_data,
+            "disabled_rules": request.disabled_rules
         },
         task_id=request.request_id  # Use request_id as task_id for idempotency
     )
@@ -145,11 +158,11 @@ async def refine_project_requirements(
 )
 async def get_project_qa_sessions(
     project_id: uuid_lib.UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all Q&A sessions for a project"""
     # Validate project exists
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.scalar(select(Project.id).where(Project.id == project_id))
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -157,9 +170,10 @@ async def get_project_qa_sessions(
         )
     
     # Get all sessions
-    sessions = db.query(QASession).filter(
-        QASession.project_id == project_id
-    ).order_by(QASession.round.asc()).all()
+    result = await db.scalars(
+        select(QASession).where(QASession.project_id == project_id).order_by(QASession.round.asc())
+    )
+    sessions = result.all()
     
     return QASessionListResponse(
         project_id=project_id,
@@ -177,13 +191,15 @@ async def get_project_qa_sessions(
 async def get_qa_session(
     project_id: uuid_lib.UUID,
     session_id: uuid_lib.UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific Q&A session"""
-    session = db.query(QASession).filter(
-        QASession.id == session_id,
-        QASession.project_id == project_id
-    ).first()
+    session = await db.scalar(
+        select(QASession).where(
+            QASession.id == session_id,
+            QASession.project_id == project_id
+        )
+    )
     
     if not session:
         raise HTTPException(
@@ -12,6 +12,7 @@ celery_app = Celery(
     include=[
         "app.tasks.analyst",  # R3: Requirement refinement tasks
         "app.tasks.git_clone",  # C1: Git repository clone tasks
+        "app.tasks.requirement_versions",  # Requirement history housekeeping
         # Future: "app.tasks.code_validator",  # C3: Code validation tasks
         # Future: "app.tasks.planner",  # P2: Planning tasks
         # Future: "app.tasks.prompt_generator",  # PR4: Prompt generation tasks
@@ -46,3 +47,10 @@ celery_app.conf.update(
 
 # Optional: Beat schedule for periodic tasks
 celery_app.conf.beat_schedule = {}
+
+if settings.REQUIREMENTS_VERSION_DELTAS:
+    # Re-encode history written before delta storage was enabled
+    celery_app.conf.beat_schedule["compact-requirement-versions"] = {
+        "task": "app.tasks.requirement_versions.compact_requirement_versions_task",
+        "schedule": 24 * 60 * 60,
+    }
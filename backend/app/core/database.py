@@ -1,12 +1,17 @@
+from typing import AsyncIterator, Optional
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from app.core import json_codec
 from app.core.config import settings
 
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
     pool_size=10,
-    max_overflow=20
+    max_overflow=20,
+    json_serializer=json_codec.dumps,
+    json_deserializer=json_codec.loads
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -20,3 +25,45 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Async stack for read-heavy `async def` routes: asyncpg on PostgreSQL, aiosqlite locally
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+_async_engine: Optional[AsyncEngine] = None
+_AsyncSessionLocal: Optional[async_sessionmaker] = None
+
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its driver swapped for the asyncio one (explicit drivers are kept)"""
+    scheme, sep, rest = url.partition("://")
+    backend, _, driver = scheme.partition("+")
+    if backend not in ASYNC_DRIVERS or driver in ("asyncpg", "aiosqlite"):
+        return url
+    return f"{ASYNC_DRIVERS[backend]}{sep}{rest}"
+
+
+def get_async_engine() -> AsyncEngine:
+    """Created on first use, so processes without async routes (Celery) never import the driver"""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        url = async_database_url(settings.DATABASE_URL)
+        # aiosqlite opens file databases without a pool
+        pool_options = {} if url.startswith("sqlite") else {"pool_size": 10, "max_overflow": 20}
+        _async_engine = create_async_engine(
+            url,
+            pool_pre_ping=True,
+            json_serializer=json_codec.dumps,
+            json_deserializer=json_codec.loads,
+            **pool_options
+        )
+        _AsyncSessionLocal = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,88 @@
+"""
+JSON Codec - Encoding and decoding of JSON column payloads
+Uses orjson or msgspec when installed and falls back to the standard library
+"""
+from typing import Any, Callable, Dict, NamedTuple, Union
+import json
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional dependency
+    msgspec = None
+
+from app.core.config import settings
+
+
+class JSONCodec(NamedTuple):
+    name: str
+    dumps: Callable[[Any], str]
+    loads: Callable[[Union[str, bytes]], Any]
+
+
+def _stdlib_codec() -> JSONCodec:
+    return JSONCodec("json", json.dumps, json.loads)
+
+
+def _orjson_codec() -> JSONCodec:
+    def dumps(value: Any) -> str:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            # Integers beyond 64 bits and other values orjson rejects
+            return json.dumps(value)
+
+    return JSONCodec("orjson", dumps, orjson.loads)
+
+
+def _msgspec_codec() -> JSONCodec:
+    encoder = msgspec.json.Encoder()
+    decoder = msgspec.json.Decoder()
+
+    def dumps(value: Any) -> str:
+        try:
+            return encoder.encode(value).decode()
+        except (TypeError, OverflowError):
+            return json.dumps(value)
+
+    def loads(data: Union[str, bytes]) -> Any:
+        try:
+            return decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from None
+
+    return JSONCodec("msgspec", dumps, loads)
+
+
+_FACTORIES: Dict[str, Callable[[], JSONCodec]] = {
+    "orjson": _orjson_codec,
+    "msgspec": _msgspec_codec,
+    "json": _stdlib_codec,
+}
+_AVAILABLE = {"orjson": orjson is not None, "msgspec": msgspec is not None, "json": True}
+
+
+def get_codec(name: str = "auto") -> JSONCodec:
+    """
+    Codec by name ("orjson", "msgspec" or "json").
+
+    "auto" picks the fastest installed one. Naming a library that is not
+    installed falls back to the standard library rather than failing startup.
+    """
+    if name == "auto":
+        name = next(candidate for candidate in _FACTORIES if _AVAILABLE[candidate])
+    elif name not in _FACTORIES:
+        raise ValueError(f"Unknown JSON codec: {name}. Must be one of: auto, {', '.join(_FACTORIES)}")
+    elif not _AVAILABLE[name]:
+        name = "json"
+    return _FACTORIES[name]()
+
+
+# Process-wide codec for JSON columns (JSONB TypeDecorator and the engine's json_serializer)
+codec = get_codec(settings.JSON_CODEC)
+dumps = codec.dumps
+loads = codec.loads
@@ -1,15 +1,19 @@
 """
 Database types that work with both PostgreSQL and SQLite
 """
-from sqlalchemy import TypeDecorator, CHAR, Text
-from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB as PG_JSONB
+from sqlalchemy import TypeDecorator, BINARY, CHAR, Text
+from sqlalchemy.dialects.postgresql import ARRAY as PG_ARRAY, UUID as PG_UUID, JSONB as PG_JSONB
 import uuid
-import json
+from app.core import json_codec
+from app.core.config import settings
 
 
 class UUID(TypeDecorator):
     """Platform-independent UUID type.
-    Uses PostgreSQL's UUID type, otherwise uses CHAR(36), storing as string.
+    Uses PostgreSQL's UUID type, otherwise uses CHAR(36), storing as string,
+    or BINARY(16) storing the raw bytes when UUID_BINARY_STORAGE is set.
+    Results are read from either form, so databases can be converted in place
+    (see app.core.uuid_storage).
     """
     impl = CHAR
     cache_ok = True
@@ -17,6 +21,8 @@ class UUID(TypeDecorator):
     def load_dialect_impl(self, dialect):
         if dialect.name == 'postgresql':
             return dialect.type_descriptor(PG_UUID(as_uuid=True))
+        elif settings.UUID_BINARY_STORAGE:
+            return dialect.type_descriptor(BINARY(16))
         else:
             return dialect.type_descriptor(CHAR(36))
 
@@ -26,10 +32,12 @@ class UUID(TypeDecorator):
         elif dialect.name == 'postgresql':
             return value
         else:
-            if isinstance(value, uuid.UUID):
-                return str(value)
-            else:
-                return str(uuid.UUID(value))
+            # Fast path: UUID instances are never re-parsed
+            if not isinstance(value, uuid.UUID):
+                value = uuid.UUID(value)
+            if settings.UUID_BINARY_STORAGE:
+                return value.bytes
+            return str(value)
 
     def process_result_value(self, value, dialect):
         if value is None:
@@ -39,6 +47,8 @@ class UUID(TypeDecorator):
         else:
             if isinstance(value, uuid.UUID):
                 return value
+            elif isinstance(value, bytes):
+                return uuid.UUID(bytes=value)
             else:
                 return uuid.UUID(value)
 
@@ -52,7 +62,8 @@ class JSONB(TypeDecorator):
 
     def load_dialect_impl(self, dialect):
         if dialect.name == 'postgresql':
-            return dialect.type_descriptor(PG_JSONB())
+            # None is stored as SQL NULL (as on other dialects), not JSON 'null'
+            return dialect.type_descriptor(PG_JSONB(none_as_null=True))
         else:
             return dialect.type_descriptor(Text())
 
@@ -62,7 +73,37 @@ class JSONB(TypeDecorator):
         elif dialect.name == 'postgresql':
             return value
         else:
-            return json.dumps(value)
+            return json_codec.dumps(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return value
+        elif dialect.name == 'postgresql':
+            return value
+        else:
+            return json_codec.loads(value)
+
+
+class TextArray(TypeDecorator):
+    """Platform-independent text array type.
+    Uses PostgreSQL's TEXT[] type, otherwise uses Text, storing as JSON list.
+    """
+    impl = Text
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(PG_ARRAY(Text()))
+        else:
+            return dialect.type_descriptor(Text())
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return value
+        elif dialect.name == 'postgresql':
+            return list(value)
+        else:
+            return json_codec.dumps(list(value))
 
     def process_result_value(self, value, dialect):
         if value is None:
@@ -70,4 +111,4 @@ class JSONB(TypeDecorator):
         elif dialect.name == 'postgresql':
             return value
         else:
-            return json.loads(value)
+            return json_codec.loads(value)
@@ -0,0 +1,97 @@
+"""
+UUID Storage - Convert stored UUIDs of an existing SQLite database between CHAR(36) text and BINARY(16)
+Run before flipping UUID_BINARY_STORAGE: python -m app.core.uuid_storage <DATABASE_URL> [--to-text]
+"""
+from typing import List, Optional, Tuple
+import argparse
+import uuid
+
+from sqlalchemy import MetaData, create_engine, inspect
+from sqlalchemy.engine import Connection
+
+from app.core.types import UUID
+
+
+# UUID columns outside the ORM metadata (the FTS5 search table created with `requirements`)
+EXTRA_UUID_COLUMNS = [("requirements_fts", "requirement_id")]
+
+
+def uuid_columns(metadata: Optional[MetaData] = None) -> List[Tuple[str, str]]:
+    """(table, column) of every UUID-typed column"""
+    if metadata is None:
+        # Register every model on Base.metadata
+        import app.models.code_repo  # noqa: F401
+        import app.models.project  # noqa: F401
+        import app.models.qa_session  # noqa: F401
+        from app.core.database import Base
+        metadata = Base.metadata
+    columns = [
+        (table.name, column.name)
+        for table in metadata.sorted_tables
+        for column in table.columns
+        if isinstance(column.type, UUID)
+    ]
+    return columns + EXTRA_UUID_COLUMNS
+
+
+def convert_uuid_storage(
+    connection: Connection,
+    binary: bool = True,
+    metadata: Optional[MetaData] = None,
+    batch_size: int = 1000
+) -> int:
+    """
+    Rewrite every stored UUID in place as 16 raw bytes (or back to text).
+
+    SQLite never applies column affinity to BLOBs, so the columns keep their
+    declared CHAR(36) type and no table is rebuilt. Values already in the
+    target form are skipped, so an interrupted run can simply be repeated.
+    Foreign keys are checked at commit, once parents and children agree.
+
+    Returns the number of values rewritten; run it inside a transaction.
+    """
+    if connection.dialect.name != "sqlite":
+        raise ValueError(f"UUID storage conversion is only needed on SQLite, not {connection.dialect.name}")
+
+    existing = set(inspect(connection).get_table_names())
+
+    updates = {}
+    for table, column in uuid_columns(metadata):
+        if table not in existing:
+            continue
+        rows = connection.exec_driver_sql(f'SELECT rowid, "{column}" FROM "{table}"').all()
+        if binary:
+            updates[table, column] = [(uuid.UUID(value).bytes, rowid) for rowid, value in rows if isinstance(value, str)]
+        else:
+            updates[table, column] = [(str(uuid.UUID(bytes=value)), rowid) for rowid, value in rows if isinstance(value, bytes)]
+
+    # Set right before writing: the driver's implicit commits after reads would switch it off again
+    connection.exec_driver_sql("PRAGMA defer_foreign_keys = ON")
+    for (table, column), values in updates.items():
+        for start in range(0, len(values), batch_size):
+            connection.exec_driver_sql(
+                f'UPDATE "{table}" SET "{column}" = ? WHERE rowid = ?',
+                values[start:start + batch_size]
+            )
+
+    converted = sum(len(values) for values in updates.values())
+    return converted
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("database_url", help="e.g. sqlite:///./app.db")
+    parser.add_argument("--to-text", action="store_true", help="convert BINARY(16) back to CHAR(36) text")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.database_url)
+    with engine.begin() as connection:
+        converted = convert_uuid_storage(connection, binary=not args.to_text)
+    engine.dispose()
+
+    target = "CHAR(36) text" if args.to_text else "BINARY(16)"
+    print(f"Converted {converted} UUID values to {target}; set UUID_BINARY_STORAGE={not args.to_text}")
+
+
+if __name__ == "__main__":
+    main()
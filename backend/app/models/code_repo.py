@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Text, DateTime, ForeignKey, LargeBinary, Numeric
+from sqlalchemy import Column, Text, DateTime, ForeignKey, Index, LargeBinary, Numeric
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
@@ -8,6 +8,9 @@ from app.core.types import UUID
 
 class CodeRepository(Base):
     __tablename__ = "code_repos"
+    __table_args__ = (
+        Index("ix_code_repos_project_created_at", "project_id", "created_at"),
+    )
 
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     project_id = Column(UUID, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
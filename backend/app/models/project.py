@@ -1,18 +1,22 @@
-from sqlalchemy import Column, Text, DateTime, ForeignKey, Integer
+from sqlalchemy import Column, DDL, Text, DateTime, ForeignKey, Index, Integer, UniqueConstraint, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
 from app.core.database import Base
-from app.core.types import UUID, JSONB
+from app.core.types import UUID, JSONB, TextArray
 
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        Index("ix_projects_created_at_id", "created_at", "id"),
+    )
 
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     name = Column(Text, nullable=False)
     status = Column(Text, nullable=False, default="DRAFT")
     requirements_version = Column(Integer, nullable=False, default=1)
+    graph_revision = Column(Integer, nullable=False, default=0)  # Bumped in every requirement write's transaction
     created_by = Column(UUID, nullable=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now())
     updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
@@ -24,12 +28,21 @@ class Project(Base):
 
 class Requirement(Base):
     __tablename__ = "requirements"
+    __table_args__ = (
+        UniqueConstraint("project_id", "code", name="uq_requirements_project_code"),
+        Index("ix_requirements_project_version", "project_id", "version"),
+        Index("ix_requirements_project_created_at_id", "project_id", "created_at", "id"),
+    )
 
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     project_id = Column(UUID, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
     code = Column(Text, nullable=False)
-    version = Column(JSONB, nullable=False, default=1)
+    version = Column(Integer, nullable=False, default=1)
     data = Column(JSONB, nullable=False)
+    project_version = Column(Integer, nullable=False, default=1)  # Project requirements_version at write time
+    # Copied out of `data` on every write for indexed search filters
+    prioridade = Column(Text, nullable=True)
+    dependencias = Column(TextArray, nullable=False, default=list)
     created_at = Column(DateTime, nullable=False, server_default=func.now())
     updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
 
@@ -37,13 +50,53 @@ class Requirement(Base):
     versions = relationship("RequirementVersion", back_populates="requirement", cascade="all, delete-orphan")
 
 
+# Full-text search: PostgreSQL gets a generated tsvector column from migration 009;
+# SQLite (local runs and tests) keeps an FTS5 table in step with triggers
+def sqlite_fts_text(row: str) -> str:
+    """Indexed column values of the requirement `row` (a trigger's new/old or a table alias)"""
+    return f"""
+    json_extract({row}.data, '$.descricao'),
+    (SELECT group_concat(value, ' ') FROM json_each({row}.data, '$.criterios_aceitacao'))
+"""
+
+
+# Idempotent, so `requirement_search.ensure_sqlite_fts` can replay them on existing databases
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS requirements_fts "
+    "USING fts5(requirement_id UNINDEXED, descricao, criterios_aceitacao)",
+    f"""CREATE TRIGGER IF NOT EXISTS requirements_fts_insert AFTER INSERT ON requirements BEGIN
+        INSERT INTO requirements_fts (requirement_id, descricao, criterios_aceitacao)
+        VALUES (new.id, {sqlite_fts_text("new")});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS requirements_fts_update AFTER UPDATE OF data ON requirements BEGIN
+        DELETE FROM requirements_fts WHERE requirement_id = old.id;
+        INSERT INTO requirements_fts (requirement_id, descricao, criterios_aceitacao)
+        VALUES (new.id, {sqlite_fts_text("new")});
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS requirements_fts_delete AFTER DELETE ON requirements BEGIN
+        DELETE FROM requirements_fts WHERE requirement_id = old.id;
+    END""",
+)
+
+for _statement in SQLITE_FTS_DDL:
+    event.listen(Requirement.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(
+    Requirement.__table__, "after_drop", DDL("DROP TABLE IF EXISTS requirements_fts").execute_if(dialect="sqlite")
+)
+
+
 class RequirementVersion(Base):
     __tablename__ = "requirements_versions"
+    __table_args__ = (
+        UniqueConstraint("requirement_id", "version", name="uq_requirements_versions_req_version"),
+    )
 
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     requirement_id = Column(UUID, ForeignKey("requirements.id", ondelete="CASCADE"), nullable=False)
-    version = Column(JSONB, nullable=False)
-    data = Column(JSONB, nullable=False)
+    version = Column(Integer, nullable=False)
+    data = Column(JSONB, nullable=True)  # Full content; NULL when stored as a delta
+    delta = Column(JSONB, nullable=True)  # Reverse JSON patch from the next version
+    project_version = Column(Integer, nullable=False, default=1)  # Copied from the archived row
     created_at = Column(DateTime, nullable=False, server_default=func.now())
 
     requirement = relationship("Requirement", back_populates="versions")
@@ -51,6 +104,9 @@ class RequirementVersion(Base):
 
 class RequirementsGatewayAudit(Base):
     __tablename__ = "requirements_gateway_audit"
+    __table_args__ = (
+        Index("ix_requirements_gateway_audit_project_created_at", "project_id", "created_at"),
+    )
 
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     project_id = Column(UUID, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
@@ -1,8 +1,8 @@
 """
 QA Session model for requirement refinement
 """
-from sqlalchemy import Column, Text, Integer, DateTime, ForeignKey, String
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Text, Integer, DateTime, ForeignKey, Index, String
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 import uuid
 from app.core.database import Base
@@ -15,6 +15,9 @@ class QASession(Base):
     Each session represents one round of questions/answers.
     """
     __tablename__ = "qa_sessions"
+    __table_args__ = (
+        Index("ix_qa_sessions_project_round", "project_id", "round"),
+    )
 
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     project_id = Column(UUID, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
@@ -23,6 +26,8 @@ class QASession(Base):
     questions = Column(JSONB, nullable=False)  # List of question objects
     answers = Column(JSONB, nullable=True)  # List of answer objects (null until answered)
     quality_flags = Column(JSONB, nullable=True)  # Quality metrics for questions
+    # Per-requirement versions and questions for incremental rounds (deferred: can be large)
+    analysis_snapshot = deferred(Column(JSONB, nullable=True))
     created_at = Column(DateTime, nullable=False, server_default=func.now())
     updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
 
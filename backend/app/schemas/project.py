@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator, model_validator, ConfigDict
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from uuid import UUID
 from datetime import datetime
 from enum import Enum
@@ -121,10 +121,69 @@ class RequirementVersionRead(BaseModel):
     created_at: datetime
 
 
+class RequirementSnapshotEntry(BaseModel):
+    """A requirement as it was at a point in time"""
+    id: UUID
+    code: str
+    version: int
+    data: RequirementData
+
+
+class RequirementsSnapshot(BaseModel):
+    """All requirements of a project as of a project version or a timestamp"""
+    project_id: UUID
+    version: Optional[int] = None
+    at: Optional[datetime] = None
+    requirements: List[RequirementSnapshotEntry]
+
+
+class RequirementDiff(BaseModel):
+    """Changed paths between two versions of a requirement, as JSON Patch operations"""
+    requirement_id: UUID
+    from_version: int
+    to_version: int
+    changes: List[Dict[str, Any]]
+
+
+class RequirementDiffQuery(BaseModel):
+    """One requirement to diff; `to_version` defaults to the current version"""
+    requirement_id: UUID
+    from_version: int = Field(..., ge=1)
+    to_version: Optional[int] = Field(None, ge=1)
+
+
+class RequirementsDiffBatch(BaseModel):
+    diffs: List[RequirementDiffQuery] = Field(..., min_length=1, max_length=1000)
+
+
 class RequirementsBulkUpsert(BaseModel):
     requirements: List[RequirementUpsert]
 
 
+class RequirementsImportBatch(BaseModel):
+    """Progress record for one committed batch of a streaming import"""
+    batch: int
+    first_line: int
+    last_line: int
+    created: int
+    updated: int
+
+
+class RequirementsImportResult(BaseModel):
+    """Summary of a streaming NDJSON requirements import"""
+    total: int = 0
+    created: int = 0
+    updated: int = 0
+    batches: List[RequirementsImportBatch] = Field(default_factory=list)
+
+
+class RequirementDependents(BaseModel):
+    """Requirements that depend on a code, in dependency order"""
+    code: str
+    transitive: bool
+    dependents: List[str]
+
+
 class ValidationResult(BaseModel):
     """Validation result with errors and warnings"""
     valid: bool
@@ -136,3 +195,9 @@ class RequirementUpdateResponse(BaseModel):
     """Response for requirement update with validation info"""
     requirement: RequirementRead
     validation: ValidationResult
+
+
+class RequirementsValidationResponse(BaseModel):
+    """Per-requirement results of a validate-only (dry-run) batch"""
+    valid: bool
+    results: List[ValidationResult]
@@ -41,6 +41,22 @@ class QualityFlags(BaseModel):
     duplicate_count: int = Field(default=0, ge=0, description="Number of duplicate questions")
     total_score: float = Field(default=1.0, ge=0.0, le=1.0, description="Overall quality score")
     notes: Optional[str] = Field(None, description="Additional quality notes")
+    rule_metrics: Optional[Dict[str, Dict[str, float]]] = Field(
+        None, description="Per heuristic rule: wall time in ms and questions produced"
+    )
+
+
+class RequirementQualitySummary(BaseModel):
+    """Heuristic quality metrics aggregated over a batch of requirements"""
+    requirement_count: int = Field(default=0, ge=0, description="Number of requirements scored")
+    ambiguous_count: int = Field(default=0, ge=0, description="Requirements with ambiguous terms")
+    untestable_count: int = Field(default=0, ge=0, description="Requirements with subjective terms")
+    missing_metrics_count: int = Field(default=0, ge=0, description="Requirements lacking quantitative metrics")
+    missing_acceptance_count: int = Field(default=0, ge=0, description="Requirements without acceptance criteria")
+    unresolved_pronoun_count: int = Field(default=0, ge=0, description="Requirements with unresolved pronouns")
+    unbounded_io_count: int = Field(default=0, ge=0, description="Requirements with inputs but no size limits")
+    mean_length: float = Field(default=0.0, ge=0.0, description="Mean requirement text length")
+    total_score: float = Field(default=1.0, ge=0.0, le=1.0, description="Share of heuristic checks passed")
 
 
 class RefineRequest(BaseModel):
@@ -49,6 +65,7 @@ class RefineRequest(BaseModel):
     max_rounds: int = Field(default=5, ge=1, le=10, description="Maximum refinement rounds")
     request_id: Optional[str] = Field(None, description="Optional idempotency key (UUID). Auto-generated if not provided.")
     answers: Optional[List[Answer]] = Field(None, description="Answers to previous questions")
+    disabled_rules: Optional[List[str]] = Field(None, description="Heuristic rules to skip for this project")
     
     @field_validator('project_id')
     @classmethod
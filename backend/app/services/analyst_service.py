@@ -2,11 +2,38 @@
 Analyst Service - Requirement Refinement Logic
 Implements heuristics for generating questions about requirements
 """
-from typing import List, Dict, Any, Optional, Tuple
-from uuid import uuid4
-import re
-from app.schemas.qa_session import Question, QuestionCategory, QualityFlags
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import List, Dict, Any, Callable, Iterable, Iterator, NamedTuple, Optional, Tuple, Union
+import heapq
+import logging
+import time
+import numpy as np
+from sqlalchemy import Text, case, func, literal, null
+from app.schemas.qa_session import Question, QuestionCategory, QualityFlags, RequirementQualitySummary
 from app.models.project import Requirement
+from app.services.heuristic_matcher import HeuristicMatcher, MatchHits
+from app.services.heuristic_rules import HeuristicRule, rule_registry
+from app.services.question_candidates import EXCERPT_LENGTH, QuestionCandidate
+from app.services.requirement_features import build_feature_matrix, summarize_feature_matrix
+from app.services.question_cache import QuestionCache, question_cache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Tie-break after priority: categories in alphabetical order of their values
+CATEGORY_RANK = {
+    category.value: rank
+    for rank, category in enumerate(sorted(QuestionCategory, key=lambda c: c.value))
+}
+
+
+class AnalysisRow(NamedTuple):
+    """Lightweight requirement projection carrying only what the heuristics read"""
+    id: Any
+    code: str
+    text: str
 
 
 class AnalystService:
@@ -34,238 +61,600 @@ class AnalystService:
         "calls", "connects to", "relies on", "based on"
     }
     
-    def __init__(self):
-        self.questions_cache: Dict[str, List[Question]] = {}
+    # Keys holding the requirement text in `data`, in order of preference
+    TEXT_KEYS = ("description", "descricao", "text", "content", "requirement")
+    
+    # Bump whenever heuristics or question templates change to invalidate cached questions
+    HEURISTICS_VERSION = 3
+    
+    # Layout of `analysis_snapshot`; snapshots in another layout are ignored
+    SNAPSHOT_FORMAT = 2
+    
+    # Compiled once when the class loads; shared by every instance
+    _matcher = HeuristicMatcher(AMBIGUOUS_WORDS, UNTESTABLE_WORDS, DEPENDENCY_KEYWORDS)
+    
+    def __init__(
+        self,
+        cache: Optional[QuestionCache] = None,
+        rules: Optional[Iterable[str]] = None
+    ):
+        """
+        Args:
+            cache: Question cache (defaults to the process-wide one)
+            rules: Names of the registered heuristic rules to run (default: all),
+                e.g. from `rule_registry.select(disabled, max_cost)`
+        """
+        self.questions_cache = cache if cache is not None else question_cache
+        names = rule_registry.names() if rules is None else list(rules)
+        self.rules: List[HeuristicRule] = [rule_registry.get(name) for name in names]
+        
+        # Cached questions and round snapshots are only valid for the same rule set
+        self.heuristics_key = f"{self.HEURISTICS_VERSION}:{','.join(names)}"
+        
+        # Rule name -> [wall seconds, candidates produced] for the current analysis
+        # ("scan" counts the shared matcher pass and the requirements scanned)
+        self.rule_stats: Dict[str, List[float]] = {}
     
     def analyze_requirements(
         self,
-        requirements: List[Requirement],
-        max_questions: int = 10
+        requirements: Iterable[Union[Requirement, AnalysisRow]],
+        max_questions: int = 10,
+        workers: int = 0
     ) -> Tuple[List[Question], QualityFlags]:
         """
         Analyze requirements and generate refinement questions.
         
+        Requirements are consumed in chunks of ANALYST_STREAM_CHUNK_SIZE, so a
+        streamed query result is never held in memory as a whole; only the
+        top-k selection heap outlives each chunk.
+        
         Args:
-            requirements: List of project requirements
+            requirements: Project requirements (any iterable, e.g. a `yield_per` query)
             max_questions: Maximum number of questions to generate
+            workers: Process-pool size for large requirement sets (0 = serial)
             
         Returns:
             Tuple of (questions, quality_flags)
         """
-        all_questions: List[Question] = []
+        self.rule_stats = {}
+        candidates = (
+            candidate
+            for chunk in _chunked(requirements, settings.ANALYST_STREAM_CHUNK_SIZE)
+            for questions in self._collect_questions(chunk, workers)
+            for candidate in questions
+        )
+        
+        return self._select_questions(candidates, max_questions)
+    
+    def changed_requirement_ids(
+        self,
+        versions: Dict[str, int],
+        snapshot: Optional[Dict[str, Any]]
+    ) -> List[str]:
+        """
+        Diff current requirement versions against a previous round's snapshot.
+        
+        Args:
+            versions: Requirement id -> current version
+            snapshot: `analysis_snapshot` stored on the previous QA session
+        
+        Returns:
+            Ids of requirements that are new or whose version moved
+        """
+        previous = self._snapshot_entries(snapshot)
+        return [
+            req_id for req_id, version in versions.items()
+            if req_id not in previous or previous[req_id]["version"] != version
+        ]
+    
+    def analyze_incremental(
+        self,
+        versions: Dict[str, int],
+        changed_requirements: Iterable[Union[Requirement, AnalysisRow]],
+        snapshot: Optional[Dict[str, Any]],
+        max_questions: int = 10,
+        workers: int = 0,
+        load_texts: Optional[Callable[[List[str]], Dict[str, str]]] = None
+    ) -> Tuple[List[Question], QualityFlags, Dict[str, Any]]:
+        """
+        Analyze only changed requirements and carry the rest forward.
+        
+        Candidates stream into the top-k selection like in `analyze_requirements`;
+        besides the heap only the snapshot for the next round is accumulated. It
+        keeps each requirement's version, code and candidate keys (template and
+        terms) but no text. Excerpts of carried-forward questions that end up
+        selected are filled in through `load_texts`.
+        
+        Args:
+            versions: Requirement id -> current version, in analysis order
+            changed_requirements: Requirements listed by `changed_requirement_ids`
+                (any iterable; consumed in chunks)
+            snapshot: `analysis_snapshot` stored on the previous QA session
+            max_questions: Maximum number of questions to generate
+            workers: Process-pool size for large requirement sets (0 = serial)
+            load_texts: Requirement codes -> current text, for the selected questions
+        
+        Returns:
+            Tuple of (questions, quality_flags, snapshot for this round)
+        """
+        previous = self._snapshot_entries(snapshot)
+        self.rule_stats = {}
+        
+        entries: Dict[str, Dict[str, Any]] = {}
+        
+        def reuse(req_id: str, version: int) -> Iterator[QuestionCandidate]:
+            entry = previous.get(req_id)
+            if entry is None or entry["version"] != version:
+                return  # changed but deleted between listing and loading
+            # Untouched since the previous round: reuse its candidates as-is
+            entries[req_id] = entry
+            for key in entry["questions"]:
+                yield QuestionCandidate.from_snapshot_key(entry["code"], key)
+        
+        def candidates() -> Iterator[QuestionCandidate]:
+            # Changed rows arrive in the order of `versions`: walk both together so
+            # candidates reach the selection heap in analysis order, chunk by chunk
+            listed = iter(versions.items())
+            for chunk in _chunked(changed_requirements, settings.ANALYST_STREAM_CHUNK_SIZE):
+                for req, questions in zip(chunk, self._collect_questions(chunk, workers)):
+                    req_id = str(req.id)
+                    if req_id not in versions:
+                        continue  # created after the listing
+                    for listed_id, version in listed:
+                        if listed_id == req_id:
+                            break
+                        yield from reuse(listed_id, version)
+                    entries[req_id] = self._snapshot_entry(versions[req_id], questions)
+                    yield from questions
+            for listed_id, version in listed:
+                yield from reuse(listed_id, version)
+        
+        def fill_excerpts(selected: List[QuestionCandidate]) -> List[QuestionCandidate]:
+            codes = sorted({c.req_code for c in selected if c.excerpt is None})
+            texts = load_texts(codes) if codes and load_texts is not None else {}
+            return [
+                c._replace(excerpt=texts[c.req_code][:EXCERPT_LENGTH])
+                if c.excerpt is None and c.req_code in texts else c
+                for c in selected
+            ]
+        
+        questions, quality_flags = self._select_questions(candidates(), max_questions, fill_excerpts)
+        new_snapshot = {
+            "format": self.SNAPSHOT_FORMAT,
+            "heuristics_version": self.HEURISTICS_VERSION,
+            "heuristics_key": self.heuristics_key,
+            "requirements": entries
+        }
+        return questions, quality_flags, new_snapshot
+    
+    def score_requirements(self, requirements: List[Union[Requirement, AnalysisRow]]) -> np.ndarray:
+        """
+        Compute heuristic features for a batch of requirements (quality sweeps).
+        
+        Args:
+            requirements: Requirements to score, e.g. every requirement of every project
+        
+        Returns:
+            int64 matrix with one row per requirement and
+            `requirement_features.FEATURE_COLUMNS` as columns
+        """
+        texts = [self._requirement_text(req) for req in requirements]
+        return build_feature_matrix(self._matcher, texts)
+    
+    def summarize_scores(self, matrix: np.ndarray) -> RequirementQualitySummary:
+        """Aggregate a `score_requirements` matrix with array reductions"""
+        return summarize_feature_matrix(matrix)
+    
+    @classmethod
+    def analysis_columns(cls, dialect_name: str) -> List[Any]:
+        """
+        Columns for a lightweight analysis query: id, code, text and data.
         
-        for req in requirements:
-            req_text = self._extract_requirement_text(req.data)
+        On PostgreSQL the text is extracted server-side from the first string-valued
+        TEXT_KEYS entry, and `data` is only returned for rows where that fails. Other
+        dialects return `data` and leave extraction to `analysis_row`.
+        """
+        if dialect_name != "postgresql":
+            return [Requirement.id, Requirement.code, null().label("text"), Requirement.data]
+        
+        text = case(
+            *[
+                (
+                    func.jsonb_typeof(Requirement.data.op("->")(literal(key, Text))) == "string",
+                    Requirement.data.op("->>", return_type=Text)(literal(key, Text))
+                )
+                for key in cls.TEXT_KEYS
+            ],
+            else_=null()
+        )
+        return [
+            Requirement.id,
+            Requirement.code,
+            text.label("text"),
+            case((text.is_(None), Requirement.data), else_=null()).label("data"),
+        ]
+    
+    def analysis_row(self, row: Any) -> AnalysisRow:
+        """Turn a row of `analysis_columns` into an AnalysisRow"""
+        text = row.text if row.text is not None else self._extract_requirement_text(row.data)
+        return AnalysisRow(row.id, row.code, text)
+    
+    def _snapshot_entries(self, snapshot: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Per-requirement entries of a snapshot, or none if it predates the current layout, heuristics or rules"""
+        if (
+            not snapshot
+            or snapshot.get("format") != self.SNAPSHOT_FORMAT
+            or snapshot.get("heuristics_key") != self.heuristics_key
+        ):
+            return {}
+        return snapshot.get("requirements", {})
+    
+    @staticmethod
+    def _snapshot_entry(version: int, questions: List[QuestionCandidate]) -> Dict[str, Any]:
+        """Snapshot entry of one analyzed requirement (its candidates all share the requirement's code)"""
+        return {
+            "version": version,
+            "code": questions[0].req_code if questions else None,
+            "questions": [c.snapshot_key() for c in questions]
+        }
+    
+    def _collect_questions(
+        self,
+        requirements: List[Union[Requirement, AnalysisRow]],
+        workers: int
+    ) -> List[List[QuestionCandidate]]:
+        """Question candidates per requirement, in input order, analyzing only cache misses"""
+        items = [(self._requirement_text(req), req.code) for req in requirements]
+        keys = [
+            QuestionCache.make_key(self.heuristics_key, req_code, req_text)
+            for req_text, req_code in items
+        ]
+        
+        # Unchanged requirements are served from the cache
+        per_requirement = self.questions_cache.get_many(keys)
+        
+        misses: Dict[str, Tuple[str, str]] = {}
+        for key, item in zip(keys, items):
+            if key not in per_requirement:
+                misses[key] = item
+        
+        if misses:
+            miss_items = list(misses.values())
+            if workers > 1 and len(miss_items) >= settings.ANALYST_PARALLEL_MIN_REQUIREMENTS:
+                analyzed = self._analyze_parallel(miss_items, workers)
+            else:
+                analyzed = [self._analyze_requirement(req_text, req_code) for req_text, req_code in miss_items]
             
-            # Apply different heuristics
-            all_questions.extend(self._check_testability(req_text, req.code))
-            all_questions.extend(self._check_ambiguity(req_text, req.code))
-            all_questions.extend(self._check_dependencies(req_text, req.code))
-            all_questions.extend(self._check_acceptance_criteria(req_text, req.code))
-            all_questions.extend(self._check_constraints(req_text, req.code))
+            fresh = dict(zip(misses, analyzed))
+            self.questions_cache.set_many(fresh)
+            per_requirement.update(fresh)
         
-        # Remove duplicates and prioritize
-        unique_questions = self._deduplicate_questions(all_questions)
-        prioritized_questions = self._prioritize_questions(unique_questions)[:max_questions]
+        return [per_requirement[key] for key in keys]
+    
+    def _select_questions(
+        self,
+        candidates: Iterable[QuestionCandidate],
+        max_questions: int,
+        fill: Optional[Callable[[List[QuestionCandidate]], List[QuestionCandidate]]] = None
+    ) -> Tuple[List[Question], QualityFlags]:
+        """Deduplicate, prioritize and score the generated questions"""
+        prioritized_questions, total_count = self._select_top_questions(candidates, max_questions, fill)
         
         # Generate quality flags
-        quality_flags = self._evaluate_question_quality(prioritized_questions, all_questions)
+        quality_flags = self._evaluate_question_quality(prioritized_questions, total_count)
+        quality_flags.rule_metrics = self._rule_metrics()
         
         return prioritized_questions, quality_flags
     
+    def _select_top_questions(
+        self,
+        candidates: Iterable[QuestionCandidate],
+        max_questions: int,
+        fill: Optional[Callable[[List[QuestionCandidate]], List[QuestionCandidate]]] = None
+    ) -> Tuple[List[Question], int]:
+        """
+        Stream candidates through a bounded heap and keep the best `max_questions`.
+        
+        Same result as deduplicating, sorting by (priority, category) and slicing,
+        without sorting or normalizing every candidate. Equal texts come from the
+        same template, so a duplicate shares its first occurrence's priority and
+        category and ranks right behind it: checking duplicates against the heap
+        members is enough. Only the survivors are materialized into `Question` models,
+        after `fill` (if given) completes them.
+        
+        Returns:
+            Tuple of (selected questions, number of candidates seen)
+        """
+        if max_questions <= 0:
+            return [], sum(1 for _ in candidates)
+        
+        # Min-heap on the negated sort key: heap[0] is the worst question kept so far
+        heap: List[Tuple[int, int, int, str, QuestionCandidate]] = []
+        held_texts = set()
+        seq = -1
+        
+        for seq, candidate in enumerate(candidates):
+            key = (-candidate.priority, -CATEGORY_RANK[candidate.category], -seq)
+            if len(heap) >= max_questions and key < heap[0][:3]:
+                continue
+            
+            # Text is rendered only for candidates that would enter the heap
+            normalized = self._normalize_question_text(candidate.text)
+            if normalized in held_texts:
+                continue
+            
+            entry = (*key, normalized, candidate)
+            if len(heap) < max_questions:
+                heapq.heappush(heap, entry)
+            else:
+                evicted = heapq.heapreplace(heap, entry)
+                held_texts.discard(evicted[3])
+            held_texts.add(normalized)
+        
+        # Keys are unique (seq), so candidates themselves are never compared
+        survivors = [candidate for *_, candidate in sorted(heap, reverse=True)]
+        if fill is not None:
+            survivors = fill(survivors)
+        return [candidate.materialize() for candidate in survivors], seq + 1
+    
+    def _analyze_parallel(
+        self,
+        items: List[Tuple[str, str]],
+        workers: int
+    ) -> List[List[QuestionCandidate]]:
+        """
+        Analyze contiguous shards in a process pool.
+        Shard results are concatenated in input order, so dedup and
+        prioritization see exactly the sequence the serial path produces.
+        """
+        shard_size = -(-len(items) // workers)
+        shards = [items[i:i + shard_size] for i in range(0, len(items), shard_size)]
+        
+        analyze = partial(_analyze_shard, rules=[rule.name for rule in self.rules])
+        try:
+            with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+                shard_results = list(executor.map(analyze, shards))
+        except (AssertionError, OSError) as e:
+            # Daemonic worker processes (e.g. Celery prefork children) cannot fork
+            logger.warning(f"Parallel analysis unavailable, falling back to serial: {e}")
+            return [self._analyze_requirement(req_text, req_code) for req_text, req_code in items]
+        
+        for _, shard_stats in shard_results:
+            self._merge_rule_stats(shard_stats)
+        return [questions for shard, _ in shard_results for questions in shard]
+    
+    def _analyze_requirement(self, req_text: str, req_code: str) -> List[QuestionCandidate]:
+        """Scan a requirement once and apply every enabled rule to the shared hits, timing each"""
+        stats = self.rule_stats
+        
+        started = time.perf_counter()
+        hits = self._matcher.scan(req_text)
+        finished = time.perf_counter()
+        scan_stats = stats.setdefault("scan", [0.0, 0])
+        scan_stats[0] += finished - started
+        scan_stats[1] += 1
+        
+        questions: List[QuestionCandidate] = []
+        for rule in self.rules:
+            started = finished
+            produced = rule.check(self, req_text, req_code, hits)
+            finished = time.perf_counter()
+            
+            rule_stats = stats.setdefault(rule.name, [0.0, 0])
+            rule_stats[0] += finished - started
+            rule_stats[1] += len(produced)
+            questions.extend(produced)
+        return questions
+    
+    def _merge_rule_stats(self, stats: Dict[str, List[float]]) -> None:
+        for name, (seconds, produced) in stats.items():
+            merged = self.rule_stats.setdefault(name, [0.0, 0])
+            merged[0] += seconds
+            merged[1] += produced
+    
+    def _rule_metrics(self) -> Optional[Dict[str, Dict[str, float]]]:
+        """Per-rule wall time (ms) and candidates produced during the current analysis"""
+        if not self.rule_stats:
+            return None
+        return {
+            name: {"ms": round(seconds * 1000, 3), "hits": int(produced)}
+            for name, (seconds, produced) in self.rule_stats.items()
+        }
+    
+    def _requirement_text(self, requirement: Union[Requirement, AnalysisRow]) -> str:
+        """Text of an ORM requirement or of an already projected row"""
+        if isinstance(requirement, AnalysisRow):
+            return requirement.text
+        return self._extract_requirement_text(requirement.data)
+    
     def _extract_requirement_text(self, data: Dict[str, Any]) -> str:
         """Extract text content from requirement data (JSONB)"""
         if isinstance(data, dict):
             # Try common keys
-            for key in ["description", "text", "content", "requirement"]:
+            for key in self.TEXT_KEYS:
                 if key in data and isinstance(data[key], str):
                     return data[key]
             # Fallback: concatenate all string values
             return " ".join(str(v) for v in data.values() if isinstance(v, str))
         return str(data)
     
-    def _check_testability(self, req_text: str, req_code: str) -> List[Question]:
+    def _check_testability(
+        self,
+        req_text: str,
+        req_code: str,
+        hits: Optional[MatchHits] = None
+    ) -> List[QuestionCandidate]:
         """Check for untestable or vague requirements"""
         questions = []
-        req_lower = req_text.lower()
+        if hits is None:
+            hits = self._matcher.scan(req_text)
         
         # Check for untestable words
-        found_untestable = [word for word in self.UNTESTABLE_WORDS if word in req_lower]
+        found_untestable = hits.untestable
         
         if found_untestable:
-            questions.append(Question(
-                id=str(uuid4()),
-                category=QuestionCategory.TESTABILITY,
-                text=f"The requirement '{req_code}' uses subjective terms ({', '.join(found_untestable[:3])}). "
-                     f"Can you provide measurable criteria? (e.g., response time < 2s, error rate < 0.1%)",
-                context=f"Requirement: {req_text[:200]}...",
-                priority=1  # High priority
+            questions.append(QuestionCandidate(
+                template="subjective_terms",
+                req_code=req_code,
+                terms=found_untestable[:3],
+                excerpt=req_text[:EXCERPT_LENGTH]
             ))
         
         # Check for missing quantitative metrics
-        has_numbers = bool(re.search(r'\d+', req_text))
-        has_units = bool(re.search(r'\d+\s*(ms|s|min|hour|MB|GB|%|users?)', req_text, re.IGNORECASE))
+        has_numbers = hits.has_numbers
         
         if not has_numbers and len(req_text) > 50:
-            questions.append(Question(
-                id=str(uuid4()),
-                category=QuestionCategory.TESTABILITY,
-                text=f"Requirement '{req_code}' lacks quantitative metrics. "
-                     f"What are the measurable success criteria?",
-                context=f"Requirement: {req_text[:200]}...",
-                priority=2
+            questions.append(QuestionCandidate(
+                template="missing_metrics",
+                req_code=req_code,
+                terms=(),
+                excerpt=req_text[:EXCERPT_LENGTH]
             ))
         
         # Check for acceptance criteria
-        if "acceptance" not in req_lower and "criteria" not in req_lower:
-            questions.append(Question(
-                id=str(uuid4()),
-                category=QuestionCategory.ACCEPTANCE_CRITERIA,
-                text=f"What are the acceptance criteria for requirement '{req_code}'?",
-                context=f"Requirement: {req_text[:200]}...",
-                priority=2
+        if not hits.has_acceptance:
+            questions.append(QuestionCandidate(
+                template="missing_acceptance",
+                req_code=req_code,
+                terms=(),
+                excerpt=req_text[:EXCERPT_LENGTH]
             ))
         
         return questions
     
-    def _check_ambiguity(self, req_text: str, req_code: str) -> List[Question]:
+    def _check_ambiguity(
+        self,
+        req_text: str,
+        req_code: str,
+        hits: Optional[MatchHits] = None
+    ) -> List[QuestionCandidate]:
         """Check for ambiguous language"""
         questions = []
-        req_lower = req_text.lower()
+        if hits is None:
+            hits = self._matcher.scan(req_text)
         
         # Find ambiguous words
-        found_ambiguous = [word for word in self.AMBIGUOUS_WORDS if word in req_lower]
+        found_ambiguous = hits.ambiguous
         
         if found_ambiguous:
-            questions.append(Question(
-                id=str(uuid4()),
-                category=QuestionCategory.AMBIGUITY,
-                text=f"Requirement '{req_code}' contains ambiguous terms ({', '.join(found_ambiguous[:3])}). "
-                     f"Can you clarify with specific values or conditions?",
-                context=f"Requirement: {req_text[:200]}...",
-                priority=1
+            questions.append(QuestionCandidate(
+                template="ambiguous_terms",
+                req_code=req_code,
+                terms=found_ambiguous[:3],
+                excerpt=req_text[:EXCERPT_LENGTH]
             ))
         
         # Check for undefined pronouns
-        if re.search(r'\b(it|this|that|these|those)\b', req_lower):
-            if not re.search(r'(the\s+\w+|said\s+\w+|aforementioned)', req_lower):
-                questions.append(Question(
-                    id=str(uuid4()),
-                    category=QuestionCategory.AMBIGUITY,
-                    text=f"Requirement '{req_code}' uses pronouns (it/this/that). "
-                         f"What do these pronouns refer to exactly?",
-                    context=f"Requirement: {req_text[:200]}...",
-                    priority=3
-                ))
+        if hits.has_unresolved_pronouns:
+            questions.append(QuestionCandidate(
+                template="unresolved_pronouns",
+                req_code=req_code,
+                terms=(),
+                excerpt=req_text[:EXCERPT_LENGTH]
+            ))
         
         return questions
     
-    def _check_dependencies(self, req_text: str, req_code: str) -> List[Question]:
+    def _check_dependencies(
+        self,
+        req_text: str,
+        req_code: str,
+        hits: Optional[MatchHits] = None
+    ) -> List[QuestionCandidate]:
         """Check for dependency-related issues"""
         questions = []
-        req_lower = req_text.lower()
+        if hits is None:
+            hits = self._matcher.scan(req_text)
         
         # Check for dependency keywords
-        found_deps = [kw for kw in self.DEPENDENCY_KEYWORDS if kw in req_lower]
+        found_deps = hits.dependencies
         
         if found_deps:
-            questions.append(Question(
-                id=str(uuid4()),
-                category=QuestionCategory.DEPENDENCIES,
-                text=f"Requirement '{req_code}' mentions dependencies ({found_deps[0]}). "
-                     f"What are the specific external systems, libraries, or services required?",
-                context=f"Requirement: {req_text[:200]}...",
-                priority=2
+            questions.append(QuestionCandidate(
+                template="dependency_systems",
+                req_code=req_code,
+                terms=found_deps[:1],
+                excerpt=req_text[:EXCERPT_LENGTH]
             ))
             
             # Ask about version constraints
-            questions.append(Question(
-                id=str(uuid4()),
-                category=QuestionCategory.DEPENDENCIES,
-                text=f"For requirement '{req_code}', are there version constraints or compatibility requirements "
-                     f"for the dependencies?",
-                context=f"Requirement: {req_text[:200]}...",
-                priority=3
+            questions.append(QuestionCandidate(
+                template="dependency_versions",
+                req_code=req_code,
+                terms=(),
+                excerpt=req_text[:EXCERPT_LENGTH]
             ))
         
         return questions
     
-    def _check_acceptance_criteria(self, req_text: str, req_code: str) -> List[Question]:
+    def _check_acceptance_criteria(
+        self,
+        req_text: str,
+        req_code: str,
+        hits: Optional[MatchHits] = None
+    ) -> List[QuestionCandidate]:
         """Check for missing acceptance criteria"""
         questions = []
-        req_lower = req_text.lower()
+        if hits is None:
+            hits = self._matcher.scan(req_text)
         
         # Check if acceptance criteria are defined
-        has_given_when_then = all(kw in req_lower for kw in ["given", "when", "then"])
-        has_acceptance = "acceptance" in req_lower or "criteria" in req_lower
+        has_given_when_then = hits.has_given_when_then
+        has_acceptance = hits.has_acceptance
         
         if not has_given_when_then and not has_acceptance and len(req_text) > 100:
-            questions.append(Question(
-                id=str(uuid4()),
-                category=QuestionCategory.ACCEPTANCE_CRITERIA,
-                text=f"Can you define acceptance criteria for requirement '{req_code}' "
-                     f"in Given/When/Then format?",
-                context=f"Requirement: {req_text[:200]}...",
-                priority=2
+            questions.append(QuestionCandidate(
+                template="given_when_then",
+                req_code=req_code,
+                terms=(),
+                excerpt=req_text[:EXCERPT_LENGTH]
             ))
         
         return questions
     
-    def _check_constraints(self, req_text: str, req_code: str) -> List[Question]:
+    def _check_constraints(
+        self,
+        req_text: str,
+        req_code: str,
+        hits: Optional[MatchHits] = None
+    ) -> List[QuestionCandidate]:
         """Check for constraints and edge cases"""
         questions = []
-        req_lower = req_text.lower()
+        if hits is None:
+            hits = self._matcher.scan(req_text)
         
         # Check for error handling
-        if "error" not in req_lower and "exception" not in req_lower and "fail" not in req_lower:
-            questions.append(Question(
-                id=str(uuid4()),
-                category=QuestionCategory.CONSTRAINTS,
-                text=f"How should the system handle errors or exceptions for requirement '{req_code}'?",
-                context=f"Requirement: {req_text[:200]}...",
-                priority=3
+        if not hits.mentions_errors:
+            questions.append(QuestionCandidate(
+                template="error_handling",
+                req_code=req_code,
+                terms=(),
+                excerpt=req_text[:EXCERPT_LENGTH]
             ))
         
         # Check for boundaries and limits
-        if re.search(r'\b(input|data|file|upload|request)\b', req_lower):
-            if not re.search(r'\b(max|min|limit|size|length)\b', req_lower):
-                questions.append(Question(
-                    id=str(uuid4()),
-                    category=QuestionCategory.CONSTRAINTS,
-                    text=f"What are the size/length limits and boundaries for requirement '{req_code}'?",
-                    context=f"Requirement: {req_text[:200]}...",
-                    priority=3
-                ))
+        if hits.has_unbounded_io:
+            questions.append(QuestionCandidate(
+                template="size_limits",
+                req_code=req_code,
+                terms=(),
+                excerpt=req_text[:EXCERPT_LENGTH]
+            ))
         
         return questions
     
-    def _deduplicate_questions(self, questions: List[Question]) -> List[Question]:
-        """Remove duplicate or very similar questions"""
-        seen_texts = set()
-        unique_questions = []
-        
-        for q in questions:
-            # Normalize text for comparison
-            normalized = q.text.lower().strip()
-            normalized = re.sub(r'\s+', ' ', normalized)
-            
-            if normalized not in seen_texts:
-                seen_texts.add(normalized)
-                unique_questions.append(q)
-        
-        return unique_questions
-    
-    def _prioritize_questions(self, questions: List[Question]) -> List[Question]:
-        """Sort questions by priority (1=highest)"""
-        return sorted(questions, key=lambda q: (q.priority, q.category.value))
+    @staticmethod
+    def _normalize_question_text(text: str) -> str:
+        """Lowercase and collapse whitespace for duplicate detection"""
+        return " ".join(text.lower().split())
     
     def _evaluate_question_quality(
         self,
         selected_questions: List[Question],
-        all_questions: List[Question]
+        total_count: int
     ) -> QualityFlags:
-        """Evaluate the quality of generated questions"""
-        duplicate_count = len(all_questions) - len(selected_questions)
+        """Evaluate the quality of generated questions (`total_count` = candidates before selection)"""
+        duplicate_count = total_count - len(selected_questions)
         
         # Count questions by category
         category_counts = {}
@@ -291,7 +680,7 @@ class AnalystService:
     
     def refine_requirements_with_answers(
         self,
-        requirements: List[Requirement],
+        requirements: Iterable[Union[Requirement, AnalysisRow]],
         answers: List[Dict[str, Any]]
     ) -> Dict[str, Any]:
         """
@@ -321,3 +710,47 @@ class AnalystService:
             "refinements": refinements,
             "total_changes": len(refinements)
         }
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Split any iterable into lists of at most `size` items"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, max(size, 1)))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _analyze_shard(
+    items: List[Tuple[str, str]],
+    rules: Optional[List[str]] = None
+) -> Tuple[List[List[QuestionCandidate]], Dict[str, List[float]]]:
+    """Run the heuristics over (text, code) pairs; module-level so process pools can pickle it"""
+    analyst = AnalystService(rules=rules)
+    results = [analyst._analyze_requirement(req_text, req_code) for req_text, req_code in items]
+    return results, analyst.rule_stats
+
+
+# Built-in rules, in the order their questions are generated. Costs are relative:
+# testability emits up to three candidates per requirement, the rest one or two.
+rule_registry.register(
+    "testability", AnalystService._check_testability, cost=2,
+    description="Subjective terms, missing metrics and missing acceptance criteria"
+)
+rule_registry.register(
+    "ambiguity", AnalystService._check_ambiguity, cost=1,
+    description="Ambiguous words and unresolved pronouns"
+)
+rule_registry.register(
+    "dependencies", AnalystService._check_dependencies, cost=1,
+    description="External systems and version constraints"
+)
+rule_registry.register(
+    "acceptance_criteria", AnalystService._check_acceptance_criteria, cost=1,
+    description="Long requirements without Given/When/Then criteria"
+)
+rule_registry.register(
+    "constraints", AnalystService._check_constraints, cost=1,
+    description="Error handling and unbounded inputs"
+)
@@ -123,10 +123,10 @@ class CodeRepositoryService:
         return self.db.query(CodeRepository).filter(CodeRepository.id == repo_id).first()
     
     def get_repositories_by_project(self, project_id: UUID) -> List[CodeRepository]:
-        """Get all repositories for a project"""
+        """Get all repositories for a project, oldest first"""
         return self.db.query(CodeRepository).filter(
             CodeRepository.project_id == project_id
-        ).all()
+        ).order_by(CodeRepository.created_at, CodeRepository.id).all()
     
     def update_clone_status(self, repo_id: UUID, status: str, 
                           sandbox_path: Optional[str] = None,
@@ -0,0 +1,343 @@
+"""
+Dependency Graph - Per-project requirement dependency index
+Keeps a topological order up to date on every edit so cycles are rejected without re-traversing the graph
+"""
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+from uuid import UUID
+import threading
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.project import Project, Requirement
+
+
+class DependencyCycleError(ValueError):
+    """Raised when new dependencies would close a cycle"""
+
+    def __init__(self, cycle: List[str]):
+        self.cycle = cycle
+        super().__init__(f"Circular dependency: {' -> '.join(cycle)}")
+
+
+# Undo record for one requirement: (code, dependencies before the edit)
+JournalEntry = Tuple[str, Set[str]]
+
+
+class Journal:
+    """Everything an `_apply` changed: previous dependencies per code and the nodes it created"""
+    
+    def __init__(self):
+        self.entries: List[JournalEntry] = []
+        self.created: List[str] = []
+
+
+class DependencyGraph:
+    """
+    Requirement codes and the codes they depend on (`dependencias`).
+
+    A topological order (dependencies before dependents) is maintained with the
+    Pearce-Kelly dynamic algorithm: inserting an edge that already agrees with
+    the order costs O(1), and otherwise only the nodes ranked between its two
+    ends are searched and re-ranked. Removing edges never breaks the order.
+    """
+
+    def __init__(self):
+        self._dependencies: Dict[str, Set[str]] = {}
+        self._dependents: Dict[str, Set[str]] = {}
+        self._order: Dict[str, int] = {}
+        self._next_rank = 0
+
+    def apply(self, updates: Mapping[str, Iterable[str]]) -> None:
+        """
+        Replace the dependencies of each code in `updates`, atomically.
+
+        If any new edge closes a cycle, every change from this call is undone
+        and DependencyCycleError reports the cycle as a `depends on` chain.
+        """
+        journal = Journal()
+        try:
+            self._apply(updates, journal)
+        except DependencyCycleError:
+            self._revert(journal)
+            raise
+
+    def check(self, updates: Mapping[str, Iterable[str]]) -> None:
+        """Raise DependencyCycleError if `apply(updates)` would; the graph is left unchanged"""
+        journal = Journal()
+        try:
+            self._apply(updates, journal)
+        finally:
+            self._revert(journal)
+
+    def dependencies(self, code: str, transitive: bool = True) -> List[str]:
+        """Codes `code` depends on, in topological order"""
+        return self._reachable(code, self._dependencies, transitive)
+
+    def dependents(self, code: str, transitive: bool = True) -> List[str]:
+        """Codes that depend on `code`, in topological order"""
+        return self._reachable(code, self._dependents, transitive)
+
+    def order(self) -> List[str]:
+        """Every code, dependencies before dependents"""
+        return sorted(self._order, key=self._order.__getitem__)
+
+    def __contains__(self, code: object) -> bool:
+        return code in self._order
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _add_node(self, code: str, journal: Optional[Journal] = None) -> None:
+        if code not in self._order:
+            self._dependencies[code] = set()
+            self._dependents[code] = set()
+            self._order[code] = self._next_rank
+            self._next_rank += 1
+            if journal is not None:
+                journal.created.append(code)
+    
+    def _remove_node(self, code: str) -> None:
+        """Drop a node without edges; the ranks of the others stay a valid order"""
+        del self._dependencies[code]
+        del self._dependents[code]
+        del self._order[code]
+
+    def _apply(self, updates: Mapping[str, Iterable[str]], journal: Journal) -> None:
+        wanted = {code: set(dependencies) for code, dependencies in updates.items()}
+
+        # Journal everything first, so a cycle halfway through is fully undone
+        for code in wanted:
+            self._add_node(code, journal)
+            journal.entries.append((code, set(self._dependencies[code])))
+
+        # Drop stale edges before adding new ones: only the final state may be cyclic
+        for code, dependencies in wanted.items():
+            for dependency in self._dependencies[code] - dependencies:
+                self._remove_edge(code, dependency)
+        for code, dependencies in wanted.items():
+            for dependency in dependencies - self._dependencies[code]:
+                self._add_edge(code, dependency, journal)
+
+    def _remove_edge(self, code: str, dependency: str) -> None:
+        self._dependencies[code].discard(dependency)
+        self._dependents[dependency].discard(code)
+
+    def _add_edge(self, code: str, dependency: str, journal: Optional[Journal] = None) -> None:
+        if code == dependency:
+            raise DependencyCycleError([code, code])
+        self._add_node(dependency, journal)
+
+        lower, upper = self._order[code], self._order[dependency]
+        if lower < upper:
+            # The dependent is ranked first: re-rank the affected region
+            forward = self._search_dependents(code, dependency, upper)
+            backward = self._search_dependencies(dependency, lower)
+            self._reorder(backward, forward)
+
+        self._dependencies[code].add(dependency)
+        self._dependents[dependency].add(code)
+
+    def _search_dependents(self, start: str, target: str, upper: int) -> List[str]:
+        """Dependents of `start` ranked below `upper`; reaching `target` means a cycle"""
+        parents: Dict[str, Optional[str]] = {start: None}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for dependent in self._dependents[node]:
+                if dependent == target:
+                    # target depends on node, ..., which depends on start
+                    chain: List[str] = []
+                    step: Optional[str] = node
+                    while step is not None:
+                        chain.append(step)
+                        step = parents[step]
+                    raise DependencyCycleError([start, target] + chain)
+                if dependent not in parents and self._order[dependent] < upper:
+                    parents[dependent] = node
+                    stack.append(dependent)
+        return list(parents)
+
+    def _search_dependencies(self, start: str, lower: int) -> List[str]:
+        """Dependencies of `start` ranked above `lower`"""
+        seen = {start}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for dependency in self._dependencies[node]:
+                if dependency not in seen and self._order[dependency] > lower:
+                    seen.add(dependency)
+                    stack.append(dependency)
+        return list(seen)
+
+    def _reorder(self, backward: List[str], forward: List[str]) -> None:
+        """Give the backward set the lowest of the combined ranks, keeping each set's relative order"""
+        backward.sort(key=self._order.__getitem__)
+        forward.sort(key=self._order.__getitem__)
+        nodes = backward + forward
+        ranks = sorted(self._order[node] for node in nodes)
+        for node, rank in zip(nodes, ranks):
+            self._order[node] = rank
+
+    def _revert(self, journal: Journal) -> None:
+        # Re-adding old edges goes through _add_edge, which repairs the order
+        for code, previous in journal.entries:
+            for dependency in self._dependencies[code] - previous:
+                self._remove_edge(code, dependency)
+        for code, previous in journal.entries:
+            for dependency in previous - self._dependencies[code]:
+                self._add_edge(code, dependency)
+        # Nodes the journal created had no edges before it, so none are left now
+        for code in journal.created:
+            self._remove_node(code)
+
+    def _reachable(self, code: str, edges: Dict[str, Set[str]], transitive: bool) -> List[str]:
+        if code not in edges:
+            return []
+        if not transitive:
+            found = set(edges[code])
+        else:
+            found = set()
+            queue = deque([code])
+            while queue:
+                for neighbour in edges[queue.popleft()]:
+                    if neighbour not in found:
+                        found.add(neighbour)
+                        queue.append(neighbour)
+            found.discard(code)
+        return sorted(found, key=self._order.__getitem__)
+
+
+def bump_graph_revision(db: Session, project_id: UUID) -> int:
+    """
+    Increment the project's `graph_revision` inside the current transaction and return it.
+
+    Call it from every requirement write before committing: the row lock it
+    takes also serializes concurrent writers of the same project.
+    """
+    return db.execute(
+        update(Project)
+        .where(Project.id == project_id)
+        .values(graph_revision=Project.graph_revision + 1)
+        .returning(Project.graph_revision)
+    ).scalar_one()
+
+
+class DependencyGraphIndex:
+    """
+    LRU of per-project dependency graphs.
+
+    Each graph is stored with the project's `graph_revision` it reflects.
+    Writers report the revision their commit produced so the graph stays
+    current; any other revision (a write from another process) triggers a
+    rebuild on next use.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._graphs: "OrderedDict[UUID, Tuple[Optional[int], DependencyGraph]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, db: Session, project_id: UUID) -> DependencyGraph:
+        """Current graph for a project, rebuilt only if its requirements were written since"""
+        revision = self._revision(db, project_id)
+        with self._lock:
+            return self._current(db, project_id, revision)
+
+    def check(self, db: Session, project_id: UUID, updates: Mapping[str, Iterable[str]]) -> None:
+        """
+        Raise DependencyCycleError if the updates would close a cycle.
+        
+        Advisory only: another writer may commit right after the revision is
+        read. Writes rely on `apply`, which checks again under the row lock.
+        """
+        graph = self.get(db, project_id)
+        with self._lock:
+            graph.check(updates)
+
+    def apply(
+        self, db: Session, project_id: UUID, updates: Mapping[str, Iterable[str]], revision: int
+    ) -> None:
+        """
+        Apply the edges of a pending write; call `committed` or `invalidate` afterwards.
+        
+        `revision` is what `bump_graph_revision` returned in the same
+        transaction. Its row lock keeps other writers out until commit, so the
+        graph matched against `revision - 1` is the committed one and a cycle
+        raised here is authoritative.
+        """
+        with self._lock:
+            self._current(db, project_id, revision - 1).apply(updates)
+
+    def dependents(self, db: Session, project_id: UUID, code: str, transitive: bool = True) -> List[str]:
+        """Codes that depend on `code`, dependencies first"""
+        graph = self.get(db, project_id)
+        with self._lock:
+            return graph.dependents(code, transitive)
+
+    def committed(self, project_id: UUID, revision: int) -> None:
+        """
+        Record the `bump_graph_revision` result of a committed write whose edges were applied.
+
+        The graph only matches if it was current right before that write;
+        otherwise another writer got in between and it is dropped.
+        """
+        with self._lock:
+            entry = self._graphs.get(project_id)
+            if entry is None:
+                return
+            if entry[0] == revision - 1:
+                self._graphs[project_id] = (revision, entry[1])
+            else:
+                self._graphs.pop(project_id)
+
+    def invalidate(self, project_id: UUID) -> None:
+        with self._lock:
+            self._graphs.pop(project_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._graphs.clear()
+
+    def _current(self, db: Session, project_id: UUID, revision: Optional[int]) -> DependencyGraph:
+        # Callers hold self._lock
+        entry = self._graphs.get(project_id)
+        if entry is None or entry[0] != revision:
+            entry = (revision, self._build(db, project_id))
+            self._graphs[project_id] = entry
+        self._graphs.move_to_end(project_id)
+        while len(self._graphs) > self.maxsize:
+            self._graphs.popitem(last=False)
+        return entry[1]
+    
+    @staticmethod
+    def _revision(db: Session, project_id: UUID) -> Optional[int]:
+        return db.query(Project.graph_revision).filter(Project.id == project_id).scalar()
+
+    @staticmethod
+    def _build(db: Session, project_id: UUID) -> DependencyGraph:
+        rows = db.query(Requirement.code, Requirement.data).filter(
+            Requirement.project_id == project_id
+        ).order_by(Requirement.code)
+
+        graph = DependencyGraph()
+        for code, data in rows:
+            dependencies = list((data or {}).get("dependencias") or [])
+            try:
+                graph.apply({code: dependencies})
+            except DependencyCycleError:
+                # Cycles stored before this index existed: only the edges closing them are left out
+                kept: List[str] = []
+                for dependency in dependencies:
+                    try:
+                        graph.apply({code: kept + [dependency]})
+                        kept.append(dependency)
+                    except DependencyCycleError:
+                        pass
+        return graph
+
+
+# Process-wide index shared by every request and worker thread
+dependency_graphs = DependencyGraphIndex(maxsize=settings.REQUIREMENTS_GRAPH_CACHE_SIZE)
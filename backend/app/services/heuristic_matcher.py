@@ -0,0 +1,210 @@
+"""
+Heuristic Matcher - Single-pass keyword and pattern scanning
+Compiles the analyst vocabularies into one trie-shaped regex so each requirement text is scanned once
+"""
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Sequence, Tuple
+import re
+
+
+def _word_boundary(word: str) -> str:
+    """Suffix asserting `word` is a whole word (leading \\b checked from the end)"""
+    return rf"(?<!\w{re.escape(word)})\b"
+
+
+UNIT_PATTERN = r"\d*\s*(?i:ms|s|min|hour|MB|GB|%|users?)"
+
+# Joins texts for batch scans; no keyword or structural token can match across it
+TEXT_SEPARATOR = "\x00"
+
+# Non-ASCII digits are rare, so they are checked outside the trie
+UNICODE_NUMBER = re.compile(rf"\d(?P<unit>{UNIT_PATTERN})?")
+
+# Structural tokens read by the analyst checks: (literal prefix, regex suffix, tag).
+# A token whose matched text differs from its prefix is classified by
+# `_variable_tag` (digits with an optional unit, "the"/"said" followed by a word).
+STRUCTURAL_TOKENS: Tuple[Tuple[str, str, str], ...] = (
+    *((digit, rf"(?:{UNIT_PATTERN})?", "number") for digit in "0123456789"),
+    *((word, _word_boundary(word), "pronoun") for word in ("it", "this", "that", "these", "those")),
+    ("the", r"\s+\w+", "clarifier"),
+    ("said", r"\s+\w+", "clarifier"),
+    ("aforementioned", "", "clarifier"),
+    *((word, _word_boundary(word), "io") for word in ("input", "data", "file", "upload", "request")),
+    *((word, _word_boundary(word), "bound") for word in ("max", "min", "limit", "size", "length")),
+)
+
+# Plain substrings the checks look for, mapped to the tag they set
+MARKER_WORDS: Dict[str, str] = {
+    "acceptance": "acceptance",
+    "criteria": "acceptance",
+    "given": "given",
+    "when": "when",
+    "then": "then",
+    "error": "error",
+    "exception": "error",
+    "fail": "error",
+}
+
+
+class MatchHits(NamedTuple):
+    """Hit vector produced by one scan of a requirement text"""
+    ambiguous: Tuple[str, ...]
+    untestable: Tuple[str, ...]
+    dependencies: Tuple[str, ...]
+    tags: FrozenSet[str]
+
+    @property
+    def has_numbers(self) -> bool:
+        return "number" in self.tags or "unit" in self.tags
+
+    @property
+    def has_units(self) -> bool:
+        return "unit" in self.tags
+
+    @property
+    def has_acceptance(self) -> bool:
+        return "acceptance" in self.tags
+
+    @property
+    def has_given_when_then(self) -> bool:
+        return {"given", "when", "then"} <= self.tags
+
+    @property
+    def has_unresolved_pronouns(self) -> bool:
+        return "pronoun" in self.tags and "clarifier" not in self.tags
+
+    @property
+    def mentions_errors(self) -> bool:
+        return "error" in self.tags
+
+    @property
+    def has_unbounded_io(self) -> bool:
+        return "io" in self.tags and "bound" not in self.tags
+
+
+class HeuristicMatcher:
+    """
+    Precompiled multi-pattern scanner for the analyst heuristics.
+
+    Every vocabulary keyword, marker word and structural token is inserted into a
+    prefix trie that is emitted as a single regex and wrapped in a lookahead, so
+    one `findall` pass over the lowercased text reports every hit, including
+    overlapping ones. Keywords keep the substring semantics of `word in text`.
+    """
+
+    def __init__(
+        self,
+        ambiguous: Iterable[str],
+        untestable: Iterable[str],
+        dependencies: Iterable[str]
+    ):
+        vocabularies = {
+            "ambiguous": set(ambiguous),
+            "untestable": set(untestable),
+            "dependencies": set(dependencies),
+        }
+
+        # literal -> (vocabulary names, tags) it contributes to
+        literal_targets: Dict[str, Tuple[List[str], List[str]]] = {}
+        for name, words in vocabularies.items():
+            for word in words:
+                literal_targets.setdefault(word, ([], []))[0].append(name)
+        for word, tag in MARKER_WORDS.items():
+            literal_targets.setdefault(word, ([], []))[1].append(tag)
+
+        # The trie reports one token per offset (the longest), so a literal
+        # that is a prefix of a longer one is credited when the longer one hits.
+        self._literal_hits: Dict[str, Tuple[Tuple[str, ...], Tuple[Tuple[str, str], ...]]] = {}
+        for word in literal_targets:
+            covered = [other for other in literal_targets if word.startswith(other)]
+            self._literal_hits[word] = (
+                tuple(tag for other in covered for tag in literal_targets[other][1]),
+                tuple((name, other) for other in covered for name in literal_targets[other][0]),
+            )
+
+        # Structural tokens are identified by their text, the rest by `_variable_tag`
+        self._structural_tags: Dict[str, str] = {}
+        root: Dict[str, dict] = {}
+        for word in literal_targets:
+            self._insert(root, word, "")
+        for prefix, suffix, tag in STRUCTURAL_TOKENS:
+            self._insert(root, prefix, suffix)
+            self._structural_tags[prefix] = tag
+
+        trie = self._emit(root)
+        self._pattern = re.compile("(?=(" + trie + "))")
+        self._batch_pattern = re.compile("(?=(" + re.escape(TEXT_SEPARATOR) + "|" + trie + "))")
+
+    @staticmethod
+    def _insert(root: Dict[str, dict], word: str, suffix: str) -> None:
+        node = root
+        for char in word:
+            node = node.setdefault(char, {})
+        node.setdefault("", []).append(suffix)
+
+    @classmethod
+    def _emit(cls, node: Dict[str, dict]) -> str:
+        """Emit a trie node as a regex, trying longer continuations first"""
+        branches = [
+            re.escape(char) + cls._emit(child)
+            for char, child in sorted(node.items()) if char != ""
+        ]
+        terminals = sorted(node.get("", []), key=lambda suffix: suffix == "")
+        branches.extend(terminals)
+
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    @staticmethod
+    def _variable_tag(token: str) -> str:
+        return "unit" if token[0].isdigit() else "clarifier"
+
+    def scan(self, text: str) -> MatchHits:
+        """Scan text once and return the hits every check reads"""
+        found: Dict[str, Dict[str, None]] = {
+            "ambiguous": {}, "untestable": {}, "dependencies": {}
+        }
+        tags = set()
+
+        lowered = text.lower()
+        for token in self._pattern.findall(lowered):
+            literal = self._literal_hits.get(token)
+            if literal is None:
+                tags.add(self._structural_tags.get(token) or self._variable_tag(token))
+                continue
+
+            literal_tags, vocabulary_hits = literal
+            tags.update(literal_tags)
+            for name, word in vocabulary_hits:
+                # dict keeps first-occurrence order without duplicates
+                found[name][word] = None
+
+        if not lowered.isascii():
+            for match in UNICODE_NUMBER.finditer(lowered):
+                tags.add("unit" if match.group("unit") else "number")
+
+        return MatchHits(
+            ambiguous=tuple(found["ambiguous"]),
+            untestable=tuple(found["untestable"]),
+            dependencies=tuple(found["dependencies"]),
+            tags=frozenset(tags),
+        )
+
+    def scan_tokens(self, texts: Sequence[str]) -> List[str]:
+        """
+        Scan many texts in one pass.
+
+        Returns the raw tokens of every text in order, with TEXT_SEPARATOR
+        between consecutive texts; `describe` maps a token to what it hits.
+        Non-ASCII digits are not reported (see UNICODE_NUMBER).
+        """
+        # Stray separators become another non-word, non-space character
+        joined = TEXT_SEPARATOR.join(text.replace(TEXT_SEPARATOR, "\x01") for text in texts)
+        return self._batch_pattern.findall(joined.lower())
+
+    def describe(self, token: str) -> Tuple[Tuple[str, ...], Tuple[Tuple[str, str], ...]]:
+        """Tags and (vocabulary, keyword) hits contributed by one scanned token"""
+        literal = self._literal_hits.get(token)
+        if literal is None:
+            return (self._structural_tags.get(token) or self._variable_tag(token),), ()
+        return literal
@@ -0,0 +1,89 @@
+"""
+Heuristic Rules - Registry of the analyst's question-generating heuristics
+Each rule declares a relative cost so expensive rules can be switched off for large projects
+"""
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+
+class HeuristicRule(NamedTuple):
+    """
+    A registered heuristic.
+
+    `check(analyst, req_text, req_code, hits)` returns the question candidates
+    for one requirement; `hits` is the shared `MatchHits` scan of `req_text`.
+    """
+    name: str
+    check: Callable[..., List[Any]]
+    cost: int
+    description: str
+
+
+class RuleRegistry:
+    """Ordered collection of heuristic rules; rules run in registration order"""
+
+    def __init__(self):
+        self._rules: Dict[str, HeuristicRule] = {}
+
+    def register(
+        self,
+        name: str,
+        check: Callable[..., List[Any]],
+        cost: int = 1,
+        description: str = ""
+    ) -> HeuristicRule:
+        """Register a rule under a unique name"""
+        if name in self._rules:
+            raise ValueError(f"Heuristic rule already registered: {name}")
+        if cost < 1:
+            raise ValueError(f"Heuristic rule cost must be >= 1, got {cost}")
+
+        rule = HeuristicRule(name=name, check=check, cost=cost, description=description)
+        self._rules[name] = rule
+        return rule
+
+    def unregister(self, name: str) -> None:
+        self._rules.pop(name, None)
+
+    def get(self, name: str) -> HeuristicRule:
+        try:
+            return self._rules[name]
+        except KeyError:
+            raise ValueError(f"Unknown heuristic rule: {name}") from None
+
+    def names(self) -> List[str]:
+        return list(self._rules)
+
+    def select(
+        self,
+        disabled: Optional[Iterable[str]] = None,
+        max_cost: Optional[int] = None
+    ) -> List[str]:
+        """
+        Names of the rules to run, in registration order.
+
+        Args:
+            disabled: Rule names switched off (unknown names raise ValueError)
+            max_cost: Drop rules whose declared cost exceeds this value
+        """
+        disabled = set(disabled or ())
+        unknown = disabled - set(self._rules)
+        if unknown:
+            raise ValueError(f"Unknown heuristic rules: {', '.join(sorted(unknown))}")
+
+        return [
+            rule.name for rule in self._rules.values()
+            if rule.name not in disabled and (max_cost is None or rule.cost <= max_cost)
+        ]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._rules
+
+    def __iter__(self) -> Iterator[HeuristicRule]:
+        return iter(list(self._rules.values()))
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+
+# Process-wide registry; the built-in rules are registered by analyst_service
+rule_registry = RuleRegistry()
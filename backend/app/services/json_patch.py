@@ -0,0 +1,106 @@
+"""
+JSON Patch - Minimal RFC 6902 diff/apply for requirement version deltas
+Deltas are computed per top-level key, review diffs down to the changed leaves; apply understands add/remove/replace on any JSON Pointer path
+"""
+from typing import Any, Dict, List
+import copy
+
+
+Patch = List[Dict[str, Any]]
+
+
+def _escape(key: str) -> str:
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(source: Dict[str, Any], target: Dict[str, Any]) -> Patch:
+    """
+    Operations turning `source` into `target`.
+
+    Changed keys are replaced whole: requirement payloads are shallow, so
+    per-key granularity captures nearly all of the saving.
+    """
+    patch: Patch = []
+    for key in source:
+        if key not in target:
+            patch.append({"op": "remove", "path": f"/{_escape(key)}"})
+    for key, value in target.items():
+        if key not in source:
+            patch.append({"op": "add", "path": f"/{_escape(key)}", "value": value})
+        elif source[key] != value:
+            patch.append({"op": "replace", "path": f"/{_escape(key)}", "value": value})
+    return patch
+
+
+def diff_documents(source: Any, target: Any, path: str = "") -> Patch:
+    """
+    Operations turning `source` into `target`, down to the deepest changed path.
+    
+    Objects are compared key by key and equal-length lists item by item; a
+    list that grew or shrank is replaced whole.
+    """
+    if isinstance(source, dict) and isinstance(target, dict):
+        patch: Patch = []
+        for key in source:
+            if key not in target:
+                patch.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in target.items():
+            if key not in source:
+                patch.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": value})
+            else:
+                patch.extend(diff_documents(source[key], value, f"{path}/{_escape(key)}"))
+        return patch
+    if isinstance(source, list) and isinstance(target, list) and len(source) == len(target):
+        patch = []
+        for index, (old, new) in enumerate(zip(source, target)):
+            patch.extend(diff_documents(old, new, f"{path}/{index}"))
+        return patch
+    if source == target and type(source) is type(target):
+        return []
+    return [{"op": "replace", "path": path, "value": target}]
+
+
+def apply_patch(document: Any, patch: Patch) -> Any:
+    """Return a patched copy of `document`; raises ValueError on an inapplicable operation"""
+    result = copy.deepcopy(document)
+    for operation in patch:
+        op = operation.get("op")
+        tokens = [_unescape(token) for token in operation.get("path", "").split("/")[1:]]
+        if not tokens:
+            if op in ("add", "replace"):
+                result = copy.deepcopy(operation["value"])
+                continue
+            raise ValueError(f"Cannot {op} the document root")
+
+        parent = result
+        try:
+            for token in tokens[:-1]:
+                parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        except (KeyError, IndexError, ValueError):
+            raise ValueError(f"Path not found: {operation.get('path')}") from None
+
+        key = tokens[-1]
+        if isinstance(parent, list):
+            index = len(parent) if key == "-" else int(key)
+            if op == "add":
+                parent.insert(index, copy.deepcopy(operation["value"]))
+            elif op == "replace":
+                parent[index] = copy.deepcopy(operation["value"])
+            elif op == "remove":
+                del parent[index]
+            else:
+                raise ValueError(f"Unsupported patch operation: {op}")
+        else:
+            if op == "add" or (op == "replace" and key in parent):
+                parent[key] = copy.deepcopy(operation["value"])
+            elif op == "remove" and key in parent:
+                del parent[key]
+            elif op in ("replace", "remove"):
+                raise ValueError(f"Path not found: {operation.get('path')}")
+            else:
+                raise ValueError(f"Unsupported patch operation: {op}")
+    return result
@@ -0,0 +1,133 @@
+"""
+Question Cache - Content-addressed cache for per-requirement question candidates
+Bounded in-process LRU with an optional Redis tier shared by all workers
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+import hashlib
+import json
+import logging
+
+from app.services.question_candidates import QuestionCandidate
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QuestionCache:
+    """
+    Maps a requirement content hash to the question candidates the heuristics produced for it.
+
+    Lookups hit the local LRU first, then Redis (when configured); Redis hits are
+    promoted into the LRU. Redis failures are logged and treated as misses so
+    analysis never depends on cache availability.
+    """
+
+    KEY_PREFIX = "analyst:questions:"
+
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        redis_client: Optional[Any] = None,
+        ttl: int = 86400
+    ):
+        self.maxsize = maxsize
+        self.redis_client = redis_client
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, List[QuestionCandidate]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(heuristics_key: str, req_code: str, req_text: str) -> str:
+        """Hash everything the heuristics read, so equal keys imply equal questions"""
+        digest = hashlib.sha256()
+        for part in (str(heuristics_key), req_code, req_text):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[QuestionCandidate]]:
+        """Return cached candidates for the keys that are present"""
+        found: Dict[str, List[QuestionCandidate]] = {}
+        missing: List[str] = []
+
+        for key in keys:
+            questions = self._entries.get(key)
+            if questions is None:
+                missing.append(key)
+            else:
+                self._entries.move_to_end(key)
+                found[key] = questions
+
+        if missing and self.redis_client is not None:
+            remote = self._redis_get_many(missing)
+            self._store_local(remote)
+            found.update(remote)
+
+        return found
+
+    def set_many(self, entries: Dict[str, List[QuestionCandidate]]) -> None:
+        """Store freshly analyzed candidates in every tier"""
+        if not entries:
+            return
+
+        self._store_local(entries)
+        if self.redis_client is not None:
+            self._redis_set_many(entries)
+
+    def clear(self) -> None:
+        """Drop the in-process tier (Redis entries expire on their own)"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _store_local(self, entries: Dict[str, List[QuestionCandidate]]) -> None:
+        if self.maxsize <= 0:
+            return
+
+        for key, questions in entries.items():
+            self._entries[key] = questions
+            self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _redis_get_many(self, keys: List[str]) -> Dict[str, List[QuestionCandidate]]:
+        try:
+            values = self.redis_client.mget([self.KEY_PREFIX + key for key in keys])
+        except Exception as e:
+            logger.warning(f"Question cache Redis read failed: {e}")
+            return {}
+
+        return {
+            key: [QuestionCandidate.from_json(candidate) for candidate in json.loads(value)]
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    def _redis_set_many(self, entries: Dict[str, List[QuestionCandidate]]) -> None:
+        try:
+            pipeline = self.redis_client.pipeline(transaction=False)
+            for key, questions in entries.items():
+                payload = json.dumps(questions)
+                pipeline.set(self.KEY_PREFIX + key, payload, ex=self.ttl)
+            pipeline.execute()
+        except Exception as e:
+            logger.warning(f"Question cache Redis write failed: {e}")
+
+
+def _build_default_cache() -> QuestionCache:
+    redis_client = None
+    if settings.ANALYST_CACHE_REDIS:
+        import redis
+        redis_client = redis.Redis.from_url(settings.CELERY_RESULT_BACKEND, socket_timeout=1)
+
+    return QuestionCache(
+        maxsize=settings.ANALYST_CACHE_SIZE,
+        redis_client=redis_client,
+        ttl=settings.ANALYST_CACHE_TTL
+    )
+
+
+# Process-wide cache shared by every AnalystService instance
+question_cache = _build_default_cache()
@@ -0,0 +1,126 @@
+"""
+Question Candidates - Compact records for analyst questions
+Text rendering, id generation and Pydantic validation happen only for selected questions
+"""
+from typing import Any, Dict, NamedTuple, Optional, Sequence, Tuple
+from uuid import uuid4
+
+from app.schemas.qa_session import Question, QuestionCategory
+
+
+# Template id -> (category, priority, text). Texts are formatted with the
+# requirement code and the comma-joined terms recorded on the candidate.
+QUESTION_TEMPLATES: Dict[str, Tuple[QuestionCategory, int, str]] = {
+    "subjective_terms": (
+        QuestionCategory.TESTABILITY, 1,
+        "The requirement '{code}' uses subjective terms ({terms}). "
+        "Can you provide measurable criteria? (e.g., response time < 2s, error rate < 0.1%)"
+    ),
+    "missing_metrics": (
+        QuestionCategory.TESTABILITY, 2,
+        "Requirement '{code}' lacks quantitative metrics. "
+        "What are the measurable success criteria?"
+    ),
+    "missing_acceptance": (
+        QuestionCategory.ACCEPTANCE_CRITERIA, 2,
+        "What are the acceptance criteria for requirement '{code}'?"
+    ),
+    "ambiguous_terms": (
+        QuestionCategory.AMBIGUITY, 1,
+        "Requirement '{code}' contains ambiguous terms ({terms}). "
+        "Can you clarify with specific values or conditions?"
+    ),
+    "unresolved_pronouns": (
+        QuestionCategory.AMBIGUITY, 3,
+        "Requirement '{code}' uses pronouns (it/this/that). "
+        "What do these pronouns refer to exactly?"
+    ),
+    "dependency_systems": (
+        QuestionCategory.DEPENDENCIES, 2,
+        "Requirement '{code}' mentions dependencies ({terms}). "
+        "What are the specific external systems, libraries, or services required?"
+    ),
+    "dependency_versions": (
+        QuestionCategory.DEPENDENCIES, 3,
+        "For requirement '{code}', are there version constraints or compatibility requirements "
+        "for the dependencies?"
+    ),
+    "given_when_then": (
+        QuestionCategory.ACCEPTANCE_CRITERIA, 2,
+        "Can you define acceptance criteria for requirement '{code}' "
+        "in Given/When/Then format?"
+    ),
+    "error_handling": (
+        QuestionCategory.CONSTRAINTS, 3,
+        "How should the system handle errors or exceptions for requirement '{code}'?"
+    ),
+    "size_limits": (
+        QuestionCategory.CONSTRAINTS, 3,
+        "What are the size/length limits and boundaries for requirement '{code}'?"
+    ),
+}
+
+# Characters of requirement text shown as a question's context
+EXCERPT_LENGTH = 200
+
+
+class QuestionCandidate(NamedTuple):
+    """
+    A question the heuristics want to ask, before it is rendered.
+
+    Candidates are plain tuples, so they pickle and JSON-encode cheaply for the
+    process pool and the question cache. `materialize` builds the `Question`
+    model for the few candidates that are actually returned. Candidates rebuilt
+    from a round snapshot have no excerpt until one is filled in.
+    """
+    template: str
+    req_code: str
+    terms: Tuple[str, ...]
+    excerpt: Optional[str]
+
+    @property
+    def category(self) -> QuestionCategory:
+        return QUESTION_TEMPLATES[self.template][0]
+
+    @property
+    def priority(self) -> int:
+        return QUESTION_TEMPLATES[self.template][1]
+
+    @property
+    def text(self) -> str:
+        return QUESTION_TEMPLATES[self.template][2].format(
+            code=self.req_code, terms=", ".join(self.terms)
+        )
+
+    @property
+    def context(self) -> Optional[str]:
+        if self.excerpt is None:
+            return None
+        return f"Requirement: {self.excerpt}..."
+
+    def materialize(self) -> Question:
+        """Render and validate the question with a fresh id"""
+        category, priority, _ = QUESTION_TEMPLATES[self.template]
+        return Question(
+            id=str(uuid4()),
+            category=category,
+            text=self.text,
+            context=self.context,
+            priority=priority
+        )
+
+    def snapshot_key(self) -> Tuple[str, Tuple[str, ...]]:
+        """What a round snapshot keeps: the code is stored once per requirement, the excerpt not at all"""
+        return self.template, self.terms
+    
+    @classmethod
+    def from_json(cls, value: Sequence[Any]) -> "QuestionCandidate":
+        """Rebuild a candidate from its JSON array form"""
+        template, req_code, terms, excerpt = value
+        return cls(template, req_code, tuple(terms), excerpt)
+    
+    @classmethod
+    def from_snapshot_key(cls, req_code: str, key: Sequence[Any]) -> "QuestionCandidate":
+        """Rebuild a candidate from `snapshot_key` output (JSON-decoded), without its excerpt"""
+        template, terms = key
+        return cls(template, req_code, tuple(terms), None)
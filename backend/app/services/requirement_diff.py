@@ -0,0 +1,85 @@
+"""
+Requirement Diff - Server-side structural diffs between requirement versions
+A version's content never changes once written, so each computed diff is memoized
+"""
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+import threading
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.json_patch import Patch, diff_documents
+from app.services.requirement_versions import load_contents
+
+
+# (requirement id, from version, to version)
+DiffKey = Tuple[UUID, int, int]
+
+
+class RequirementDiffCache:
+    """
+    LRU of computed diffs.
+
+    Entries never go stale: a requirement's version numbers only grow, and the
+    live row keeps its content when it is archived under the same number.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._diffs: "OrderedDict[DiffKey, Patch]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: DiffKey) -> Optional[Patch]:
+        with self._lock:
+            patch = self._diffs.get(key)
+            if patch is not None:
+                self._diffs.move_to_end(key)
+            return patch
+
+    def put(self, key: DiffKey, patch: Patch) -> None:
+        with self._lock:
+            self._diffs[key] = patch
+            self._diffs.move_to_end(key)
+            while len(self._diffs) > self.maxsize:
+                self._diffs.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._diffs.clear()
+
+
+# Process-wide cache shared by every request and worker thread
+requirement_diffs = RequirementDiffCache(maxsize=settings.REQUIREMENTS_DIFF_CACHE_SIZE)
+
+
+def diff_versions(db: Session, keys: Iterable[DiffKey]) -> Dict[DiffKey, Patch]:
+    """
+    JSON Patch from one version's data to another's for each key.
+
+    Cached diffs are returned as-is; the rest load each requirement's needed
+    versions once. Keys naming a missing version are left out of the result.
+    """
+    diffs: Dict[DiffKey, Patch] = {}
+    pending: Dict[UUID, List[DiffKey]] = {}
+    for key in keys:
+        cached = requirement_diffs.get(key)
+        if cached is not None:
+            diffs[key] = cached
+        else:
+            pending.setdefault(key[0], []).append(key)
+
+    for requirement_id, requirement_keys in pending.items():
+        contents = load_contents(
+            db,
+            requirement_id,
+            {version for _, from_version, to_version in requirement_keys for version in (from_version, to_version)}
+        )
+        for key in requirement_keys:
+            _, from_version, to_version = key
+            if from_version in contents and to_version in contents:
+                diffs[key] = diff_documents(contents[from_version], contents[to_version])
+                requirement_diffs.put(key, diffs[key])
+
+    return diffs
@@ -0,0 +1,154 @@
+"""
+Requirement Features - Batch heuristic scoring for portfolio-wide quality sweeps
+Turns one matcher pass over many requirement texts into a NumPy feature matrix
+"""
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.schemas.qa_session import RequirementQualitySummary
+from app.services.heuristic_matcher import HeuristicMatcher, TEXT_SEPARATOR, UNICODE_NUMBER
+
+
+# One row per requirement, one column per feature (int64; flags are 0/1)
+FEATURE_COLUMNS: Tuple[str, ...] = (
+    "length",
+    "ambiguous_hits",
+    "untestable_hits",
+    "dependency_hits",
+    "has_numbers",
+    "has_units",
+    "has_acceptance",
+    "has_given_when_then",
+    "has_unresolved_pronouns",
+    "mentions_errors",
+    "has_unbounded_io",
+)
+COLUMN: Dict[str, int] = {name: index for index, name in enumerate(FEATURE_COLUMNS)}
+
+# Distinct keyword counts per matcher vocabulary
+VOCABULARY_COLUMNS: Dict[str, str] = {
+    "ambiguous": "ambiguous_hits",
+    "untestable": "untestable_hits",
+    "dependencies": "dependency_hits",
+}
+
+TAGS: Tuple[str, ...] = (
+    "number", "unit", "pronoun", "clarifier", "io", "bound",
+    "acceptance", "given", "when", "then", "error",
+)
+TAG_INDEX: Dict[str, int] = {tag: index for index, tag in enumerate(TAGS)}
+
+# Same length threshold as AnalystService._check_testability
+METRICS_MIN_LENGTH = 50
+
+
+def _rows_with(rows: np.ndarray, incidence: np.ndarray, row_count: int) -> np.ndarray:
+    """(row_count, k) bool matrix: which rows have at least one hit per incidence column"""
+    present = np.zeros((row_count, incidence.shape[1]), dtype=bool)
+    for column in range(incidence.shape[1]):
+        present[rows[incidence[:, column]], column] = True
+    return present
+
+
+def build_feature_matrix(matcher: HeuristicMatcher, texts: Sequence[str]) -> np.ndarray:
+    """
+    Compute FEATURE_COLUMNS for every text.
+
+    All texts are scanned in a single regex pass. Tokens are interned, and each
+    distinct token is described once. Per-requirement tags and keyword sets then
+    come from numpy fancy indexing, so the result matches `matcher.scan` row by
+    row without building a hit object per requirement.
+    """
+    row_count = len(texts)
+    matrix = np.zeros((row_count, len(FEATURE_COLUMNS)), dtype=np.int64)
+    if row_count == 0:
+        return matrix
+    matrix[:, COLUMN["length"]] = np.fromiter(map(len, texts), dtype=np.int64, count=row_count)
+
+    # Intern tokens; id 0 is the separator, so a running count of it gives the row
+    tokens = matcher.scan_tokens(texts)
+    token_ids: Dict[str, int] = {TEXT_SEPARATOR: 0}
+    ids = np.fromiter(
+        (token_ids.setdefault(token, len(token_ids)) for token in tokens),
+        dtype=np.int64,
+        count=len(tokens)
+    )
+    rows = np.cumsum(ids == 0)
+    is_hit = ids != 0
+    rows, ids = rows[is_hit], ids[is_hit]
+
+    # Describe each distinct token once
+    tag_incidence = np.zeros((len(token_ids), len(TAGS)), dtype=bool)
+    keyword_ids: Dict[Tuple[str, str], int] = {}
+    keyword_pairs: List[Tuple[int, int]] = []
+    for token, token_id in token_ids.items():
+        if token_id == 0:
+            continue
+        tags, vocabulary_hits = matcher.describe(token)
+        for tag in tags:
+            tag_incidence[token_id, TAG_INDEX[tag]] = True
+        for hit in vocabulary_hits:
+            keyword_pairs.append((token_id, keyword_ids.setdefault(hit, len(keyword_ids))))
+
+    keyword_incidence = np.zeros((len(token_ids), len(keyword_ids)), dtype=bool)
+    for token_id, keyword_id in keyword_pairs:
+        keyword_incidence[token_id, keyword_id] = True
+
+    tags = _rows_with(rows, tag_incidence[ids], row_count)
+    keywords = _rows_with(rows, keyword_incidence[ids], row_count)
+
+    # Non-ASCII digits are outside the trie, as in `HeuristicMatcher.scan`
+    for row, text in enumerate(texts):
+        if not text.isascii():
+            for match in UNICODE_NUMBER.finditer(text.lower()):
+                tags[row, TAG_INDEX["unit" if match.group("unit") else "number"]] = True
+
+    for vocabulary, column in VOCABULARY_COLUMNS.items():
+        members = [keyword_id for (name, _), keyword_id in keyword_ids.items() if name == vocabulary]
+        matrix[:, COLUMN[column]] = keywords[:, members].sum(axis=1)
+
+    def tag(name: str) -> np.ndarray:
+        return tags[:, TAG_INDEX[name]]
+
+    matrix[:, COLUMN["has_numbers"]] = tag("number") | tag("unit")
+    matrix[:, COLUMN["has_units"]] = tag("unit")
+    matrix[:, COLUMN["has_acceptance"]] = tag("acceptance")
+    matrix[:, COLUMN["has_given_when_then"]] = tag("given") & tag("when") & tag("then")
+    matrix[:, COLUMN["has_unresolved_pronouns"]] = tag("pronoun") & ~tag("clarifier")
+    matrix[:, COLUMN["mentions_errors"]] = tag("error")
+    matrix[:, COLUMN["has_unbounded_io"]] = tag("io") & ~tag("bound")
+
+    return matrix
+
+
+def summarize_feature_matrix(matrix: np.ndarray) -> RequirementQualitySummary:
+    """Aggregate a feature matrix into portfolio-level quality metrics"""
+    row_count = matrix.shape[0]
+    if row_count == 0:
+        return RequirementQualitySummary()
+
+    def column(name: str) -> np.ndarray:
+        return matrix[:, COLUMN[name]]
+
+    issues = np.column_stack([
+        column("ambiguous_hits") > 0,
+        column("untestable_hits") > 0,
+        (column("has_numbers") == 0) & (column("length") > METRICS_MIN_LENGTH),
+        column("has_acceptance") == 0,
+        column("has_unresolved_pronouns") == 1,
+        column("has_unbounded_io") == 1,
+    ])
+    issue_counts = issues.sum(axis=0)
+
+    return RequirementQualitySummary(
+        requirement_count=row_count,
+        ambiguous_count=int(issue_counts[0]),
+        untestable_count=int(issue_counts[1]),
+        missing_metrics_count=int(issue_counts[2]),
+        missing_acceptance_count=int(issue_counts[3]),
+        unresolved_pronoun_count=int(issue_counts[4]),
+        unbounded_io_count=int(issue_counts[5]),
+        mean_length=round(float(column("length").mean()), 2),
+        total_score=round(1.0 - float(issues.mean()), 2)
+    )
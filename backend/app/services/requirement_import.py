@@ -0,0 +1,94 @@
+"""
+Requirement Import - Streaming NDJSON parsing for bulk requirement imports
+Splits an uploaded body into fixed-size batches of validated requirements without buffering it
+"""
+from typing import AsyncIterable, AsyncIterator, List, Tuple
+import json
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from app.schemas.project import RequirementUpsert
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterable[bytes],
+    max_line_bytes: int
+) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Yield (line_number, line) for every non-blank line; only one partial line is buffered.
+
+    Each byte is searched for a newline once: scanning resumes where the
+    previous chunk's scan stopped instead of re-splitting the partial line.
+    """
+    buffer = bytearray()
+    scanned = 0
+    line_number = 0
+
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n", scanned)) >= 0:
+            line_number += 1
+            if end - start > max_line_bytes:
+                raise _line_too_long(line_number, max_line_bytes)
+            line = bytes(buffer[start:end])
+            if line.strip():
+                yield line_number, line
+            start = scanned = end + 1
+        # Deleting from the front of a bytearray does not move the rest
+        del buffer[:start]
+        scanned = len(buffer)
+        if len(buffer) > max_line_bytes:
+            raise _line_too_long(line_number + 1, max_line_bytes)
+
+    if buffer.strip():
+        yield line_number + 1, bytes(buffer)
+
+
+async def iter_requirement_batches(
+    chunks: AsyncIterable[bytes],
+    batch_size: int,
+    max_line_bytes: int
+) -> AsyncIterator[Tuple[int, int, List[RequirementUpsert]]]:
+    """
+    Parse an NDJSON body (one requirement object per line) into batches.
+
+    Yields (first_line, last_line, requirements) with at most `batch_size`
+    requirements. A malformed line raises a 422 naming its line number.
+    """
+    batch: List[RequirementUpsert] = []
+    first_line = last_line = 0
+
+    async for line_number, line in iter_ndjson_lines(chunks, max_line_bytes):
+        try:
+            requirement = RequirementUpsert.model_validate(json.loads(line))
+        except (ValueError, ValidationError) as e:
+            errors = e.errors(include_url=False) if isinstance(e, ValidationError) else [str(e)]
+            raise HTTPException(
+                status_code=422,
+                detail={
+                    "message": f"Invalid requirement on line {line_number}",
+                    "line": line_number,
+                    "errors": json.loads(json.dumps(errors, default=str))
+                }
+            )
+
+        if not batch:
+            first_line = line_number
+        batch.append(requirement)
+        last_line = line_number
+
+        if len(batch) >= batch_size:
+            yield first_line, last_line, batch
+            batch = []
+
+    if batch:
+        yield first_line, last_line, batch
+
+
+def _line_too_long(line_number: int, max_line_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Line {line_number} exceeds the {max_line_bytes} byte limit"
+    )
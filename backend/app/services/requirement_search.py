@@ -0,0 +1,106 @@
+"""
+Requirement Search - Full-text and filtered search over a project's requirements
+PostgreSQL matches the generated `search_vector` column; SQLite falls back to the `requirements_fts` FTS5 table
+"""
+from typing import Any, Dict, Optional
+from uuid import UUID
+import re
+
+from sqlalchemy import Select, Text, cast, column, false, func, inspect, literal_column, select, table, type_coerce
+from sqlalchemy.dialects.postgresql import ARRAY, REGCONFIG, TSVECTOR
+from sqlalchemy.engine import Connection
+
+from app.models.project import SQLITE_FTS_DDL, Requirement, sqlite_fts_text
+
+
+# Text search configuration of the generated column (migration 009): no stemming or stop words
+SEARCH_CONFIG = "simple"
+
+
+def search_values(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Indexed columns copied out of a requirement's data; set them wherever `data` is written"""
+    prioridade = data.get("prioridade")
+    return {
+        "prioridade": getattr(prioridade, "value", prioridade),
+        "dependencias": list(data.get("dependencias") or [])
+    }
+
+
+def fts5_query(q: str) -> Optional[str]:
+    """Quote each word so user input is never parsed as FTS5 syntax; None when `q` has no words"""
+    words = re.findall(r"\w+", q)
+    return " ".join(f'"{word}"' for word in words) if words else None
+
+
+def ensure_sqlite_fts(connection: Connection) -> bool:
+    """
+    Create the FTS5 table and its triggers on an existing SQLite database and index
+    the stored requirements. Safe to run on every startup.
+
+    Returns True if the table was created (and backfilled) by this call.
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+    tables = set(inspect(connection).get_table_names())
+    if "requirements" not in tables:
+        return False  # created with the schema by create_all
+
+    for statement in SQLITE_FTS_DDL:
+        connection.exec_driver_sql(statement)
+    if "requirements_fts" in tables:
+        return False
+
+    connection.exec_driver_sql(
+        "INSERT INTO requirements_fts (requirement_id, descricao, criterios_aceitacao) "
+        f"SELECT r.id, {sqlite_fts_text('r')} FROM requirements AS r"
+    )
+    return True
+
+
+def search_statement(
+    dialect_name: str,
+    project_id: UUID,
+    q: Optional[str] = None,
+    prioridade: Optional[str] = None,
+    depends_on: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Select:
+    """
+    Requirements of a project matching every given criterion.
+
+    With `q` (all words must appear in the description or acceptance
+    criteria) results are ranked by relevance, otherwise ordered by code.
+    """
+    statement = select(Requirement).where(Requirement.project_id == project_id)
+
+    if prioridade is not None:
+        statement = statement.where(Requirement.prioridade == prioridade)
+
+    if depends_on is not None:
+        if dialect_name == "postgresql":
+            # `@>` is served by the GIN index on dependencias
+            statement = statement.where(type_coerce(Requirement.dependencias, ARRAY(Text)).contains([depends_on]))
+        else:
+            dependencies = func.json_each(Requirement.dependencias).table_valued("value")
+            statement = statement.where(select(dependencies.c.value).where(dependencies.c.value == depends_on).exists())
+
+    if q is None:
+        statement = statement.order_by(Requirement.code)
+    elif dialect_name == "postgresql":
+        vector = literal_column("requirements.search_vector", TSVECTOR)
+        query = func.websearch_to_tsquery(cast(SEARCH_CONFIG, REGCONFIG), q)
+        statement = statement.where(vector.bool_op("@@")(query)).order_by(
+            func.ts_rank(vector, query).desc(), Requirement.code
+        )
+    else:
+        match = fts5_query(q)
+        if match is None:
+            return statement.where(false())
+        fts = table("requirements_fts", column("requirement_id"), column("rank"))
+        statement = statement.join(fts, fts.c.requirement_id == Requirement.id).where(
+            literal_column("requirements_fts").bool_op("MATCH")(match)
+        ).order_by(fts.c.rank, Requirement.code)
+
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
@@ -1,10 +1,22 @@
+from sqlalchemy import DateTime, func, insert, null, or_, select, type_coerce, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from typing import List, Optional, Tuple
-from uuid import UUID
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+from uuid import UUID, uuid4
 from fastapi import HTTPException, status
+from app.core.pagination import keyset_page
+from app.core.types import JSONB
 from app.models.project import Project, Requirement, RequirementVersion
-from app.schemas.project import RequirementUpsert, RequirementData, ValidationResult
+from app.schemas.project import (
+    RequirementUpsert, RequirementData, RequirementDiff, RequirementDiffQuery,
+    RequirementSnapshotEntry, RequirementVersionRead, ValidationResult
+)
+from app.services.dependency_graph import DependencyCycleError, bump_graph_revision, dependency_graphs
+from app.services.requirement_diff import diff_versions
+from app.services.requirement_search import search_statement, search_values
+from app.services.requirement_versions import archive_values, load_archived_contents, load_versions, version_headers
 from app.core.logging_config import get_logger
 from app.core.config import settings
 
@@ -41,6 +53,13 @@ class RequirementService:
         if missing_deps:
             errors.append(f"Dependencies not found: {', '.join(sorted(missing_deps))}")
         
+        # Check for cycles through the rest of the project
+        if not errors:
+            try:
+                dependency_graphs.check(db, project_id, {current_code: dependencias})
+            except DependencyCycleError as e:
+                errors.append(str(e))
+        
         return len(errors) == 0, errors
 
     @staticmethod
@@ -115,34 +134,37 @@ class RequirementService:
         )
 
     @staticmethod
-    def bulk_upsert_requirements(
-        db: Session, 
-        project_id: UUID, 
-        requirements: List[RequirementUpsert]
-    ) -> List[Requirement]:
-        """Bulk upsert requirements with version bumping"""
-        # Validate project exists
-        project = db.query(Project).filter(Project.id == project_id).first()
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found")
-
-        # Build set of codes being inserted/updated in this batch
+    def validate_requirements(
+        db: Session,
+        project_id: UUID,
+        requirements: List[RequirementUpsert],
+        check_cycles: bool = True
+    ) -> List[ValidationResult]:
+        """
+        Validate a batch as if it were bulk upserted, without writing anything.
+        
+        Dependencies may name codes in the batch or already stored; the stored
+        ones are resolved with a single query for the whole batch.
+        """
         batch_codes = {req.code for req in requirements}
         
-        # Get existing requirements for dependency validation
-        existing_reqs = db.query(Requirement).filter(
-            Requirement.project_id == project_id
-        ).all()
-        existing_codes = {req.code for req in existing_reqs}
+        # Dependencies outside the batch only need their codes checked
+        referenced_codes = {dep for req in requirements for dep in req.dependencias} - batch_codes
+        existing_codes = set()
+        if referenced_codes:
+            existing_codes = {
+                code for (code,) in db.query(Requirement.code).filter(
+                    Requirement.project_id == project_id,
+                    Requirement.code.in_(referenced_codes)
+                )
+            }
         
         # All available codes = existing + batch
         available_codes = existing_codes | batch_codes
         
-        # Validate all requirements first
-        validation_errors = []
-        for idx, req_data in enumerate(requirements):
+        results = []
+        for req_data in requirements:
             errors = []
-            warnings = []
             
             # Check for self-dependency
             if req_data.code in req_data.dependencias:
@@ -153,23 +175,73 @@ class RequirementService:
             if missing_deps:
                 errors.append(f"Dependencies not found: {', '.join(sorted(missing_deps))}")
             
-            # Check warnings
-            warnings = RequirementService._check_validation_warnings(req_data)
-            
-            # Log validation
-            logger.info(
-                "Requirement validation completed",
-                extra={
-                    "project_id": str(project_id),
-                }
-            )
-            
-            if errors:
-                validation_errors.append({
-                    "index": idx,
-                    "code": req_data.code,
-                    "errors": errors
-                })
+            results.append(ValidationResult(
+                valid=len(errors) == 0,
+                errors=errors,
+                validation_warnings=RequirementService._check_validation_warnings(req_data)
+            ))
+        
+        # Cycles are only meaningful once every dependency resolves
+        if check_cycles and all(result.valid for result in results):
+            try:
+                dependency_graphs.check(
+                    db, project_id, {req.code: req.dependencias for req in requirements}
+                )
+            except DependencyCycleError as e:
+                idx = max(i for i, req in enumerate(requirements) if req.code == e.cycle[0])
+                results[idx].valid = False
+                results[idx].errors.append(str(e))
+        
+        # Log validation with minimal PII
+        logger.info(
+            "Requirements batch validation completed",
+            extra={
+                "project_id": str(project_id),
+                "requirement_count": len(requirements),
+                "invalid_count": sum(1 for result in results if not result.valid)
+            }
+        )
+        
+        return results
+    
+    @staticmethod
+    def bulk_upsert_requirements(
+        db: Session, 
+        project_id: UUID, 
+        requirements: List[RequirementUpsert]
+    ) -> List[Requirement]:
+        """Bulk upsert requirements with version bumping"""
+        # Validate project exists
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        
+        # Build set of codes being inserted/updated in this batch
+        batch_codes = {req.code for req in requirements}
+        
+        # Load only the rows this batch touches, so batched imports stay flat as the project grows
+        existing_reqs = db.query(Requirement).filter(
+            Requirement.project_id == project_id,
+            Requirement.code.in_(batch_codes)
+        ).all()
+        existing_by_code = {req.code: req for req in existing_reqs}
+        
+        # Validate all requirements first (cycles are checked when the graph is updated below)
+        results = RequirementService.validate_requirements(
+            db=db,
+            project_id=project_id,
+            requirements=requirements,
+            check_cycles=False
+        )
+        validation_errors = [
+            {
+                "index": idx,
+                "code": req_data.code,
+                "errors": result.errors
+            }
+            for idx, (req_data, result) in enumerate(zip(requirements, results))
+            if not result.valid
+        ]
         
         if validation_errors:
             raise HTTPException(
@@ -180,52 +252,209 @@ class RequirementService:
                 }
             )
 
+        # Reject dependency cycles against the project's graph, updated in place. The revision
+        # bump (committed together with the rows below) locks the project row first, so no
+        # other writer can commit between this check and ours
+        try:
+            revision = bump_graph_revision(db, project_id)
+            dependency_graphs.apply(
+                db, project_id, {req.code: req.dependencias for req in requirements}, revision
+            )
+        except DependencyCycleError as e:
+            db.rollback()
+            idx = max(i for i, req in enumerate(requirements) if req.code == e.cycle[0])
+            raise HTTPException(
+                status_code=422,
+                detail={
+                    "message": "Validation failed for one or more requirements",
+                    "validation_errors": [{
+                        "index": idx,
+                        "code": e.cycle[0],
+                        "errors": [str(e)]
+                    }]
+                }
+            )
+        
+        try:
+            # PostgreSQL: set-based upsert (duplicate codes in one batch keep the ORM semantics)
+            if db.get_bind().dialect.name == "postgresql" and len(batch_codes) == len(requirements):
+                result_requirements = RequirementService._bulk_upsert_postgresql(
+                    db, project_id, requirements, existing_by_code, project.requirements_version
+                )
+            else:
+                result_requirements = RequirementService._bulk_upsert_orm(
+                    db, project_id, requirements, existing_by_code, project.requirements_version
+                )
+        except Exception:
+            # The graph already holds this batch's edges
+            dependency_graphs.invalidate(project_id)
+            raise
+        
+        dependency_graphs.committed(project_id, revision)
+        return result_requirements
+    
+    @staticmethod
+    def _bulk_upsert_orm(
+        db: Session,
+        project_id: UUID,
+        requirements: List[RequirementUpsert],
+        existing_by_code: Dict[str, Requirement],
+        project_version: int
+    ) -> List[Requirement]:
+        """Upsert through the unit of work, archiving and bumping existing rows"""
         result_requirements = []
         
         for req_data in requirements:
-            # Check if requirement exists
-            existing_req = db.query(Requirement).filter(
-                Requirement.project_id == project_id,
-                Requirement.code == req_data.code
-            ).first()
+            # Check if requirement exists (reuses the rows loaded for validation)
+            existing_req = existing_by_code.get(req_data.code)
 
             requirement_dict = req_data.model_dump(exclude={'_has_waiver'})
             
             if existing_req:
                 # Archive current version
-                version_record = RequirementVersion(
-                    requirement_id=existing_req.id,
-                    version=existing_req.version,
-                    data=existing_req.data
-                )
+                version_record = RequirementVersion(**archive_values(
+                    existing_req.id, existing_req.version, existing_req.data, requirement_dict,
+                    existing_req.project_version
+                ))
                 db.add(version_record)
                 
                 # Update requirement with version bump
                 existing_req.version += 1
                 existing_req.data = requirement_dict
+                existing_req.project_version = project_version
+                for column, value in search_values(requirement_dict).items():
+                    setattr(existing_req, column, value)
                 db.add(existing_req)
                 result_requirements.append(existing_req)
             else:
                 # Create new requirement
                 new_req = Requirement(
+                    id=uuid4(),
                     project_id=project_id,
                     code=req_data.code,
                     version=1,
-                    data=requirement_dict
+                    data=requirement_dict,
+                    project_version=project_version,
+                    **search_values(requirement_dict)
                 )
                 db.add(new_req)
                 result_requirements.append(new_req)
 
+        # Ids are read before commit expires the instances
+        result_ids = [req.id for req in result_requirements]
+        
         try:
             db.commit()
-            for req in result_requirements:
-                db.refresh(req)
+            RequirementService._refresh_requirements(db, result_ids)
         except IntegrityError as e:
             db.rollback()
             raise HTTPException(status_code=422, detail=f"Integrity error: {str(e)}")
 
         return result_requirements
 
+    @staticmethod
+    def _bulk_upsert_postgresql(
+        db: Session,
+        project_id: UUID,
+        requirements: List[RequirementUpsert],
+        existing_by_code: Dict[str, Requirement],
+        project_version: int
+    ) -> List[Requirement]:
+        """
+        Upsert a batch of unique codes with two statements instead of an ORM flush:
+        archive the current rows of those codes into requirements_versions with
+        INSERT ... SELECT, then INSERT ... ON CONFLICT (project_id, code) DO UPDATE
+        bumping the version, RETURNING the ids in input order.
+        
+        With version deltas enabled the archive rows are computed here (from the
+        rows already loaded for validation) and inserted in one executemany.
+        """
+        archive, upsert = RequirementService._postgresql_upsert_statements(
+            project_id, [req.code for req in requirements]
+        )
+        
+        rows = []
+        for req_data in requirements:
+            data = req_data.model_dump(exclude={'_has_waiver'})
+            rows.append({
+                "id": uuid4(),
+                "project_id": project_id,
+                "code": req_data.code,
+                "version": 1,
+                "data": data,
+                "project_version": project_version,
+                **search_values(data)
+            })
+        
+        archive_rows = None
+        if settings.REQUIREMENTS_VERSION_DELTAS:
+            archive_rows = []
+            for row in rows:
+                existing = existing_by_code.get(row["code"])
+                if existing is not None:
+                    archive_rows.append(
+                        archive_values(
+                            existing.id, existing.version, existing.data, row["data"],
+                            existing.project_version
+                        )
+                    )
+        
+        try:
+            if archive_rows is None:
+                db.execute(archive)
+            elif archive_rows:
+                db.execute(insert(RequirementVersion), archive_rows)
+            result_ids = db.scalars(upsert, rows).all()
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            raise HTTPException(status_code=422, detail=f"Integrity error: {str(e)}")
+        
+        return RequirementService._refresh_requirements(db, result_ids)
+    
+    @staticmethod
+    def _postgresql_upsert_statements(project_id: UUID, codes: List[str]):
+        """Build the (archive, upsert) statement pair used by `_bulk_upsert_postgresql`"""
+        archive = insert(RequirementVersion).from_select(
+            ["requirement_id", "version", "data", "project_version"],
+            select(Requirement.id, Requirement.version, Requirement.data, Requirement.project_version).where(
+                Requirement.project_id == project_id,
+                Requirement.code.in_(codes)
+            ),
+            include_defaults=False  # id and created_at come from server defaults
+        )
+        
+        upsert = pg_insert(Requirement)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[Requirement.project_id, Requirement.code],
+            set_={
+                "version": Requirement.version + 1,
+                "data": upsert.excluded.data,
+                "project_version": upsert.excluded.project_version,
+                "prioridade": upsert.excluded.prioridade,
+                "dependencias": upsert.excluded.dependencias,
+                "updated_at": func.now()
+            }
+        ).returning(Requirement.id, sort_by_parameter_order=True)
+        
+        return archive, upsert
+    
+    @staticmethod
+    def _refresh_requirements(
+        db: Session,
+        requirement_ids: List[UUID],
+        chunk_size: int = 500
+    ) -> List[Requirement]:
+        """Reload committed requirements with one SELECT per chunk instead of one per row"""
+        ids = list(dict.fromkeys(requirement_ids))
+        loaded = {}
+        for start in range(0, len(ids), chunk_size):
+            rows = db.query(Requirement).filter(
+                Requirement.id.in_(ids[start:start + chunk_size])
+            ).populate_existing().all()
+            loaded.update((req.id, req) for req in rows)
+        return [loaded[req_id] for req_id in requirement_ids]
+    
     @staticmethod
     def update_requirement(
         db: Session,
@@ -255,60 +484,331 @@ class RequirementService:
                 }
             )
 
+        requirement_dict = update_data.model_dump(exclude={'_has_waiver'})
+        
         # Archive current version
-        version_record = RequirementVersion(
-            requirement_id=requirement.id,
-            version=requirement.version,
-            data=requirement.data
-        )
+        version_record = RequirementVersion(**archive_values(
+            requirement.id, requirement.version, requirement.data, requirement_dict,
+            requirement.project_version
+        ))
         db.add(version_record)
 
+        # Keep the dependency graph in step (a rename rebuilds it instead), checked again
+        # under the project row lock the revision bump takes
+        project_id = requirement.project_id
+        renamed = requirement.code != update_data.code
+        revision = bump_graph_revision(db, project_id)
+        if not renamed:
+            try:
+                dependency_graphs.apply(
+                    db, project_id, {requirement.code: update_data.dependencias}, revision
+                )
+            except DependencyCycleError as e:
+                db.rollback()
+                raise HTTPException(
+                    status_code=422,
+                    detail={
+                        "message": "Requirement validation failed",
+                        "errors": [str(e)],
+                        "warnings": validation.validation_warnings
+                    }
+                )
+        
         # Update with version bump
         requirement.version += 1
-        requirement.data = update_data.model_dump(exclude={'_has_waiver'})
+        requirement.data = requirement_dict
         requirement.code = update_data.code
+        for column, value in search_values(requirement_dict).items():
+            setattr(requirement, column, value)
+        requirement.project_version = db.query(Project.requirements_version).filter(
+            Project.id == project_id
+        ).scalar()
 
         try:
             db.commit()
             db.refresh(requirement)
         except IntegrityError as e:
             db.rollback()
+            dependency_graphs.invalidate(project_id)
             raise HTTPException(status_code=422, detail=f"Integrity error: {str(e)}")
 
+        if renamed:
+            # Dependents still name the old code; rebuild on next use
+            dependency_graphs.invalidate(project_id)
+        else:
+            dependency_graphs.committed(project_id, revision)
+        
         return requirement, validation
 
     @staticmethod
     def get_requirements_by_version(
         db: Session,
         project_id: UUID,
-        version: Optional[int] = None
+        version: Optional[int] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, UUID]] = None,
+        fields: Optional[List[str]] = None
     ) -> List[Requirement]:
-        """Get requirements at specific version or latest"""
-        query = db.query(Requirement).filter(Requirement.project_id == project_id)
+        """
+        Get requirements at specific version or latest.
+        
+        With `limit`/`after` the result is a keyset page ordered by (created_at, id).
+        With `fields` only those columns (plus the sort key) are selected, as rows.
+        """
+        if fields:
+            columns = dict.fromkeys(fields + ["created_at", "id"])
+            query = db.query(*[getattr(Requirement, field) for field in columns])
+        else:
+            query = db.query(Requirement)
+        query = query.filter(Requirement.project_id == project_id)
         
         if version:
             query = query.filter(Requirement.version == version)
         
+        if limit is not None or after is not None:
+            query = keyset_page(query, (Requirement.created_at, Requirement.id), after, limit)
+        
         return query.all()
 
+    @staticmethod
+    def search_requirements(
+        db: Session,
+        project_id: UUID,
+        q: Optional[str] = None,
+        prioridade: Optional[str] = None,
+        depends_on: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Requirement]:
+        """Full-text search of descriptions and acceptance criteria, with optional column filters"""
+        project = db.query(Project.id).filter(Project.id == project_id).first()
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        
+        statement = search_statement(
+            db.get_bind().dialect.name, project_id, q, prioridade, depends_on, limit
+        )
+        return db.scalars(statement).all()
+    
+    @staticmethod
+    def get_requirements_snapshot(
+        db: Session,
+        project_id: UUID,
+        project_version: Optional[int] = None,
+        at: Optional[datetime] = None
+    ) -> List[RequirementSnapshotEntry]:
+        """Get every requirement as it was at a project requirements_version or at a timestamp"""
+        if (project_version is None) == (at is None):
+            raise HTTPException(status_code=400, detail="Provide exactly one of 'version' or 'at'")
+        
+        project = db.query(Project.id).filter(Project.id == project_id).first()
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        
+        # Timestamps are stored as naive UTC
+        if at is not None and at.tzinfo is not None:
+            at = at.astimezone(timezone.utc).replace(tzinfo=None)
+        
+        statement = RequirementService._snapshot_statement(
+            db.get_bind().dialect.name, project_id, project_version, at
+        )
+        
+        rows = db.execute(statement).all()
+        
+        # Delta-encoded history (REQUIREMENTS_VERSION_DELTAS) is rebuilt in one batch
+        rebuilt = load_archived_contents(
+            db, {row.requirement_id: row.version for row in rows if row.delta is not None}
+        )
+        
+        snapshot = [
+            RequirementSnapshotEntry(
+                id=row.requirement_id,
+                code=row.code,
+                version=row.version,
+                data=rebuilt[row.requirement_id] if row.delta is not None else row.data
+            )
+            for row in rows
+        ]
+        
+        snapshot.sort(key=lambda entry: entry.code)
+        return snapshot
+    
+    @staticmethod
+    def _snapshot_statement(
+        dialect_name: str,
+        project_id: UUID,
+        project_version: Optional[int] = None,
+        at: Optional[datetime] = None
+    ):
+        """
+        One set-based query over requirements UNION ALL requirements_versions
+        returning, per requirement, the row that was current at the given point.
+        
+        As of a project version: the newest row written under that version or
+        earlier. As of a timestamp: the oldest row still current afterwards
+        (an archived row stopped being current when it was archived). PostgreSQL
+        picks the row with DISTINCT ON, other dialects with ROW_NUMBER().
+        """
+        live = select(
+            Requirement.id.label("requirement_id"),
+            Requirement.code,
+            Requirement.version,
+            Requirement.data,
+            type_coerce(null(), JSONB).label("delta"),
+            Requirement.project_version,
+            type_coerce(null(), DateTime).label("valid_until")
+        ).where(Requirement.project_id == project_id)
+        
+        archived = select(
+            RequirementVersion.requirement_id,
+            Requirement.code,
+            RequirementVersion.version,
+            RequirementVersion.data,
+            RequirementVersion.delta,
+            RequirementVersion.project_version,
+            RequirementVersion.created_at.label("valid_until")
+        ).join(
+            Requirement, Requirement.id == RequirementVersion.requirement_id
+        ).where(Requirement.project_id == project_id)
+        
+        if at is not None:
+            live = live.where(Requirement.created_at <= at)
+            archived = archived.where(Requirement.created_at <= at)
+        
+        history = union_all(live, archived).subquery("history")
+        if project_version is not None:
+            current = history.c.project_version <= project_version
+            preferred = history.c.version.desc()
+        else:
+            current = or_(history.c.valid_until.is_(None), history.c.valid_until > at)
+            preferred = history.c.version.asc()
+        
+        columns = [
+            history.c.requirement_id,
+            history.c.code,
+            history.c.version,
+            history.c.data,
+            history.c.delta
+        ]
+        
+        if dialect_name == "postgresql":
+            return select(*columns).where(current).distinct(
+                history.c.requirement_id
+            ).order_by(history.c.requirement_id, preferred)
+        
+        ranked = select(
+            *columns,
+            func.row_number().over(
+                partition_by=history.c.requirement_id,
+                order_by=preferred
+            ).label("rank")
+        ).where(current).subquery("ranked")
+        return select(
+            ranked.c.requirement_id,
+            ranked.c.code,
+            ranked.c.version,
+            ranked.c.data,
+            ranked.c.delta
+        ).where(ranked.c.rank == 1)
+    
+    @staticmethod
+    def get_requirement_dependents(
+        db: Session,
+        project_id: UUID,
+        code: str,
+        transitive: bool = True
+    ) -> List[str]:
+        """Get codes that depend on a requirement, directly or transitively"""
+        exists = db.query(Requirement.id).filter(
+            Requirement.project_id == project_id,
+            Requirement.code == code
+        ).first()
+        if not exists:
+            raise HTTPException(status_code=404, detail="Requirement not found")
+        
+        return dependency_graphs.dependents(db, project_id, code, transitive)
+    
     @staticmethod
     def get_requirement_versions(
         db: Session,
-        requirement_id: UUID
-    ) -> List[RequirementVersion]:
-        """Get all versions of a requirement"""
-        return db.query(RequirementVersion).filter(
-            RequirementVersion.requirement_id == requirement_id
-        ).order_by(RequirementVersion.version.desc()).all()
+        requirement_id: UUID,
+        limit: Optional[int] = None,
+        before: Optional[int] = None,
+        include_data: bool = True
+    ) -> List[RequirementVersionRead]:
+        """
+        Get versions of a requirement, newest first (delta-encoded versions are rebuilt).
+        
+        `before`/`limit` select a keyset page on version. Without `include_data`
+        only the row headers are read and returned.
+        """
+        if not include_data:
+            return version_headers(db, requirement_id, before=before, limit=limit)
+        return load_versions(db, requirement_id, before=before, limit=limit)
 
     @staticmethod
     def get_requirement_version(
         db: Session,
         requirement_id: UUID,
         version: int
-    ) -> Optional[RequirementVersion]:
-        """Get specific version of a requirement"""
-        return db.query(RequirementVersion).filter(
-            RequirementVersion.requirement_id == requirement_id,
-            RequirementVersion.version == version
-        ).first()
+    ) -> Optional[RequirementVersionRead]:
+        """Get specific version of a requirement (delta-encoded versions are rebuilt)"""
+        versions = load_versions(db, requirement_id, version)
+        return versions[0] if versions else None
+    
+    @staticmethod
+    def get_requirement_diff(
+        db: Session,
+        requirement_id: UUID,
+        from_version: int,
+        to_version: Optional[int] = None
+    ) -> RequirementDiff:
+        """Changed paths from one version of a requirement to another (default: the current one)"""
+        return RequirementService._get_diffs(
+            db,
+            [RequirementDiffQuery(requirement_id=requirement_id, from_version=from_version, to_version=to_version)]
+        )[0]
+    
+    @staticmethod
+    def get_requirement_diffs(
+        db: Session,
+        project_id: UUID,
+        queries: List[RequirementDiffQuery]
+    ) -> List[RequirementDiff]:
+        """Changed paths for many requirements of a project, in query order"""
+        project = db.query(Project.id).filter(Project.id == project_id).first()
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        
+        return RequirementService._get_diffs(db, queries, project_id)
+    
+    @staticmethod
+    def _get_diffs(
+        db: Session,
+        queries: List[RequirementDiffQuery],
+        project_id: Optional[UUID] = None
+    ) -> List[RequirementDiff]:
+        query = db.query(Requirement.id, Requirement.version).filter(
+            Requirement.id.in_({q.requirement_id for q in queries})
+        )
+        if project_id is not None:
+            query = query.filter(Requirement.project_id == project_id)
+        current_versions = dict(query.all())
+        
+        missing = [str(q.requirement_id) for q in queries if q.requirement_id not in current_versions]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Requirements not found: {', '.join(missing)}")
+        
+        keys = [
+            (q.requirement_id, q.from_version, q.to_version or current_versions[q.requirement_id])
+            for q in queries
+        ]
+        diffs = diff_versions(db, keys)
+        
+        missing = [f"{key[0]} v{key[1]}..v{key[2]}" for key in keys if key not in diffs]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Requirement versions not found: {', '.join(missing)}")
+        
+        return [
+            RequirementDiff(requirement_id=key[0], from_version=key[1], to_version=key[2], changes=diffs[key])
+            for key in keys
+        ]
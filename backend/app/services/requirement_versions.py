@@ -0,0 +1,262 @@
+"""
+Requirement Versions - Archive and rebuild requirement history
+With REQUIREMENTS_VERSION_DELTAS, archived versions are reverse JSON-patch deltas between periodic full snapshots
+"""
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.project import Requirement, RequirementVersion
+from app.schemas.project import RequirementVersionRead
+from app.services.json_patch import apply_patch, make_patch
+
+
+def is_snapshot_version(version: int) -> bool:
+    """Versions on the snapshot interval always keep their full data"""
+    interval = settings.REQUIREMENTS_VERSION_SNAPSHOT_INTERVAL
+    return interval <= 1 or version % interval == 0
+
+
+def archive_values(
+    requirement_id: UUID,
+    version: int,
+    data: Dict[str, Any],
+    next_data: Dict[str, Any],
+    project_version: int
+) -> Dict[str, Any]:
+    """
+    Column values for archiving `version` (content `data`, written under
+    `project_version`) of a requirement whose next version holds `next_data`.
+
+    Deltas point backwards: applying one to the next version's content gives
+    this version's content. The newer side is always at hand when archiving,
+    so writes never read older history.
+    """
+    if settings.REQUIREMENTS_VERSION_DELTAS and not is_snapshot_version(version):
+        return {
+            "requirement_id": requirement_id,
+            "version": version,
+            "data": None,
+            "delta": make_patch(next_data, data),
+            "project_version": project_version
+        }
+    return {
+        "requirement_id": requirement_id,
+        "version": version,
+        "data": data,
+        "delta": None,
+        "project_version": project_version
+    }
+
+
+def version_headers(
+    db: Session,
+    requirement_id: UUID,
+    before: Optional[int] = None,
+    limit: Optional[int] = None
+) -> List[Any]:
+    """
+    (id, requirement_id, version, is_delta, created_at) of archived versions,
+    newest first; `before`/`limit` select a keyset page
+    """
+    query = db.query(
+        RequirementVersion.id,
+        RequirementVersion.requirement_id,
+        RequirementVersion.version,
+        RequirementVersion.delta.isnot(None).label("is_delta"),
+        RequirementVersion.created_at
+    ).filter(
+        RequirementVersion.requirement_id == requirement_id
+    )
+    if before is not None:
+        query = query.filter(RequirementVersion.version < before)
+    query = query.order_by(RequirementVersion.version.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+
+def load_versions(
+    db: Session,
+    requirement_id: UUID,
+    version: Optional[int] = None,
+    before: Optional[int] = None,
+    limit: Optional[int] = None
+) -> List[RequirementVersionRead]:
+    """
+    Archived versions of a requirement, newest first, with deltas rebuilt.
+
+    `version` selects a single version; otherwise `before`/`limit` select a
+    keyset page. Only the page plus the rows up to its nearest newer snapshot
+    (or the live requirement) are fetched with their content.
+    """
+    headers = version_headers(db, requirement_id)
+
+    if version is not None:
+        first = next((i for i, header in enumerate(headers) if header.version == version), None)
+        count = 1
+    else:
+        first = next((i for i, header in enumerate(headers) if before is None or header.version < before), None)
+        count = limit if limit is not None else len(headers)
+    if first is None or count <= 0:
+        return []
+
+    last = min(first + count, len(headers))
+    start = first
+    while start > 0 and headers[start].is_delta:
+        start -= 1
+    chain = headers[start:last]
+    
+    rows = db.query(RequirementVersion).filter(
+        RequirementVersion.id.in_([header.id for header in chain])
+    ).all()
+    rows_by_id = {row.id: row for row in rows}
+
+    # A chain that starts with a delta is rebuilt from the live requirement
+    current = None
+    if chain[0].is_delta:
+        (current,) = db.query(Requirement.data).filter(Requirement.id == requirement_id).one()
+
+    versions = []
+    for header in chain:
+        row = rows_by_id[header.id]
+        current = apply_patch(current, row.delta) if row.delta is not None else row.data
+        versions.append(RequirementVersionRead(
+            id=row.id,
+            requirement_id=row.requirement_id,
+            version=row.version,
+            data=current,
+            created_at=row.created_at
+        ))
+
+    return versions[first - start:]
+
+
+def load_contents(db: Session, requirement_id: UUID, versions: Iterable[int]) -> Dict[int, Any]:
+    """
+    Content of each requested version, archived or live.
+    
+    Only the requested rows and the delta chains behind them are fetched;
+    versions that do not exist are left out of the result.
+    """
+    wanted = set(versions)
+    live = db.query(Requirement.version, Requirement.data).filter(Requirement.id == requirement_id).first()
+    if live is None:
+        return {}
+    contents = {live.version: live.data} if live.version in wanted else {}
+    
+    headers = version_headers(db, requirement_id)
+    needed: Set[int] = set()
+    for index, header in enumerate(headers):
+        if header.version in wanted:
+            start = index
+            while start > 0 and headers[start].is_delta:
+                start -= 1
+            needed.update(range(start, index + 1))
+    if not needed:
+        return contents
+    
+    rows = db.query(RequirementVersion.id, RequirementVersion.data, RequirementVersion.delta).filter(
+        RequirementVersion.id.in_([headers[index].id for index in needed])
+    ).all()
+    rows_by_id = {row.id: row for row in rows}
+    
+    # Needed indices run back to a snapshot (or the live row), so each delta's newer side is already rebuilt
+    current = live.data
+    for index in sorted(needed):
+        row = rows_by_id[headers[index].id]
+        current = apply_patch(current, row.delta) if row.delta is not None else row.data
+        if headers[index].version in wanted:
+            contents[headers[index].version] = current
+    
+    return contents
+
+
+def load_archived_contents(
+    db: Session,
+    versions: Mapping[UUID, int],
+    chunk_size: int = 500
+) -> Dict[UUID, Any]:
+    """
+    Content of one archived version for each of many requirements.
+
+    Headers, live rows (for chains that start with a delta) and the chain
+    rows are each fetched with one query per chunk of requirements, then the
+    deltas are applied in memory. Versions that do not exist are left out.
+    """
+    contents: Dict[UUID, Any] = {}
+    requirement_ids = list(versions)
+    for start in range(0, len(requirement_ids), chunk_size):
+        chunk = requirement_ids[start:start + chunk_size]
+        headers = db.query(
+            RequirementVersion.id,
+            RequirementVersion.requirement_id,
+            RequirementVersion.version,
+            RequirementVersion.delta.isnot(None).label("is_delta")
+        ).filter(
+            RequirementVersion.requirement_id.in_(chunk)
+        ).order_by(RequirementVersion.version.desc()).all()
+
+        by_requirement: Dict[UUID, List[Any]] = {}
+        for header in headers:
+            by_requirement.setdefault(header.requirement_id, []).append(header)
+
+        # Newest first, so each chain runs back from the wanted version to a snapshot (or the live row)
+        chains: Dict[UUID, List[Any]] = {}
+        for requirement_id, history in by_requirement.items():
+            index = next((i for i, header in enumerate(history) if header.version == versions[requirement_id]), None)
+            if index is None:
+                continue
+            first = index
+            while first > 0 and history[first].is_delta:
+                first -= 1
+            chains[requirement_id] = history[first:index + 1]
+        if not chains:
+            continue
+
+        live_ids = [requirement_id for requirement_id, chain in chains.items() if chain[0].is_delta]
+        live = dict(db.query(Requirement.id, Requirement.data).filter(Requirement.id.in_(live_ids)).all()) if live_ids else {}
+
+        rows = db.query(RequirementVersion.id, RequirementVersion.data, RequirementVersion.delta).filter(
+            RequirementVersion.id.in_([header.id for chain in chains.values() for header in chain])
+        ).all()
+        rows_by_id = {row.id: row for row in rows}
+
+        for requirement_id, chain in chains.items():
+            current = live.get(requirement_id)
+            for header in chain:
+                row = rows_by_id[header.id]
+                current = apply_patch(current, row.delta) if row.delta is not None else row.data
+            contents[requirement_id] = current
+
+    return contents
+
+
+def compact_versions(db: Session, requirement_id: UUID) -> int:
+    """
+    Re-encode one requirement's history to the configured layout
+    (deltas between snapshots, or full rows when deltas are off).
+
+    Returns the number of rows rewritten; the caller commits.
+    """
+    rows = db.query(RequirementVersion).filter(
+        RequirementVersion.requirement_id == requirement_id
+    ).order_by(RequirementVersion.version.desc()).all()
+    if not rows:
+        return 0
+
+    (current,) = db.query(Requirement.data).filter(Requirement.id == requirement_id).one()
+
+    rewritten = 0
+    for row in rows:
+        data = apply_patch(current, row.delta) if row.delta is not None else row.data
+        wanted = archive_values(requirement_id, row.version, data, current, row.project_version)
+        if wanted["data"] != row.data or wanted["delta"] != row.delta:
+            row.data = wanted["data"]
+            row.delta = wanted["delta"]
+            rewritten += 1
+        current = data
+
+    return rewritten
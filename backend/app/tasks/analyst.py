@@ -3,16 +3,18 @@ Analyst Tasks - Requirement Refinement (R3)
 Celery tasks for asynchronous requirement analysis and refinement
 """
 from celery import Task
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
 import uuid
 from datetime import datetime
 import logging
 
 from app.celery_app import celery_app
+from app.core.config import settings
 from app.core.database import SessionLocal
 from app.models.project import Project, Requirement
 from app.models.qa_session import QASession
-from app.services.analyst_service import AnalystService
+from app.services.analyst_service import AnalysisRow, AnalystService
+from app.services.heuristic_rules import rule_registry
 from app.schemas.qa_session import Question, Answer, QualityFlags
 
 logger = logging.getLogger(__name__)
@@ -48,6 +50,53 @@ class IdempotentTask(Task):
         return super().__call__(*args, **kwargs)
 
 
+def _iter_requirements(
+    db,
+    analyst: AnalystService,
+    project_id: str,
+    requirement_ids: List[str],
+    total: int,
+    chunk_size: int
+) -> Iterator[AnalysisRow]:
+    """
+    Stream (id, code, text) rows for the given requirement ids, ordered like the version listing.
+    Only the columns the analyst reads are fetched, one chunk at a time, without ORM entities.
+    """
+    if not requirement_ids:
+        return
+    
+    columns = analyst.analysis_columns(db.get_bind().dialect.name)
+    query = db.query(*columns).filter(
+        Requirement.project_id == project_id
+    ).order_by(Requirement.code, Requirement.id)
+    
+    if len(requirement_ids) == total:
+        # yield_per streams through a server-side cursor on PostgreSQL
+        rows = query.yield_per(chunk_size)
+    else:
+        # requirement_ids follow the same ordering, so chunk by chunk keeps it
+        rows = (
+            row
+            for start in range(0, len(requirement_ids), chunk_size)
+            for row in query.filter(Requirement.id.in_(
+                [uuid.UUID(req_id) for req_id in requirement_ids[start:start + chunk_size]]
+            )).all()
+        )
+    
+    for row in rows:
+        yield analyst.analysis_row(row)
+
+
+def _load_texts(db, analyst: AnalystService, project_id: str, codes: List[str]) -> Dict[str, str]:
+    """Requirement code -> text for a few requirements (context of carried-forward questions)"""
+    columns = analyst.analysis_columns(db.get_bind().dialect.name)
+    rows = db.query(*columns).filter(
+        Requirement.project_id == project_id,
+        Requirement.code.in_(codes)
+    ).all()
+    return {row.code: analyst.analysis_row(row).text for row in rows}
+
+
 @celery_app.task(
     name="agents.analyst.refine",
     bind=True,
@@ -66,7 +115,8 @@ def refine_requirements(
     project_id: str,
     max_rounds: int = 3,
     request_id: Optional[str] = None,
-    answers: Optional[List[Dict[str, Any]]] = None
+    answers: Optional[List[Dict[str, Any]]] = None,
+    disabled_rules: Optional[List[str]] = None
 ) -> Dict[str, Any]:
     """
     Refine project requirements through Q&A.
@@ -76,6 +126,7 @@ def refine_requirements(
         max_rounds: Maximum number of refinement rounds
         request_id: Idempotency key (UUID)
         answers: Optional answers to previous questions
+        disabled_rules: Heuristic rules to skip for this project
         
     Returns:
         {
@@ -89,7 +140,6 @@ def refine_requirements(
         }
     """
     db = SessionLocal()
-    analyst = AnalystService()
     
     try:
         logger.info(f"Starting requirement refinement for project {project_id}, request_id={request_id}")
@@ -125,19 +175,46 @@ def refine_requirements(
                 "quality_flags": None
             }
         
-        # Get project requirements
-        requirements = db.query(Requirement).filter(
+        # Get current requirement versions (no JSONB payload) in a stable order
+        version_rows = db.query(Requirement.id, Requirement.version).filter(
             Requirement.project_id == project_id
-        ).all()
+        ).order_by(Requirement.code, Requirement.id).all()
         
-        if not requirements:
+        if not version_rows:
             raise ValueError(f"No requirements found for project {project_id}")
         
+        versions = {str(req_id): version for req_id, version in version_rows}
+        
+        # Expensive rules can be switched off automatically for very large projects
+        max_rule_cost = None
+        large_project = settings.ANALYST_LARGE_PROJECT_REQUIREMENTS
+        if large_project and len(versions) >= large_project:
+            max_rule_cost = settings.ANALYST_LARGE_PROJECT_MAX_RULE_COST
+        analyst = AnalystService(rules=rule_registry.select(disabled_rules, max_rule_cost))
+        
+        # Diff against the previous round so only changed requirements are loaded and analyzed
+        previous_snapshot = None
+        if settings.ANALYST_INCREMENTAL_ROUNDS:
+            previous_session = db.query(QASession).filter(
+                QASession.project_id == project_id
+            ).order_by(QASession.round.desc()).first()
+            if previous_session:
+                previous_snapshot = previous_session.analysis_snapshot
+        
+        changed_ids = analyst.changed_requirement_ids(versions, previous_snapshot)
+        chunk_size = settings.ANALYST_STREAM_CHUNK_SIZE
+        logger.info(
+            f"Analyzing {len(changed_ids)} of {len(versions)} requirements for project {project_id}"
+        )
+        
         # If answers provided, refine requirements first
         requirements_updated = False
         if answers:
             logger.info(f"Processing {len(answers)} answers for project {project_id}")
-            refinement_result = analyst.refine_requirements_with_answers(requirements, answers)
+            refinement_result = analyst.refine_requirements_with_answers(
+                _iter_requirements(db, analyst, project_id, changed_ids, len(versions), chunk_size),
+                answers
+            )
             
             if refinement_result["total_changes"] > 0:
                 # Increment requirements version
@@ -145,8 +222,28 @@ def refine_requirements(
                 requirements_updated = True
                 logger.info(f"Requirements updated to version {project.requirements_version}")
         
-        # Analyze requirements and generate questions
-        questions, quality_flags = analyst.analyze_requirements(requirements, max_questions=10)
+        # Analyze requirements and generate questions; the per-requirement
+        # snapshot is only built and stored when later rounds can reuse it
+        requirements = _iter_requirements(db, analyst, project_id, changed_ids, len(versions), chunk_size)
+        if settings.ANALYST_INCREMENTAL_ROUNDS:
+            questions, quality_flags, analysis_snapshot = analyst.analyze_incremental(
+                versions,
+                requirements,
+                previous_snapshot,
+                max_questions=10,
+                workers=settings.ANALYST_PARALLEL_WORKERS,
+                load_texts=lambda codes: _load_texts(db, analyst, project_id, codes)
+            )
+        else:
+            questions, quality_flags = analyst.analyze_requirements(
+                requirements,
+                max_questions=10,
+                workers=settings.ANALYST_PARALLEL_WORKERS
+            )
+            analysis_snapshot = None
+        
+        if quality_flags.rule_metrics:
+            logger.info(f"Heuristic rule metrics for project {project_id}: {quality_flags.rule_metrics}")
         
         # Create QA session record
         qa_session = QASession(
@@ -156,7 +253,8 @@ def refine_requirements(
             round=current_round,
             questions=[q.model_dump() for q in questions],
             answers=[a for a in answers] if answers else None,
-            quality_flags=quality_flags.model_dump() if quality_flags else None
+            quality_flags=quality_flags.model_dump() if quality_flags else None,
+            analysis_snapshot=analysis_snapshot
         )
         db.add(qa_session)
         
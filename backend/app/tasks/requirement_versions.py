@@ -0,0 +1,58 @@
+"""
+Requirement Version Tasks - History housekeeping
+Re-encodes archived requirement versions to the configured storage layout
+"""
+from typing import Any, Dict, Optional
+import logging
+
+from app.celery_app import celery_app
+from app.core.database import SessionLocal
+from app.models.project import Requirement, RequirementVersion
+from app.services.requirement_versions import compact_versions
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task
+def compact_requirement_versions_task(
+    project_id: Optional[str] = None,
+    batch_size: int = 100
+) -> Dict[str, Any]:
+    """
+    Convert full version snapshots between snapshot points into deltas
+    (or back to full rows when REQUIREMENTS_VERSION_DELTAS is off).
+
+    Args:
+        project_id: Limit to one project (all projects when omitted)
+        batch_size: Requirements compacted per transaction
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(Requirement.id).filter(
+            Requirement.id.in_(db.query(RequirementVersion.requirement_id))
+        )
+        if project_id:
+            query = query.filter(Requirement.project_id == project_id)
+        requirement_ids = [requirement_id for (requirement_id,) in query.order_by(Requirement.id)]
+
+        rewritten = 0
+        for start in range(0, len(requirement_ids), batch_size):
+            for requirement_id in requirement_ids[start:start + batch_size]:
+                rewritten += compact_versions(db, requirement_id)
+            db.commit()
+            # Drop the compacted rows before the next batch
+            db.expunge_all()
+
+        logger.info(
+            f"Compacted requirement versions: {len(requirement_ids)} requirements, {rewritten} rows rewritten"
+        )
+        return {
+            "status": "COMPLETED",
+            "requirements": len(requirement_ids),
+            "rewritten": rewritten
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
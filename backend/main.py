@@ -1,15 +1,29 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.database import engine
+from app.services.requirement_search import ensure_sqlite_fts
 from app.api.routes import projects
 from app.api.routes import qa_sessions
 from app.api.routes import gateway
 from app.api.routes import code_repos
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # SQLite databases created before the full-text index existed get it on first start
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as connection:
+            ensure_sqlite_fts(connection)
+    yield
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 # CORS configuration
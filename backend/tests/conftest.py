@@ -2,12 +2,14 @@ import pytest
 import os
 import tempfile
 from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from fastapi.testclient import TestClient
 
 from app.core.database import Base
 from main import app
-from app.core.database import get_db
+from app.core.database import async_database_url, get_async_db, get_db
 
 
 @pytest.fixture(scope="function")
@@ -53,7 +55,24 @@ def db_session():
 
 
 @pytest.fixture(scope="function")
-def client(db_session):
+def async_engine(db_session):
+    """aiosqlite engine on the test database file, for routes using get_async_db"""
+    url = async_database_url(db_session.get_bind().url.render_as_string(hide_password=False))
+    # No pool: connections must not outlive the TestClient's event loop
+    engine = create_async_engine(url, poolclass=NullPool)
+    
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragma(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+    
+    yield engine
+    engine.sync_engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def client(db_session, async_engine):
     """Create a test client that uses the test database"""
     def override_get_db():
         try:
@@ -61,7 +80,14 @@ def client(db_session):
         finally:
             pass
     
+    AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -40,6 +40,37 @@ class TestDatabaseModule:
         
         # Session should be closed
         assert True  # If we got here, cleanup worked
+    
+    def test_async_database_url(self):
+        """Test DATABASE_URL maps to the asyncio driver of its backend"""
+        from app.core.database import async_database_url
+        
+        assert async_database_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+        assert async_database_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+        assert async_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+        assert async_database_url("sqlite+aiosqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+        assert async_database_url("mysql://u:p@db/app") == "mysql://u:p@db/app"
+    
+    def test_get_async_db_session(self, tmp_path):
+        """Test the async session dependency reads through aiosqlite"""
+        import asyncio
+        from sqlalchemy import text
+        from sqlalchemy.ext.asyncio import AsyncSession
+        from app.core import database
+        
+        async def read():
+            db_generator = database.get_async_db()
+            db = await db_generator.__anext__()
+            assert isinstance(db, AsyncSession)
+            value = await db.scalar(text("SELECT 1"))
+            await db_generator.aclose()
+            await database.get_async_engine().dispose()
+            return value
+        
+        with patch.object(database.settings, "DATABASE_URL", f"sqlite:///{tmp_path / 'async.db'}"), \
+                patch.object(database, "_async_engine", None), \
+                patch.object(database, "_AsyncSessionLocal", None):
+            assert asyncio.run(read()) == 1
 
 
 class TestTypesModule:
@@ -261,6 +292,110 @@ class TestTypesModule:
         assert pg_dialect.type_descriptor.called
         assert result == "PG_JSONB_TYPE"
 
+    
+    def test_uuid_type_binary_storage(self, monkeypatch):
+        """Test UUID type stores 16 raw bytes with UUID_BINARY_STORAGE and reads either form"""
+        from app.core.config import settings
+        from app.core.types import UUID
+        from sqlalchemy.dialects import sqlite
+        import uuid
+        
+        monkeypatch.setattr(settings, "UUID_BINARY_STORAGE", True)
+        uuid_type = UUID()
+        test_uuid = uuid.uuid4()
+        sqlite_dialect = sqlite.dialect()
+        
+        assert uuid_type.load_dialect_impl(sqlite_dialect).compile(dialect=sqlite_dialect) == "BINARY(16)"
+        assert uuid_type.process_bind_param(test_uuid, sqlite_dialect) == test_uuid.bytes
+        assert uuid_type.process_bind_param(str(test_uuid), sqlite_dialect) == test_uuid.bytes
+        assert uuid_type.process_result_value(test_uuid.bytes, sqlite_dialect) == test_uuid
+        assert uuid_type.process_result_value(str(test_uuid), sqlite_dialect) == test_uuid
+    
+    def test_convert_uuid_storage(self, monkeypatch, tmp_path):
+        """Test an existing CHAR(36) SQLite database converts to BINARY(16) and back"""
+        from sqlalchemy import create_engine, event, text
+        from sqlalchemy.orm import Session
+        from app.core.config import settings
+        from app.core.database import Base
+        from app.core.uuid_storage import convert_uuid_storage, main
+        from app.models.project import Project, Requirement
+        from app.services.requirement_search import search_statement
+        
+        url = f"sqlite:///{tmp_path / 'app.db'}"
+        
+        def connect():
+            engine = create_engine(url)
+            event.listen(engine, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys=ON"))
+            return engine
+        
+        engine = connect()
+        Base.metadata.create_all(engine)
+        with Session(engine) as db:
+            project = Project(name="Edge")
+            project.requirements.append(Requirement(code="REQ-1", data={"descricao": "Offline sync"}))
+            db.add(project)
+            db.commit()
+            project_id, requirement_id = project.id, project.requirements[0].id
+        
+        with engine.begin() as connection:
+            assert convert_uuid_storage(connection) == 4  # project, requirement id and FK, search row
+            assert convert_uuid_storage(connection) == 0
+            assert connection.execute(text("SELECT typeof(id), length(id) FROM requirements")).one() == ("blob", 16)
+            assert connection.execute(text("PRAGMA foreign_key_check")).all() == []
+        engine.dispose()
+        
+        monkeypatch.setattr(settings, "UUID_BINARY_STORAGE", True)
+        engine = connect()
+        with Session(engine) as db:
+            requirement = db.get(Requirement, requirement_id)
+            assert requirement.project_id == project_id
+            assert requirement.project.name == "Edge"
+            assert db.scalars(search_statement("sqlite", project_id, q="sync")).all() == [requirement]
+        engine.dispose()
+        
+        main([url, "--to-text"])
+        engine = create_engine(url)
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT id FROM projects")).scalar() == str(project_id)
+        engine.dispose()
+    
+    def test_json_codecs_round_trip(self):
+        """Every available codec encodes like the stdlib and falls back on values it rejects"""
+        from app.core import json_codec
+        from app.schemas.project import PriorityEnum
+        
+        payload = {"descricao": "Requisição", "prioridade": PriorityEnum.must, "itens": [1, 2.5, None, True]}
+        expected = {"descricao": "Requisição", "prioridade": "must", "itens": [1, 2.5, None, True]}
+        
+        for name in ("orjson", "msgspec", "json"):
+            codec = json_codec.get_codec(name)
+            encoded = codec.dumps(payload)
+            assert isinstance(encoded, str)
+            assert codec.loads(encoded) == expected
+            assert codec.loads(encoded.encode()) == expected
+            assert codec.loads(codec.dumps({1: "a"})) == {"1": "a"}
+            assert codec.loads(codec.dumps([2 ** 70])) == [2 ** 70]
+            with pytest.raises(ValueError):
+                codec.loads("{not json")
+    
+    def test_json_codec_selection(self):
+        """auto prefers orjson; unknown names are rejected"""
+        from app.core import json_codec
+        
+        preferred = "orjson" if json_codec.orjson else "msgspec" if json_codec.msgspec else "json"
+        assert json_codec.get_codec("auto").name == preferred
+        assert json_codec.get_codec("json").name == "json"
+        with pytest.raises(ValueError):
+            json_codec.get_codec("yaml")
+    
+    def test_engine_uses_json_codec(self):
+        """The engine's JSON (de)serializers are the shared codec"""
+        from app.core import json_codec
+        from app.core.database import engine
+        
+        assert engine.dialect._json_serializer is json_codec.dumps
+        assert engine.dialect._json_deserializer is json_codec.loads
+
 
 class TestConfigModule:
     """Test configuration settings"""
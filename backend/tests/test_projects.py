@@ -561,11 +561,16 @@ def test_bulk_upsert_complex_circular_dependency(client):
         }
     )
     
-    # For now, this might pass because we don't detect complex cycles
-    # This test documents the current behavior
-    # TODO: Implement cycle detection for A→B→C→A patterns
-    # Expected in future: assert response.status_code == 422
-    assert response.status_code in [200, 422]  # Accept either until cycle detection is implemented
+    assert response.status_code == 422
+    error = response.json()["detail"]["validation_errors"][0]
+    assert error["index"] == 1
+    assert error["errors"] == ["Circular dependency: REQ-A -> REQ-C -> REQ-B -> REQ-A"]
+    
+    # Nothing from the rejected batch was stored or kept in the graph
+    codes = [req["code"] for req in client.get(f"/api/v1/projects/{project_id}/requirements").json()]
+    assert sorted(codes) == ["REQ-A", "REQ-B"]
+    dependents = client.get(f"/api/v1/projects/{project_id}/requirements/REQ-A/dependents").json()
+    assert dependents["dependents"] == ["REQ-B"]
 
 
 def test_bulk_upsert_project_not_found(client):
@@ -584,3 +589,1043 @@ def test_bulk_upsert_project_not_found(client):
     )
     assert response.status_code == 404
     assert "Project not found" in response.json()["detail"]
+
+
+def test_bulk_upsert_round_trips_do_not_grow_with_batch_size(client, db_session):
+    from sqlalchemy import event
+    
+    def upsert_statements(project_id, count, descricao):
+        statements = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = client.post(
+                f"/api/v1/projects/{project_id}/requirements",
+                json={"requirements": [
+                    {
+                        "code": f"REQ-{i:03d}",
+                        "descricao": descricao,
+                        "criterios_aceitacao": ["Criteria 1", "Criteria 2"],
+                        "prioridade": "must",
+                        "dependencias": []
+                    }
+                    for i in range(count)
+                ]}
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        assert response.status_code == 200
+        return response.json(), statements
+    
+    small_project = client.post("/api/v1/projects", json={"name": "Small"}).json()["id"]
+    large_project = client.post("/api/v1/projects", json={"name": "Large"}).json()["id"]
+    
+    # Inserts
+    _, small = upsert_statements(small_project, 2, "Initial")
+    created, large = upsert_statements(large_project, 40, "Initial")
+    assert len(large) == len(small)
+    assert [req["version"] for req in created] == [1] * 40
+    
+    # Updates archive the previous version and bump it
+    _, small = upsert_statements(small_project, 2, "Updated")
+    updated, large = upsert_statements(large_project, 40, "Updated")
+    assert len(large) == len(small)
+    assert [req["version"] for req in updated] == [2] * 40
+    assert all(req["data"]["descricao"] == "Updated" for req in updated)
+    assert [req["id"] for req in updated] == [req["id"] for req in created]
+
+
+def test_bulk_upsert_postgresql_statements():
+    from uuid import uuid4
+    from sqlalchemy.dialects import postgresql
+    from app.services.requirement_service import RequirementService
+    
+    archive, upsert = RequirementService._postgresql_upsert_statements(uuid4(), ["REQ-001", "REQ-002"])
+    dialect = postgresql.dialect()
+    
+    archive_sql = str(archive.compile(dialect=dialect))
+    assert archive_sql.startswith("INSERT INTO requirements_versions (requirement_id, version, data, project_version) SELECT")
+    
+    upsert_sql = str(upsert.compile(dialect=dialect))
+    assert "ON CONFLICT (project_id, code) DO UPDATE SET" in upsert_sql
+    assert "version = (requirements.version + " in upsert_sql
+    assert "data = excluded.data" in upsert_sql
+    assert upsert_sql.rstrip().endswith("RETURNING requirements.id")
+
+
+def _ndjson(requirements):
+    import json
+    return "\n".join(json.dumps(req) for req in requirements) + "\n"
+
+
+def test_import_requirements_ndjson_in_batches(client, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "REQUIREMENTS_IMPORT_BATCH_SIZE", 3)
+    
+    project_id = client.post("/api/v1/projects", json={"name": "Import"}).json()["id"]
+    requirements = [
+        {
+            "code": f"REQ-{i:03d}",
+            "descricao": f"Requirement {i}",
+            "criterios_aceitacao": ["Criteria 1"],
+            # Dependencies may point at earlier batches
+            "dependencias": ["REQ-000"] if i > 0 else []
+        }
+        for i in range(7)
+    ]
+    body = _ndjson(requirements[:4]) + "\n" + _ndjson(requirements[4:])
+    
+    def chunks():
+        # Chunked upload split mid-line
+        encoded = body.encode()
+        for start in range(0, len(encoded), 50):
+            yield encoded[start:start + 50]
+    
+    response = client.post(
+        f"/api/v1/projects/{project_id}/requirements/import",
+        content=chunks(),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["total"] == 7
+    assert result["created"] == 7
+    assert [(b["first_line"], b["last_line"]) for b in result["batches"]] == [(1, 3), (4, 7), (8, 8)]
+    
+    stored = client.get(f"/api/v1/projects/{project_id}/requirements").json()
+    assert sorted(req["code"] for req in stored) == [req["code"] for req in requirements]
+    
+    # Re-importing bumps versions
+    response = client.post(
+        f"/api/v1/projects/{project_id}/requirements/import",
+        content=_ndjson(requirements[:2])
+    )
+    assert response.json()["updated"] == 2
+
+
+def test_import_requirements_reports_bad_line(client, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "REQUIREMENTS_IMPORT_BATCH_SIZE", 2)
+    
+    project_id = client.post("/api/v1/projects", json={"name": "Import"}).json()["id"]
+    valid = [
+        {"code": f"REQ-{i:03d}", "descricao": "Valid", "criterios_aceitacao": ["Criteria 1"]}
+        for i in range(2)
+    ]
+    body = _ndjson(valid) + '{"code": "REQ-BAD", "descricao": "No criteria"}\n'
+    
+    response = client.post(f"/api/v1/projects/{project_id}/requirements/import", content=body)
+    assert response.status_code == 422
+    detail = response.json()["detail"]
+    assert detail["error"]["line"] == 3
+    assert detail["imported"]["total"] == 2
+    
+    response = client.post(f"/api/v1/projects/{project_id}/requirements/import", content="{not json\n")
+    assert response.status_code == 422
+    assert response.json()["detail"]["error"]["line"] == 1
+
+
+def test_iter_ndjson_lines_across_chunks():
+    import asyncio
+    from fastapi import HTTPException
+    from app.services.requirement_import import iter_ndjson_lines
+    
+    async def collect(body, chunk_size, max_line_bytes):
+        async def chunks():
+            for start in range(0, len(body), chunk_size):
+                yield body[start:start + chunk_size]
+        return [item async for item in iter_ndjson_lines(chunks(), max_line_bytes)]
+    
+    body = b'{"a": 1}\n\n' + b"x" * 40 + b'\n{"b": 2}'
+    expected = [(1, b'{"a": 1}'), (3, b"x" * 40), (4, b'{"b": 2}')]
+    for chunk_size in (1, 3, 7, len(body)):
+        assert asyncio.run(collect(body, chunk_size, max_line_bytes=40)) == expected
+    
+    # A line over the limit is rejected as soon as the partial line exceeds it, or once it is complete
+    for body in (b"ok\n" + b"x" * 41, b"ok\n" + b"x" * 41 + b"\n"):
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(collect(body, 5, max_line_bytes=40))
+        assert exc_info.value.status_code == 413
+        assert exc_info.value.detail.startswith("Line 2 ")
+
+
+def test_import_requirements_project_not_found(client):
+    response = client.post(
+        "/api/v1/projects/00000000-0000-0000-0000-000000000000/requirements/import",
+        content=""
+    )
+    assert response.status_code == 404
+
+
+def _requirement(code, dependencias=()):
+    return {
+        "code": code,
+        "descricao": f"Requirement {code}",
+        "criterios_aceitacao": ["Criteria"],
+        "dependencias": list(dependencias)
+    }
+
+
+def test_requirement_dependents(client):
+    project_id = client.post("/api/v1/projects", json={"name": "Graph"}).json()["id"]
+    client.post(
+        f"/api/v1/projects/{project_id}/requirements",
+        json={"requirements": [
+            _requirement("REQ-A"),
+            _requirement("REQ-B", ["REQ-A"]),
+            _requirement("REQ-C", ["REQ-B"]),
+            _requirement("REQ-D", ["REQ-A", "REQ-C"]),
+            _requirement("REQ-E")
+        ]}
+    )
+    
+    response = client.get(f"/api/v1/projects/{project_id}/requirements/REQ-A/dependents")
+    assert response.status_code == 200
+    assert response.json()["dependents"] == ["REQ-B", "REQ-C", "REQ-D"]
+    
+    response = client.get(
+        f"/api/v1/projects/{project_id}/requirements/REQ-A/dependents",
+        params={"transitive": False}
+    )
+    assert response.json()["dependents"] == ["REQ-B", "REQ-D"]
+    
+    assert client.get(f"/api/v1/projects/{project_id}/requirements/REQ-E/dependents").json()["dependents"] == []
+    assert client.get(f"/api/v1/projects/{project_id}/requirements/REQ-X/dependents").status_code == 404
+
+
+def test_update_requirement_rejects_cycle(client):
+    project_id = client.post("/api/v1/projects", json={"name": "Graph"}).json()["id"]
+    created = client.post(
+        f"/api/v1/projects/{project_id}/requirements",
+        json={"requirements": [
+            _requirement("REQ-A"),
+            _requirement("REQ-B", ["REQ-A"]),
+            _requirement("REQ-C", ["REQ-B"])
+        ]}
+    ).json()
+    req_a = next(req for req in created if req["code"] == "REQ-A")
+    
+    response = client.put(f"/api/v1/projects/requirements/{req_a['id']}", json=_requirement("REQ-A", ["REQ-C"]))
+    assert response.status_code == 422
+    assert response.json()["detail"]["errors"] == ["Circular dependency: REQ-A -> REQ-C -> REQ-B -> REQ-A"]
+    
+    # Reversing an edge in one batch is not a cycle: only the final state counts
+    response = client.post(
+        f"/api/v1/projects/{project_id}/requirements",
+        json={"requirements": [_requirement("REQ-A", ["REQ-B"]), _requirement("REQ-B")]}
+    )
+    assert response.status_code == 200
+    dependents = client.get(f"/api/v1/projects/{project_id}/requirements/REQ-B/dependents").json()
+    assert sorted(dependents["dependents"]) == ["REQ-A", "REQ-C"]
+
+
+def test_dependency_graph_keeps_topological_order():
+    from app.services.dependency_graph import DependencyCycleError, DependencyGraph
+    
+    graph = DependencyGraph()
+    # Inserted dependents-first, so every edge forces a re-rank
+    for i in range(50):
+        graph.apply({f"R{i}": [f"R{i + 1}"]})
+    order = graph.order()
+    assert order.index("R50") < order.index("R0")
+    assert graph.dependents("R50") == [f"R{i}" for i in range(49, -1, -1)]
+    
+    with pytest.raises(DependencyCycleError) as exc:
+        graph.apply({"R3": ["R4"], "R50": ["R0"]})
+    assert exc.value.cycle[0] == "R50" and exc.value.cycle[-1] == "R50"
+    
+    # The failed batch was rolled back
+    assert graph.dependencies("R50") == []
+    assert graph.dependencies("R3", transitive=False) == ["R4"]
+    
+    graph.check({"R0": []})
+    assert graph.dependencies("R0", transitive=False) == ["R1"]
+
+
+def test_dependency_graph_check_leaves_no_new_nodes():
+    from app.services.dependency_graph import DependencyCycleError, DependencyGraph
+    
+    graph = DependencyGraph()
+    graph.apply({"A": ["B"], "B": ["C"]})
+    order = graph.order()
+    
+    # Valid and rejected checks, both introducing codes the graph never had
+    graph.check({"NEW": ["A", "GHOST"], "C": ["OTHER"]})
+    with pytest.raises(DependencyCycleError):
+        graph.check({"C": ["X"], "X": ["A"]})
+    with pytest.raises(DependencyCycleError):
+        graph.apply({"C": ["Y"], "Y": ["A"]})
+    
+    assert len(graph) == 3
+    assert graph.order() == order
+    assert "NEW" not in graph and "GHOST" not in graph and "X" not in graph and "Y" not in graph
+    assert graph.dependencies("C") == []
+
+
+def test_dependency_graph_index_tracks_graph_revision(client, db_session):
+    from uuid import UUID, uuid4
+    from sqlalchemy import event
+    from app.models.project import Project, Requirement
+    from app.services.dependency_graph import DependencyGraphIndex, bump_graph_revision
+    
+    project_id = client.post("/api/v1/projects", json={"name": "Revision"}).json()["id"]
+    client.post(
+        f"/api/v1/projects/{project_id}/requirements",
+        json={"requirements": [_requirement("REQ-A"), _requirement("REQ-B", ["REQ-A"])]}
+    )
+    pid = UUID(project_id)
+    index = DependencyGraphIndex()
+    assert index.get(db_session, pid).dependents("REQ-A") == ["REQ-B"]
+    
+    # A current graph costs one primary-key lookup
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        graph = index.get(db_session, pid)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert len(statements) == 1 and "graph_revision" in statements[0]
+    
+    # Another process swaps REQ-B for REQ-C: same row count and version sum, new revision
+    db_session.query(Requirement).filter(Requirement.code == "REQ-B").delete()
+    db_session.add(Requirement(
+        id=uuid4(), project_id=pid, code="REQ-C", version=1,
+        data=_requirement("REQ-C", ["REQ-A"])
+    ))
+    bump_graph_revision(db_session, pid)
+    db_session.commit()
+    rebuilt = index.get(db_session, pid)
+    assert rebuilt is not graph
+    assert rebuilt.dependents("REQ-A") == ["REQ-C"]
+    
+    # A reported commit that skipped someone else's write drops the graph instead of trusting it
+    revision = db_session.query(Project.graph_revision).filter(Project.id == pid).scalar()
+    index.committed(pid, revision + 2)
+    assert index.get(db_session, pid) is not rebuilt
+    
+    # The application's own writes advance the cached graph without a rebuild
+    from app.services.dependency_graph import dependency_graphs
+    cached = dependency_graphs.get(db_session, pid)
+    response = client.post(
+        f"/api/v1/projects/{project_id}/requirements",
+        json={"requirements": [_requirement("REQ-D", ["REQ-C"])]}
+    )
+    assert response.status_code == 200
+    assert dependency_graphs.get(db_session, pid) is cached
+    assert cached.dependents("REQ-A") == ["REQ-C", "REQ-D"]
+
+
+def test_dependency_graph_index_apply_checks_the_locked_revision(client, db_session):
+    from uuid import UUID
+    from app.models.project import Requirement
+    from app.services.dependency_graph import (
+        DependencyCycleError, DependencyGraphIndex, bump_graph_revision
+    )
+    
+    project_id = client.post("/api/v1/projects", json={"name": "Locked"}).json()["id"]
+    client.post(
+        f"/api/v1/projects/{project_id}/requirements",
+        json={"requirements": [_requirement("REQ-A"), _requirement("REQ-B")]}
+    )
+    pid = UUID(project_id)
+    index = DependencyGraphIndex()
+    stale = index.get(db_session, pid)
+    
+    # Another writer commits REQ-A -> REQ-B after our advisory check read the graph
+    stale.check({"REQ-B": ["REQ-A"]})
+    db_session.query(Requirement).filter(Requirement.code == "REQ-A").update(
+        {Requirement.data: _requirement("REQ-A", ["REQ-B"])}, synchronize_session=False
+    )
+    bump_graph_revision(db_session, pid)
+    db_session.commit()
+    
+    # Our write bumps the revision too; the graph it applies to reflects the other commit
+    revision = bump_graph_revision(db_session, pid)
+    with pytest.raises(DependencyCycleError):
+        index.apply(db_session, pid, {"REQ-B": ["REQ-A"]}, revision)
+    db_session.rollback()
+    
+    # Once current, the graph is applied to in place and advanced by the commit
+    current = index.get(db_session, pid)
+    assert current is not stale
+    revision = bump_graph_revision(db_session, pid)
+    index.apply(db_session, pid, {"REQ-C": ["REQ-A"]}, revision)
+    db_session.commit()
+    index.committed(pid, revision)
+    assert index.get(db_session, pid) is current
+    assert current.dependents("REQ-B") == ["REQ-A", "REQ-C"]
+
+
+def test_dependency_graph_build_skips_only_stored_cycle_edges(db_session):
+    from uuid import uuid4
+    from app.models.project import Project, Requirement
+    from app.services.dependency_graph import DependencyGraphIndex
+    
+    project = Project(id=uuid4(), name="Stored cycle", status="DRAFT")
+    db_session.add(project)
+    db_session.add_all([
+        Requirement(id=uuid4(), project_id=project.id, code="REQ-A", version=1,
+                    data=_requirement("REQ-A", ["REQ-B"])),
+        # REQ-A closes the cycle; REQ-C does not and is kept
+        Requirement(id=uuid4(), project_id=project.id, code="REQ-B", version=1,
+                    data=_requirement("REQ-B", ["REQ-A", "REQ-C"])),
+        Requirement(id=uuid4(), project_id=project.id, code="REQ-C", version=1,
+                    data=_requirement("REQ-C")),
+    ])
+    db_session.commit()
+    
+    graph = DependencyGraphIndex._build(db_session, project.id)
+    assert graph.dependencies("REQ-A", transitive=False) == ["REQ-B"]
+    assert graph.dependencies("REQ-B", transitive=False) == ["REQ-C"]
+    assert graph.dependents("REQ-C") == ["REQ-B", "REQ-A"]
+
+
+def test_validate_requirements_batch(client, db_session):
+    from sqlalchemy import event
+    
+    project_id = client.post("/api/v1/projects", json={"name": "Validate"}).json()["id"]
+    client.post(
+        f"/api/v1/projects/{project_id}/requirements",
+        json={"requirements": [_requirement("REQ-A"), _requirement("REQ-B", ["REQ-A"])]}
+    )
+    
+    def validate(requirements):
+        statements = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = client.post(
+                f"/api/v1/projects/{project_id}/requirements/validate",
+                json={"requirements": requirements}
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        assert response.status_code == 200
+        return response.json(), statements
+    
+    # Stored dependencies resolve with one query however many requirements are checked
+    _, small = validate([_requirement("REQ-N0", ["REQ-A"])])
+    body, large = validate([_requirement(f"REQ-N{i}", ["REQ-A", "REQ-B"]) for i in range(30)])
+    assert len(large) == len(small)
+    assert not any(statement.lstrip().upper().startswith(("INSERT", "UPDATE")) for statement in large)
+    assert body["valid"] is True
+    assert len(body["results"]) == 30
+    
+    body, _ = validate([
+        _requirement("REQ-C", ["REQ-B"]),
+        _requirement("REQ-D", ["REQ-MISSING"]),
+        _requirement("REQ-E", ["REQ-E"])
+    ])
+    assert body["valid"] is False
+    assert [result["valid"] for result in body["results"]] == [True, False, False]
+    assert body["results"][1]["errors"] == ["Dependencies not found: REQ-MISSING"]
+    assert "cannot depend on itself" in body["results"][2]["errors"][0]
+    
+    # Cycles are reported on the requirement that closes them
+    body, _ = validate([_requirement("REQ-C", ["REQ-B"]), _requirement("REQ-A", ["REQ-C"])])
+    assert [result["valid"] for result in body["results"]] == [True, False]
+    assert body["results"][1]["errors"] == ["Circular dependency: REQ-A -> REQ-C -> REQ-B -> REQ-A"]
+    
+    # Nothing was written
+    stored = client.get(f"/api/v1/projects/{project_id}/requirements").json()
+    assert sorted(req["code"] for req in stored) == ["REQ-A", "REQ-B"]
+    assert all(req["version"] == 1 for req in stored)
+    
+    response = client.post(
+        "/api/v1/projects/00000000-0000-0000-0000-000000000000/requirements/validate",
+        json={"requirements": []}
+    )
+    assert response.status_code == 404
+
+
+def test_requirement_versions_delta_storage(client, db_session, monkeypatch):
+    from unittest.mock import patch
+    from app.core.config import settings
+    from app.models.project import RequirementVersion
+    from app.tasks.requirement_versions import compact_requirement_versions_task
+    
+    project_id = client.post("/api/v1/projects", json={"name": "Deltas"}).json()["id"]
+    
+    def payload(version):
+        return {
+            "code": "REQ-001",
+            "descricao": f"Version {version}",
+            "criterios_aceitacao": ["Criteria 1"] + (["Criteria 2"] if version % 2 else []),
+            "prioridade": "must",
+            "testabilidade": "Automated" if version > 4 else None
+        }
+    
+    # Version 1 is archived as a full copy before delta storage is enabled
+    requirement_id = client.post(
+        f"/api/v1/projects/{project_id}/requirements",
+        json={"requirements": [payload(1)]}
+    ).json()[0]["id"]
+    client.put(f"/api/v1/projects/requirements/{requirement_id}", json=payload(2))
+    
+    monkeypatch.setattr(settings, "REQUIREMENTS_VERSION_DELTAS", True)
+    monkeypatch.setattr(settings, "REQUIREMENTS_VERSION_SNAPSHOT_INTERVAL", 3)
+    for version in range(3, 6):
+        client.put(f"/api/v1/projects/requirements/{requirement_id}", json=payload(version))
+    client.post(f"/api/v1/projects/{project_id}/requirements", json={"requirements": [payload(6)]})
+    client.put(f"/api/v1/projects/requirements/{requirement_id}", json=payload(7))
+    
+    def stored_layout():
+        db_session.expire_all()
+        rows = db_session.query(RequirementVersion).filter(
+            RequirementVersion.requirement_id == requirement_id
+        ).all()
+        return {row.version: row.delta is not None for row in rows}
+    
+    def assert_history():
+        versions = client.get(f"/api/v1/projects/requirements/{requirement_id}/versions").json()
+        assert [v["version"] for v in versions] == [6, 5, 4, 3, 2, 1]
+        for version in range(1, 7):
+            expected = payload(version)
+            single = client.get(f"/api/v1/projects/requirements/{requirement_id}/versions/{version}").json()
+            for entry in (single, versions[6 - version]):
+                assert entry["data"]["descricao"] == expected["descricao"]
+                assert entry["data"]["criterios_aceitacao"] == expected["criterios_aceitacao"]
+                assert entry["data"]["testabilidade"] == expected["testabilidade"]
+    
+    assert stored_layout() == {1: False, 2: True, 3: False, 4: True, 5: True, 6: False}
+    assert_history()
+    
+    with patch("app.tasks.requirement_versions.SessionLocal", return_value=db_session):
+        result = compact_requirement_versions_task(project_id=project_id)
+        assert result["rewritten"] == 1
+        assert stored_layout() == {1: True, 2: True, 3: False, 4: True, 5: True, 6: False}
+        assert_history()
+        
+        # Turning deltas off and compacting again restores full rows
+        monkeypatch.setattr(settings, "REQUIREMENTS_VERSION_DELTAS", False)
+        assert compact_requirement_versions_task(project_id=project_id)["rewritten"] == 4
+        assert not any(stored_layout().values())
+        assert_history()
+
+
+def test_json_patch_round_trip():
+    from app.services.json_patch import apply_patch, make_patch
+    
+    source = {"a": 1, "b/c": [1, 2], "d": {"e": None}, "gone": True}
+    target = {"a": 2, "b/c": [1, 2], "d": {"e": 1}, "new~key": "x"}
+    patch_ops = make_patch(source, target)
+    assert {op["path"] for op in patch_ops} == {"/a", "/d", "/gone", "/new~0key"}
+    assert apply_patch(source, patch_ops) == target
+    assert source["a"] == 1
+    
+    assert apply_patch({"l": [1, 3]}, [{"op": "add", "path": "/l/1", "value": 2}]) == {"l": [1, 2, 3]}
+    with pytest.raises(ValueError):
+        apply_patch({}, [{"op": "remove", "path": "/missing"}])
+
+
+def test_requirements_snapshot(client, db_session):
+    from datetime import datetime, timedelta
+    from uuid import UUID
+    from sqlalchemy.dialects import postgresql
+    from app.models.project import Project, Requirement, RequirementVersion
+    from app.services.requirement_service import RequirementService
+    
+    project_id = client.post("/api/v1/projects", json={"name": "Snapshot"}).json()["id"]
+    created = client.post(
+        f"/api/v1/projects/{project_id}/requirements",
+        json={"requirements": [_requirement("REQ-A"), _requirement("REQ-B")]}
+    ).json()
+    req_a = next(req for req in created if req["code"] == "REQ-A")
+    
+    def bump_project_version():
+        project = db_session.get(Project, UUID(project_id))
+        project.requirements_version += 1
+        db_session.commit()
+    
+    def update(description):
+        client.put(
+            f"/api/v1/projects/requirements/{req_a['id']}",
+            json={**_requirement("REQ-A"), "descricao": description}
+        )
+    
+    # Project version 1: REQ-A edited to v2; version 2: edited to v3 and REQ-C added
+    update("A at v2")
+    bump_project_version()
+    update("A at v3")
+    client.post(f"/api/v1/projects/{project_id}/requirements", json={"requirements": [_requirement("REQ-C")]})
+    
+    def snapshot(**params):
+        response = client.get(f"/api/v1/projects/{project_id}/requirements/snapshot", params=params)
+        assert response.status_code == 200
+        return {req["code"]: (req["version"], req["data"]["descricao"]) for req in response.json()["requirements"]}
+    
+    assert snapshot(version=1) == {"REQ-A": (2, "A at v2"), "REQ-B": (1, "Requirement REQ-B")}
+    assert snapshot(version=2) == {
+        "REQ-A": (3, "A at v3"), "REQ-B": (1, "Requirement REQ-B"), "REQ-C": (1, "Requirement REQ-C")
+    }
+    
+    # Spread the history over time: created at t0, archived v1 at t0+10, v2 at t0+20, REQ-C at t0+30
+    t0 = datetime(2025, 1, 1, 12, 0, 0)
+    for requirement in db_session.query(Requirement).filter(Requirement.project_id == UUID(project_id)):
+        requirement.created_at = t0 + timedelta(minutes=30 if requirement.code == "REQ-C" else 0)
+    for archived in db_session.query(RequirementVersion).filter(RequirementVersion.requirement_id == UUID(req_a["id"])):
+        archived.created_at = t0 + timedelta(minutes=10 * archived.version)
+    db_session.commit()
+    
+    assert snapshot(at=(t0 + timedelta(minutes=5)).isoformat()) == {
+        "REQ-A": (1, "Requirement REQ-A"), "REQ-B": (1, "Requirement REQ-B")
+    }
+    assert snapshot(at=(t0 + timedelta(minutes=15)).isoformat())["REQ-A"] == (2, "A at v2")
+    assert len(snapshot(at=(t0 + timedelta(minutes=45)).isoformat())) == 3
+    assert snapshot(at=(t0 - timedelta(minutes=1)).isoformat()) == {}
+    
+    assert client.get(f"/api/v1/projects/{project_id}/requirements/snapshot").status_code == 400
+    
+    # PostgreSQL picks the row per requirement with DISTINCT ON
+    statement = RequirementService._snapshot_statement("postgresql", UUID(project_id), project_version=1)
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "SELECT DISTINCT ON (history.requirement_id)" in sql
+    assert "UNION ALL" in sql
+
+
+def test_keyset_pagination(client, db_session):
+    from datetime import datetime, timedelta
+    from uuid import UUID
+    from app.models.project import Project, Requirement
+    
+    project_ids = [client.post("/api/v1/projects", json={"name": f"Project {i}"}).json()["id"] for i in range(5)]
+    project_id = project_ids[0]
+    client.post(
+        f"/api/v1/projects/{project_id}/requirements",
+        json={"requirements": [_requirement(f"REQ-{i}") for i in range(5)]}
+    )
+    
+    def collect(url, **params):
+        pages = []
+        while True:
+            response = client.get(url, params=params)
+            assert response.status_code == 200
+            pages.append(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return pages
+            params["cursor"] = cursor
+    
+    # Server-default timestamps (whole seconds on SQLite) shared by rows created back to back
+    listed = client.get("/api/v1/projects").json()
+    assert len({p["created_at"] for p in listed}) < len(listed)
+    pages = collect("/api/v1/projects", limit=2)
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [p["id"] for page in pages for p in page] == [p["id"] for p in listed]
+    url = f"/api/v1/projects/{project_id}/requirements"
+    pages = collect(url, limit=2)
+    assert sorted(r["id"] for page in pages for r in page) == sorted(r["id"] for r in client.get(url).json())
+    
+    # Distinct project timestamps; requirements tie in pairs so the id breaks ties
+    t0 = datetime(2025, 1, 1, 12, 0, 0)
+    for i, pid in enumerate(project_ids):
+        db_session.get(Project, UUID(pid)).created_at = t0 + timedelta(minutes=i)
+    for i, requirement in enumerate(db_session.query(Requirement).filter(Requirement.project_id == UUID(project_id))):
+        requirement.created_at = t0 + timedelta(minutes=i // 2)
+    db_session.commit()
+    
+    pages = collect("/api/v1/projects", limit=2)
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [p["id"] for page in pages for p in page] == project_ids
+    
+    # A cursor already marks the position: skipping past it as well is rejected
+    cursor = client.get("/api/v1/projects", params={"limit": 2}).headers["X-Next-Cursor"]
+    response = client.get("/api/v1/projects", params={"limit": 2, "cursor": cursor, "skip": 1})
+    assert response.status_code == 422
+    
+    everything = client.get(url).json()
+    assert "X-Next-Cursor" not in client.get(url).headers
+    pages = collect(url, limit=2)
+    assert [len(page) for page in pages] == [2, 2, 1]
+    paged = [r for page in pages for r in page]
+    assert sorted(r["id"] for r in paged) == sorted(r["id"] for r in everything)
+    
+    # Field projection leaves out the data body
+    listed = client.get(url, params={"fields": "id,code,version", "limit": 3}).json()
+    assert listed == [{"id": r["id"], "code": r["code"], "version": r["version"]} for r in paged[:3]]
+    
+    assert client.get(url, params={"fields": "id,secret"}).status_code == 400
+    assert client.get(url, params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_requirement_versions_pagination(client):
+    project_id = client.post("/api/v1/projects", json={"name": "Paged versions"}).json()["id"]
+    requirement = client.post(
+        f"/api/v1/projects/{project_id}/requirements",
+        json={"requirements": [_requirement("REQ-A")]}
+    ).json()[0]
+    for i in range(5):
+        client.put(
+            f"/api/v1/projects/requirements/{requirement['id']}",
+            json={**_requirement("REQ-A"), "descricao": f"Edit {i}"}
+        )
+    
+    url = f"/api/v1/projects/requirements/{requirement['id']}/versions"
+    first = client.get(url, params={"limit": 2})
+    assert [v["version"] for v in first.json()] == [5, 4]
+    
+    second = client.get(url, params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert [v["version"] for v in second.json()] == [3, 2]
+    
+    last = client.get(url, params={"limit": 2, "cursor": second.headers["X-Next-Cursor"]})
+    assert [v["version"] for v in last.json()] == [1]
+    assert "X-Next-Cursor" not in last.headers
+    
+    headers_only = client.get(url, params={"fields": "version,created_at"}).json()
+    assert [set(v) for v in headers_only] == [{"version", "created_at"}] * 5
+
+
+def test_requirements_snapshot_rebuilds_deltas_in_batch(client, db_session, monkeypatch):
+    from datetime import datetime
+    from uuid import UUID
+    from sqlalchemy import event
+    from app.core.config import settings
+    from app.models.project import Requirement, RequirementVersion
+    from app.services.requirement_service import RequirementService
+    
+    monkeypatch.setattr(settings, "REQUIREMENTS_VERSION_DELTAS", True)
+    monkeypatch.setattr(settings, "REQUIREMENTS_VERSION_SNAPSHOT_INTERVAL", 3)
+    project_id = client.post("/api/v1/projects", json={"name": "Snapshot deltas"}).json()["id"]
+    
+    def write(count):
+        # Live version 5; archived 1, 2 and 4 are deltas, 3 keeps its full data
+        codes = [f"REQ-{i:03d}" for i in range(count)]
+        client.post(f"/api/v1/projects/{project_id}/requirements",
+                    json={"requirements": [_requirement(code) for code in codes]})
+        for edit in range(2, 6):
+            client.post(
+                f"/api/v1/projects/{project_id}/requirements",
+                json={"requirements": [{**_requirement(code), "descricao": f"{code} v{edit}"} for code in codes]}
+            )
+        # Created on day 1, version v archived on day v
+        for requirement in db_session.query(Requirement):
+            requirement.created_at = datetime(2025, 1, 1)
+        for archived in db_session.query(RequirementVersion):
+            archived.created_at = datetime(2025, 1, archived.version, 12, 0, 0)
+        db_session.commit()
+    
+    def snapshot(day):
+        statements = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            entries = RequirementService.get_requirements_snapshot(
+                db_session, UUID(project_id), at=datetime(2025, 1, day, 18, 0, 0)
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        return [(entry.code, entry.version, entry.data.descricao) for entry in entries], statements
+    
+    write(2)
+    # Version 2 is rebuilt from the stored version 3, version 4 from the live row
+    few_v2, few_statements = snapshot(1)
+    assert few_v2 == [("REQ-000", 2, "REQ-000 v2"), ("REQ-001", 2, "REQ-001 v2")]
+    few_v4, _ = snapshot(3)
+    assert few_v4 == [("REQ-000", 4, "REQ-000 v4"), ("REQ-001", 4, "REQ-001 v4")]
+    
+    write(12)
+    many, many_statements = snapshot(1)
+    assert many == [(f"REQ-{i:03d}", 2, f"REQ-{i:03d} v2") for i in range(12)]
+    assert len(many_statements) == len(few_statements)
+
+
+def test_requirement_diff(client, monkeypatch):
+    from uuid import UUID, uuid4
+    from app.core.config import settings
+    from app.services.json_patch import apply_patch, diff_documents
+    from app.services.requirement_diff import requirement_diffs
+    
+    monkeypatch.setattr(settings, "REQUIREMENTS_VERSION_DELTAS", True)
+    monkeypatch.setattr(settings, "REQUIREMENTS_VERSION_SNAPSHOT_INTERVAL", 3)
+    
+    project_id = client.post("/api/v1/projects", json={"name": "Diffs"}).json()["id"]
+    created = client.post(
+        f"/api/v1/projects/{project_id}/requirements",
+        json={"requirements": [_requirement("REQ-A"), _requirement("REQ-B")]}
+    ).json()
+    req_a, req_b = sorted(created, key=lambda req: req["code"])
+    
+    def update(requirement, **changes):
+        client.put(
+            f"/api/v1/projects/requirements/{requirement['id']}",
+            json={**_requirement(requirement["code"]), **changes}
+        )
+    
+    update(req_a, descricao="Edited")
+    update(req_a, descricao="Edited", criterios_aceitacao=["Criterion 1", "Criterion 2"])
+    update(req_a, descricao="Edited again", criterios_aceitacao=["Criterion 1", "Criterion 3"])
+    update(req_b, prioridade="could")
+    
+    response = client.get(f"/api/v1/projects/requirements/{req_a['id']}/diff", params={"from": 2, "to": 4})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["from_version"], body["to_version"]) == (2, 4)
+    assert sorted(change["path"] for change in body["changes"]) == ["/criterios_aceitacao", "/descricao"]
+    
+    # Equal-length lists are diffed item by item; `to` defaults to the current version
+    body = client.get(f"/api/v1/projects/requirements/{req_a['id']}/diff", params={"from": 3}).json()
+    assert body["to_version"] == 4
+    assert sorted(change["path"] for change in body["changes"]) == ["/criterios_aceitacao/1", "/descricao"]
+    
+    versions = {v["version"]: v["data"] for v in client.get(f"/api/v1/projects/requirements/{req_a['id']}/versions").json()}
+    assert apply_patch(versions[1], client.get(
+        f"/api/v1/projects/requirements/{req_a['id']}/diff", params={"from": 1, "to": 3}
+    ).json()["changes"]) == versions[3]
+    
+    # Batch form, in query order; repeated diffs come from the cache
+    assert requirement_diffs.get((UUID(req_b["id"]), 1, 2)) is None
+    response = client.post(f"/api/v1/projects/{project_id}/requirements/diff", json={"diffs": [
+        {"requirement_id": req_b["id"], "from_version": 1},
+        {"requirement_id": req_a["id"], "from_version": 4, "to_version": 4}
+    ]})
+    assert response.status_code == 200
+    assert response.json() == [
+        {"requirement_id": req_b["id"], "from_version": 1, "to_version": 2,
+         "changes": [{"op": "replace", "path": "/prioridade", "value": "could"}]},
+        {"requirement_id": req_a["id"], "from_version": 4, "to_version": 4, "changes": []}
+    ]
+    assert requirement_diffs.get((UUID(req_b["id"]), 1, 2)) is not None
+    
+    assert client.get(f"/api/v1/projects/requirements/{req_a['id']}/diff", params={"from": 9}).status_code == 404
+    assert client.get(f"/api/v1/projects/requirements/{uuid4()}/diff", params={"from": 1}).status_code == 404
+    other_project = client.post("/api/v1/projects", json={"name": "Other"}).json()["id"]
+    response = client.post(f"/api/v1/projects/{other_project}/requirements/diff", json={"diffs": [
+        {"requirement_id": req_a["id"], "from_version": 1}
+    ]})
+    assert response.status_code == 404
+    
+    assert diff_documents({"a": [1, {"b": 2}]}, {"a": [1, {"b": 3}], "c": True}) == [
+        {"op": "replace", "path": "/a/1/b", "value": 3},
+        {"op": "add", "path": "/c", "value": True}
+    ]
+
+
+def test_search_requirements(client):
+    from uuid import uuid4
+    from sqlalchemy.dialects import postgresql
+    from app.services.requirement_search import search_statement
+    
+    project_id = client.post("/api/v1/projects", json={"name": "Search"}).json()["id"]
+    created = client.post(f"/api/v1/projects/{project_id}/requirements", json={"requirements": [
+        {**_requirement("REQ-LOGIN"), "descricao": "User login with password", "prioridade": "must"},
+        {**_requirement("REQ-RESET", ["REQ-LOGIN"]), "descricao": "Password reset by email",
+         "criterios_aceitacao": ["Reset link expires after one hour"]},
+        {**_requirement("REQ-AUDIT", ["REQ-LOGIN"]), "descricao": "Audit trail", "prioridade": "could",
+         "criterios_aceitacao": ["Every login attempt is recorded"]}
+    ]}).json()
+    reset = next(req for req in created if req["code"] == "REQ-RESET")
+    
+    url = f"/api/v1/projects/{project_id}/requirements/search"
+    
+    def search(**params):
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        return [req["code"] for req in response.json()]
+    
+    assert sorted(search(q="password")) == ["REQ-LOGIN", "REQ-RESET"]
+    assert search(q="reset password") == ["REQ-RESET"]
+    assert sorted(search(q="login")) == ["REQ-AUDIT", "REQ-LOGIN"]  # acceptance criteria are indexed
+    assert search(q="expires hour") == ["REQ-RESET"]
+    assert search(q="\"*(") == []
+    
+    # Column filters, alone or with text
+    assert search(prioridade="must") == ["REQ-LOGIN"]
+    assert search(depends_on="REQ-LOGIN") == ["REQ-AUDIT", "REQ-RESET"]
+    assert search(q="login", depends_on="REQ-LOGIN") == ["REQ-AUDIT"]
+    
+    # The index follows updates
+    client.put(
+        f"/api/v1/projects/requirements/{reset['id']}",
+        json={**_requirement("REQ-RESET"), "descricao": "Account recovery", "prioridade": "wont"}
+    )
+    assert search(q="password") == ["REQ-LOGIN"]
+    assert search(q="recovery", prioridade="wont") == ["REQ-RESET"]
+    assert search(depends_on="REQ-LOGIN") == ["REQ-AUDIT"]
+    
+    assert client.get(url, params={"prioridade": "urgent"}).status_code == 422
+    assert client.get(f"/api/v1/projects/{uuid4()}/requirements/search", params={"q": "x"}).status_code == 404
+    
+    # PostgreSQL matches the generated tsvector column and array containment
+    statement = search_statement("postgresql", uuid4(), q="login", depends_on="REQ-LOGIN")
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "requirements.search_vector @@ websearch_to_tsquery" in sql
+    assert "ts_rank(requirements.search_vector" in sql
+    assert "requirements.dependencias @>" in sql
+
+
+def test_search_index_created_on_existing_sqlite_database(client, db_session):
+    from app.services.requirement_search import ensure_sqlite_fts
+    
+    project_id = client.post("/api/v1/projects", json={"name": "Old database"}).json()["id"]
+    client.post(f"/api/v1/projects/{project_id}/requirements", json={"requirements": [
+        {**_requirement("REQ-LOGIN"), "descricao": "User login with password"}
+    ]})
+    
+    # A database created before the index existed
+    connection = db_session.connection()
+    for name in ("requirements_fts_insert", "requirements_fts_update", "requirements_fts_delete"):
+        connection.exec_driver_sql(f"DROP TRIGGER {name}")
+    connection.exec_driver_sql("DROP TABLE requirements_fts")
+    db_session.commit()
+    
+    assert ensure_sqlite_fts(db_session.connection()) is True
+    assert ensure_sqlite_fts(db_session.connection()) is False
+    db_session.commit()
+    
+    url = f"/api/v1/projects/{project_id}/requirements/search"
+    assert [req["code"] for req in client.get(url, params={"q": "password"}).json()] == ["REQ-LOGIN"]
+    
+    # Triggers are back: later writes are indexed once
+    client.post(f"/api/v1/projects/{project_id}/requirements", json={"requirements": [
+        {**_requirement("REQ-RESET"), "descricao": "Password reset by email"}
+    ]})
+    assert sorted(req["code"] for req in client.get(url, params={"q": "password"}).json()) == [
+        "REQ-LOGIN", "REQ-RESET"
+    ]
+
+
+def test_requirement_version_columns_are_integers(client, db_session):
+    import importlib.util
+    import io
+    import re
+    from pathlib import Path
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+    from sqlalchemy import text
+    from sqlalchemy.dialects import postgresql
+    from app.models.project import Requirement, RequirementVersion
+    
+    # The ORM declares the same column types as the migrations create
+    path = Path(__file__).parent.parent / "alembic" / "versions" / "001_create_projects_and_requirements.py"
+    spec = importlib.util.spec_from_file_location("migration_001", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    ddl = io.StringIO()
+    context = MigrationContext.configure(dialect_name="postgresql", opts={"as_sql": True, "output_buffer": ddl})
+    with Operations.context(context):
+        migration.upgrade()
+    for model in (Requirement, RequirementVersion):
+        table = re.search(rf"CREATE TABLE {model.__tablename__} \((.*?)\n\);", ddl.getvalue(), re.S).group(1)
+        created = re.search(r"^\s*version (\w+)", table, re.M).group(1)
+        assert model.__table__.c.version.type.compile(dialect=postgresql.dialect()) == created == "INTEGER"
+    
+    project_id = client.post("/api/v1/projects", json={"name": "Integer versions"}).json()["id"]
+    requirement = client.post(
+        f"/api/v1/projects/{project_id}/requirements",
+        json={"requirements": [_requirement("REQ-A")]}
+    ).json()[0]
+    for i in range(11):
+        client.put(
+            f"/api/v1/projects/requirements/{requirement['id']}",
+            json={**_requirement("REQ-A"), "descricao": f"Edit {i}"}
+        )
+    
+    # Stored as integers, so SQL ordering is numeric (10 sorts after 9)
+    assert db_session.execute(text("SELECT DISTINCT typeof(version) FROM requirements_versions")).scalars().all() == ["integer"]
+    listed = client.get(f"/api/v1/projects/requirements/{requirement['id']}/versions", params={"limit": 3}).json()
+    assert [v["version"] for v in listed] == [11, 10, 9]
+    assert [r["code"] for r in client.get(f"/api/v1/projects/{project_id}/requirements", params={"version": 12}).json()] == ["REQ-A"]
+    
+    # Version range filters are served by the (requirement_id, version) and (project_id, version) indexes
+    plan = " ".join(row[-1] for row in db_session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM requirements_versions WHERE requirement_id = :id AND version < 5"
+    ), {"id": requirement["id"]}))
+    assert "USING INDEX" in plan and "version<?" in plan
+    plan = " ".join(row[-1] for row in db_session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM requirements WHERE project_id = :id AND version > 5"
+    ), {"id": project_id}))
+    assert "ix_requirements_project_version (project_id=? AND version>?)" in plan
+
+
+def test_project_scoped_queries_use_indexes(client, db_session, async_engine):
+    import re
+    from uuid import UUID, uuid4
+    from sqlalchemy import event
+    from app.models.code_repo import CodeRepository
+    from app.models.project import RequirementsGatewayAudit
+    from app.models.qa_session import QASession
+    from app.services.code_repo_service import CodeRepositoryService
+    from app.services.gateway_service import GatewayService
+    from app.services.requirement_service import RequirementService
+    
+    project_id = client.post("/api/v1/projects", json={"name": "Indexes"}).json()["id"]
+    requirement = client.post(
+        f"/api/v1/projects/{project_id}/requirements",
+        json={"requirements": [_requirement("REQ-A"), _requirement("REQ-B", ["REQ-A"])]}
+    ).json()[0]
+    pid = UUID(project_id)
+    for round_number in (1, 2):
+        db_session.add(QASession(project_id=pid, request_id=str(uuid4()), round=round_number, questions=[]))
+        db_session.add(RequirementsGatewayAudit(
+            project_id=pid, correlation_id=uuid4(), request_id=uuid4(),
+            action="finalizar", from_state="REQS_REFINING", to_state="REQS_READY"
+        ))
+        db_session.add(CodeRepository(
+            project_id=pid, git_url="https://example.com/repo.git", token_ciphertext=b"x", token_kid="kid"
+        ))
+    db_session.commit()
+    
+    # The repository queries as the application issues them
+    statements = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+    
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        assert client.get(f"/api/v1/projects/{project_id}/qa-sessions").json()["total"] == 2
+        assert len(GatewayService.get_project_gateway_history(db_session, pid)) == 2
+        assert len(CodeRepositoryService(db_session).get_repositories_by_project(pid)) == 2
+        assert RequirementService.get_requirement_dependents(db_session, pid, "REQ-A") == ["REQ-B"]
+        assert len(RequirementService.get_requirements_by_version(db_session, pid, limit=1)) == 1
+        assert RequirementService.get_requirement_versions(db_session, requirement["id"]) == []
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+    
+    # SQLite names unique-constraint indexes sqlite_autoindex_<table>_<n>; match those by leading column
+    expected = {
+        "qa_sessions": r"ix_qa_sessions_project_round \(project_id=\?",
+        "requirements_gateway_audit": r"ix_requirements_gateway_audit_project_created_at \(project_id=\?",
+        "code_repos": r"ix_code_repos_project_created_at \(project_id=\?",
+        "requirements": r"\w+ \(project_id=\?",
+        "requirements_versions": r"sqlite_autoindex_requirements_versions_\d \(requirement_id=\?",
+    }
+    seen = set()
+    for statement, parameters in statements:
+        plan = [row[-1] for row in db_session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+        for line in plan:
+            table = re.match(r"(?:SCAN|SEARCH) (\w+)", line)
+            if table and table.group(1) in expected:
+                seen.add(table.group(1))
+                assert re.search(rf"USING (?:COVERING )?INDEX {expected[table.group(1)]}", line), (statement, plan)
+        # Project-scoped ordering comes straight from the index
+        assert not any("TEMP B-TREE FOR ORDER BY" in line for line in plan), (statement, plan)
+    assert seen == set(expected)
+    
+    # Every index the models declare is created by a migration under the same name
+    from pathlib import Path
+    from app.core.database import Base
+    migrations = "".join(path.read_text() for path in (Path(__file__).parent.parent / "alembic" / "versions").glob("*.py"))
+    declared = [index.name for table in Base.metadata.tables.values() for index in table.indexes if index.name]
+    assert declared and [name for name in declared if f"'{name}'" not in migrations] == []
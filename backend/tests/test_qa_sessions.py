@@ -2,6 +2,7 @@
 Tests for QA Sessions / Requirement Refinement (R3)
 """
 import pytest
+from unittest.mock import MagicMock, patch
 from uuid import uuid4
 import uuid as uuid_lib
 from fastapi.testclient import TestClient
@@ -10,6 +11,8 @@ from sqlalchemy.orm import Session
 from app.models.project import Project, Requirement
 from app.models.qa_session import QASession
 from app.services.analyst_service import AnalystService
+from app.services.question_cache import QuestionCache
+from app.services.question_candidates import QUESTION_TEMPLATES, QuestionCandidate
 from app.schemas.qa_session import QuestionCategory
 
 
@@ -59,23 +62,20 @@ class TestAnalystService:
         assert any(q.category == QuestionCategory.DEPENDENCIES for q in questions)
         assert any("external" in q.text.lower() or "dependencies" in q.text.lower() for q in questions)
     
-    def test_deduplicate_questions_removes_duplicates(self):
+    def test_select_top_questions_removes_duplicates(self):
         """Test that duplicate questions are removed"""
         analyst = AnalystService()
         
-        from app.schemas.qa_session import Question
-        
-        questions = [
-            Question(id=str(uuid4()), category=QuestionCategory.TESTABILITY, 
-                    text="What are the performance metrics?", priority=1),
-            Question(id=str(uuid4()), category=QuestionCategory.TESTABILITY, 
-                    text="What are the performance metrics?", priority=1),
-            Question(id=str(uuid4()), category=QuestionCategory.AMBIGUITY, 
-                    text="Can you clarify the scope?", priority=2),
+        candidates = [
+            QuestionCandidate("missing_metrics", "REQ-001", (), "Performance"),
+            QuestionCandidate("missing_metrics", "REQ-001", (), "Performance"),
+            QuestionCandidate("missing_metrics", "req-001", (), "Performance"),
+            QuestionCandidate("ambiguous_terms", "REQ-001", ("some",), "Scope"),
         ]
         
-        unique = analyst._deduplicate_questions(questions)
+        unique, seen = analyst._select_top_questions(candidates, max_questions=10)
         
+        assert seen == 4
         assert len(unique) == 2
         texts = [q.text for q in unique]
         assert len(texts) == len(set(texts))
@@ -95,7 +95,7 @@ class TestAnalystService:
                     text="What are the version requirements for external dependencies?", priority=2),
         ]
         
-        quality = analyst._evaluate_question_quality(questions, questions)
+        quality = analyst._evaluate_question_quality(questions, len(questions))
         
         # Verify quality metrics are calculated
         assert 0.0 <= quality.total_score <= 1.0
@@ -271,27 +271,375 @@ class TestAnalystService:
         assert any("it" in q.text.lower() or "this" in q.text.lower() or "that" in q.text.lower() 
                    for q in pronoun_questions)
     
-    def test_prioritize_questions_sorts_by_priority(self):
+    def test_select_top_questions_sorts_by_priority(self):
         """Test question prioritization logic"""
         analyst = AnalystService()
         
-        from app.schemas.qa_session import Question
-        
-        questions = [
-            Question(id=str(uuid4()), category=QuestionCategory.TESTABILITY, 
-                    text="Low priority", priority=3),
-            Question(id=str(uuid4()), category=QuestionCategory.AMBIGUITY, 
-                    text="High priority", priority=1),
-            Question(id=str(uuid4()), category=QuestionCategory.DEPENDENCIES, 
-                    text="Medium priority", priority=2),
+        candidates = [
+            QuestionCandidate("error_handling", "REQ-001", (), "Low priority"),
+            QuestionCandidate("ambiguous_terms", "REQ-002", ("some",), "High priority"),
+            QuestionCandidate("dependency_systems", "REQ-003", ("uses",), "Medium priority"),
         ]
         
-        prioritized = analyst._prioritize_questions(questions)
+        prioritized, _ = analyst._select_top_questions(candidates, max_questions=10)
         
         # Should be sorted by priority (1 first)
-        assert prioritized[0].priority == 1
-        assert prioritized[1].priority == 2
-        assert prioritized[2].priority == 3
+        assert [q.priority for q in prioritized] == [1, 2, 3]
+        assert [q.context for q in prioritized] == [
+            "Requirement: High priority...", "Requirement: Medium priority...", "Requirement: Low priority..."
+        ]
+
+    def test_matcher_scan_builds_hit_vector(self):
+        """Test one scan reports keywords in text order plus structural tags"""
+        hits = AnalystService._matcher.scan(
+            "Maybe it should respond in 200 ms; it depends on the auth service and must be fast"
+        )
+        
+        assert hits.ambiguous == ("maybe", "should")
+        assert hits.untestable == ("fast",)
+        assert hits.dependencies == ("depends on",)
+        assert hits.has_numbers and hits.has_units
+        assert not hits.has_unresolved_pronouns  # "the auth" clarifies "it"
+        assert not hits.mentions_errors
+    
+    def test_matcher_keeps_substring_semantics(self):
+        """Test keywords match inside words and overlapping keywords are all found"""
+        hits = AnalystService._matcher.scan("somethingfeweasyusesomeone")
+        
+        assert set(hits.ambiguous) == {"some", "few"}
+        assert hits.untestable == ("easy",)
+        assert hits.dependencies == ("uses",)
+        
+        # Boundary-anchored tokens still require whole words
+        assert not AnalystService._matcher.scan("bitmap profile").tags & {"pronoun", "io"}
+
+    def test_parallel_analysis_matches_serial(self, monkeypatch):
+        """Test process-pool analysis returns the same questions as the serial path"""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "ANALYST_PARALLEL_MIN_REQUIREMENTS", 1)
+        
+        # Disable caching so both calls really analyze
+        analyst = AnalystService(cache=QuestionCache(maxsize=0))
+        texts = [
+            "The system should be fast and user-friendly",
+            "It depends on the payment API and uploads a file",
+            "Given a user, when they log in, then show the dashboard within 2s",
+            "Maybe handle some errors for input data",
+        ]
+        requirements = [
+            Requirement(id=uuid4(), project_id=uuid4(), code=f"REQ-{i:03d}", version=1,
+                        data={"description": texts[i % len(texts)]})
+            for i in range(12)
+        ]
+        
+        def shape(questions):
+            return [(q.category, q.priority, q.text, q.context) for q in questions]
+        
+        serial, serial_flags = analyst.analyze_requirements(requirements, max_questions=50)
+        parallel, parallel_flags = analyst.analyze_requirements(requirements, max_questions=50, workers=3)
+        
+        assert shape(parallel) == shape(serial)
+        assert parallel_flags.model_dump(exclude={"rule_metrics"}) == serial_flags.model_dump(exclude={"rule_metrics"})
+        
+        # Rule stats come back from the worker processes
+        hits = lambda flags: {name: metrics["hits"] for name, metrics in flags.rule_metrics.items()}
+        assert hits(parallel_flags) == hits(serial_flags)
+    
+    def test_question_cache_skips_unchanged_requirements(self):
+        """Test unchanged requirements are served from the cache with fresh ids"""
+        analyst = AnalystService(cache=QuestionCache(maxsize=100))
+        requirement = Requirement(
+            id=uuid4(), project_id=uuid4(), code="REQ-CACHE", version=1,
+            data={"description": "The system should be fast"}
+        )
+        
+        first, _ = analyst.analyze_requirements([requirement], max_questions=20)
+        
+        with patch.object(AnalystService, "_analyze_requirement") as analyze:
+            second, _ = analyst.analyze_requirements([requirement], max_questions=20)
+            analyze.assert_not_called()
+        
+        assert [q.text for q in second] == [q.text for q in first]
+        assert not {q.id for q in second} & {q.id for q in first}
+        
+        # Editing the requirement changes its content hash
+        requirement.data = {"description": "The system should be fast and intuitive"}
+        with patch.object(AnalystService, "_analyze_requirement", return_value=[]) as analyze:
+            analyst.analyze_requirements([requirement], max_questions=20)
+            analyze.assert_called_once()
+    
+    def test_question_cache_lru_eviction_and_redis_tier(self):
+        """Test the LRU bound and promotion of Redis hits into the local tier"""
+        question = QuestionCandidate("error_handling", "REQ-001", (), "The system stores files")
+        redis_client = MagicMock()
+        cache = QuestionCache(maxsize=2, redis_client=redis_client)
+        
+        cache.set_many({"a": [question], "b": [question]})
+        cache.get_many(["a"])  # "a" becomes most recently used
+        cache.set_many({"c": [question]})
+        
+        assert len(cache) == 2
+        assert redis_client.pipeline.return_value.set.call_count == 3
+        
+        # "b" was evicted locally and is reloaded from Redis
+        payload = '[["error_handling", "REQ-001", [], "The system stores files"]]'
+        redis_client.mget.return_value = [payload]
+        found = cache.get_many(["a", "b"])
+        
+        redis_client.mget.assert_called_once_with([QuestionCache.KEY_PREFIX + "b"])
+        assert found["b"] == [question]
+        assert len(cache) == 2
+    
+    def test_top_k_selection_matches_full_sort(self):
+        """Test the bounded heap picks the same questions as dedup + sort + slice"""
+        import random
+        
+        analyst = AnalystService()
+        rng = random.Random(7)
+        templates = list(QUESTION_TEMPLATES)
+        
+        for max_questions in (0, 1, 3, 10, 50):
+            # Distinct excerpts tell apart candidates that render the same text
+            candidates = [
+                QuestionCandidate(rng.choice(templates), f"REQ-{rng.randint(1, 4):03d}",
+                                  ("fast",), f"excerpt {i}")
+                for i in range(60)
+            ]
+            
+            # Reference: keep first occurrences of each text, stable sort, slice
+            unique = {}
+            for candidate in candidates:
+                unique.setdefault(analyst._normalize_question_text(candidate.text), candidate)
+            expected = sorted(unique.values(), key=lambda c: (c.priority, c.category.value))[:max_questions]
+            selected, seen = analyst._select_top_questions(candidates, max_questions)
+            
+            assert seen == len(candidates)
+            assert [(q.text, q.context) for q in selected] == [(c.text, c.context) for c in expected]
+    
+    def test_top_k_selection_materializes_only_survivors(self):
+        """Test candidates become Question models only when selected"""
+        analyst = AnalystService()
+        candidates = [
+            QuestionCandidate(template, f"REQ-{i:03d}", ("maybe",), "Some requirement text")
+            for i in range(20)
+            for template in QUESTION_TEMPLATES
+        ]
+        
+        with patch.object(QuestionCandidate, "materialize", autospec=True,
+                          side_effect=QuestionCandidate.materialize) as materialize:
+            selected, quality = analyst._select_questions(candidates, max_questions=4)
+        
+        assert materialize.call_count == 4
+        assert [q.priority for q in selected] == [1, 1, 1, 1]
+        assert [q.category for q in selected] == [QuestionCategory.AMBIGUITY] * 4
+        assert len({q.id for q in selected}) == 4
+        assert quality.duplicate_count == len(candidates) - 4
+    
+    def test_analyze_requirements_streams_in_chunks(self, monkeypatch):
+        """Test a requirement generator is consumed chunk by chunk with the same result"""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "ANALYST_STREAM_CHUNK_SIZE", 2)
+        
+        analyst = AnalystService(cache=QuestionCache(maxsize=0))
+        requirements = [
+            Requirement(id=uuid4(), project_id=uuid4(), code=f"REQ-{i:03d}", version=1,
+                        data={"description": f"Requirement {i} should be fast and it uses input data"})
+            for i in range(5)
+        ]
+        expected, expected_flags = analyst.analyze_requirements(requirements)
+        
+        chunk_sizes = []
+        collect = AnalystService._collect_questions
+        
+        def spy(analyst, chunk, workers):
+            chunk_sizes.append(len(chunk))
+            return collect(analyst, chunk, workers)
+        
+        with patch.object(AnalystService, "_collect_questions", autospec=True, side_effect=spy):
+            streamed, streamed_flags = analyst.analyze_requirements(req for req in requirements)
+        
+        assert chunk_sizes == [2, 2, 1]
+        assert [q.text for q in streamed] == [q.text for q in expected]
+        assert streamed_flags.model_dump(exclude={"rule_metrics"}) == expected_flags.model_dump(exclude={"rule_metrics"})
+    
+    def test_analyze_incremental_streams_into_selection(self, monkeypatch):
+        """Test changed rows and carried-forward candidates stream into selection in analysis order"""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "ANALYST_STREAM_CHUNK_SIZE", 2)
+        
+        analyst = AnalystService(cache=QuestionCache(maxsize=0))
+        requirements = [
+            Requirement(id=uuid4(), project_id=uuid4(), code=f"REQ-{i:03d}", version=1,
+                        data={"description": f"Requirement {i} should be fast and it uses input data"})
+            for i in range(5)
+        ]
+        versions = {str(req.id): 1 for req in requirements}
+        events = []
+        
+        def rows(items):
+            for req in items:
+                events.append(req.code)
+                yield req
+        
+        select = AnalystService._select_top_questions
+        
+        def spy(analyst, candidates, max_questions, fill=None):
+            def pulled():
+                for candidate in candidates:
+                    events.append("candidate")
+                    yield candidate
+            return select(analyst, pulled(), max_questions, fill)
+        
+        with patch.object(AnalystService, "_select_top_questions", autospec=True, side_effect=spy):
+            _, _, snapshot = analyst.analyze_incremental(versions, rows(requirements), None, max_questions=50)
+        
+        # Selection starts before the last chunk is read
+        assert events.index("candidate") < events.index("REQ-004")
+        
+        # Edit the middle requirement; the others come from the snapshot
+        requirements[2].data = {"description": "Requirement 2 depends on the billing API"}
+        versions[str(requirements[2].id)] = 2
+        assert analyst.changed_requirement_ids(versions, snapshot) == [str(requirements[2].id)]
+        
+        texts = {req.code: req.data["description"] for req in requirements}
+        incremental, _, _ = analyst.analyze_incremental(
+            versions, iter([requirements[2]]), snapshot, max_questions=50,
+            load_texts=lambda codes: {code: texts[code] for code in codes}
+        )
+        expected, _ = analyst.analyze_requirements(requirements, max_questions=50)
+        
+        assert [(q.text, q.context) for q in incremental] == [(q.text, q.context) for q in expected]
+    
+    def test_rule_registry_selects_and_times_rules(self):
+        """Test rules can be switched off by name or cost and are timed per rule"""
+        from app.services.heuristic_rules import rule_registry
+        
+        assert rule_registry.names() == [
+            "testability", "ambiguity", "dependencies", "acceptance_criteria", "constraints"
+        ]
+        assert "testability" not in rule_registry.select(max_cost=1)
+        assert rule_registry.select(disabled=["ambiguity", "constraints"]) == [
+            "testability", "dependencies", "acceptance_criteria"
+        ]
+        with pytest.raises(ValueError):
+            rule_registry.select(disabled=["no_such_rule"])
+        
+        requirement = Requirement(
+            id=uuid4(), project_id=uuid4(), code="REQ-RULES", version=1,
+            data={"description": "The system should be fast and it depends on the billing API"}
+        )
+        full = AnalystService(cache=QuestionCache(maxsize=0))
+        questions, flags = full.analyze_requirements([requirement], max_questions=20)
+        
+        assert set(flags.rule_metrics) == {"scan", *rule_registry.names()}
+        assert flags.rule_metrics["scan"]["hits"] == 1
+        assert flags.rule_metrics["ambiguity"]["hits"] == 1
+        assert sum(m["hits"] for name, m in flags.rule_metrics.items() if name != "scan") == len(questions)
+        
+        # Disabled rules are not run and do not share cache entries with the full rule set
+        cache = QuestionCache(maxsize=100)
+        AnalystService(cache=cache).analyze_requirements([requirement], max_questions=20)
+        reduced = AnalystService(cache=cache, rules=rule_registry.select(disabled=["ambiguity"]))
+        questions, flags = reduced.analyze_requirements([requirement], max_questions=20)
+        
+        assert "ambiguity" not in flags.rule_metrics
+        assert all(q.category != QuestionCategory.AMBIGUITY for q in questions)
+    
+    def test_extract_requirement_text_prefers_descricao(self):
+        """Test the stored `descricao` field is analyzed instead of every string value"""
+        analyst = AnalystService()
+        data = {"code": "REQ-001", "descricao": "Sistema deve ser rápido", "prioridade": "should"}
+        
+        assert analyst._extract_requirement_text(data) == "Sistema deve ser rápido"
+        assert analyst._extract_requirement_text({"code": "REQ-001", "prioridade": "must"}) == "REQ-001 must"
+    
+    def test_analysis_columns_project_text_only(self, db_session: Session):
+        """Test the analysis query returns lightweight rows with the extracted text"""
+        from sqlalchemy import select
+        from sqlalchemy.dialects import postgresql
+        from app.services.analyst_service import AnalysisRow
+        
+        analyst = AnalystService()
+        project = Project(id=uuid4(), name="Projection Project", status="DRAFT")
+        db_session.add(project)
+        db_session.add_all([
+            Requirement(id=uuid4(), project_id=project.id, code="REQ-001", version=1,
+                        data={"descricao": "It should be fast", "prioridade": "must"}),
+            Requirement(id=uuid4(), project_id=project.id, code="REQ-002", version=1,
+                        data={"titulo": "Login", "prioridade": "could"}),
+        ])
+        db_session.commit()
+        
+        columns = analyst.analysis_columns(db_session.get_bind().dialect.name)
+        rows = [
+            analyst.analysis_row(row)
+            for row in db_session.query(*columns).filter(
+                Requirement.project_id == project.id
+            ).order_by(Requirement.code)
+        ]
+        
+        assert all(isinstance(row, AnalysisRow) for row in rows)
+        assert [(row.code, row.text) for row in rows] == [
+            ("REQ-001", "It should be fast"),
+            ("REQ-002", "Login could"),
+        ]
+        
+        # PostgreSQL extracts the text server-side and ships `data` only as a fallback
+        sql = str(select(*analyst.analysis_columns("postgresql")).compile(dialect=postgresql.dialect()))
+        assert "jsonb_typeof" in sql and "->>" in sql
+    
+    def test_score_requirements_matches_per_requirement_scan(self):
+        """Test the batch feature matrix agrees with scanning each requirement"""
+        from app.services.requirement_features import FEATURE_COLUMNS
+        
+        analyst = AnalystService()
+        texts = [
+            "The system should be fast and it depends on the auth service",
+            "Given a user, when they log in, then respond within 2s",
+            "It uploads input data",
+            "Upload a file of max 10 MB; raise an error on failure",
+            "",
+            "Process ٣ requests; it said\x00 nothing",
+        ]
+        requirements = [
+            Requirement(id=uuid4(), project_id=uuid4(), code=f"REQ-{i:03d}", version=1,
+                        data={"description": text})
+            for i, text in enumerate(texts)
+        ]
+        
+        matrix = analyst.score_requirements(requirements)
+        
+        assert matrix.shape == (len(texts), len(FEATURE_COLUMNS))
+        for text, row in zip(texts, matrix):
+            hits = analyst._matcher.scan(text)
+            expected = [
+                len(text), len(hits.ambiguous), len(hits.untestable), len(hits.dependencies),
+                hits.has_numbers, hits.has_units, hits.has_acceptance, hits.has_given_when_then,
+                hits.has_unresolved_pronouns, hits.mentions_errors, hits.has_unbounded_io,
+            ]
+            assert row.tolist() == [int(value) for value in expected]
+    
+    def test_summarize_scores_reduces_feature_matrix(self):
+        """Test portfolio summary counts requirements per issue"""
+        analyst = AnalystService()
+        requirements = [
+            Requirement(id=uuid4(), project_id=uuid4(), code=f"REQ-{i:03d}", version=1,
+                        data={"description": text})
+            for i, text in enumerate([
+                "The system should be user-friendly",
+                "Acceptance criteria: respond within 200 ms for 100 users",
+            ])
+        ]
+        
+        summary = analyst.summarize_scores(analyst.score_requirements(requirements))
+        
+        assert summary.requirement_count == 2
+        assert summary.ambiguous_count == 1
+        assert summary.untestable_count == 1
+        assert summary.missing_metrics_count == 0  # first text is too short to require metrics
+        assert summary.missing_acceptance_count == 1
+        assert summary.total_score == round(1 - 3 / 12, 2)
+        assert analyst.summarize_scores(analyst.score_requirements([])).requirement_count == 0
 
 
 class TestQASessionAPI:
@@ -688,3 +1036,89 @@ class TestQASessionAPI:
             assert data["request_id"] is not None
             assert len(data["request_id"]) > 0
 
+
+
+class TestIncrementalRefinement:
+    """Test incremental refinement rounds in the analyst task"""
+    
+    def _run_round(self, db_session: Session, project_id):
+        from app.tasks.analyst import refine_requirements
+        
+        with patch("app.tasks.analyst.SessionLocal", return_value=db_session):
+            return refine_requirements.run(project_id=str(project_id), max_rounds=5)
+    
+    def test_second_round_analyzes_only_changed_requirements(self, db_session: Session):
+        """Test that untouched requirements are carried forward from the previous round"""
+        project = Project(id=uuid4(), name="Incremental Project", status="DRAFT")
+        db_session.add(project)
+        requirements = [
+            Requirement(id=uuid4(), project_id=project.id, code=f"REQ-{i:03d}", version=1,
+                        data={"description": f"Requirement {i} should be fast and handle input data"})
+            for i in range(3)
+        ]
+        db_session.add_all(requirements)
+        db_session.commit()
+        project_id = project.id
+        requirement_ids = {str(r.id) for r in requirements}
+        first_id = str(requirements[0].id)
+        
+        first = self._run_round(db_session, project_id)
+        snapshot = db_session.query(QASession).filter(
+            QASession.project_id == project_id
+        ).one().analysis_snapshot
+        assert set(snapshot["requirements"]) == requirement_ids
+        # Candidate keys only: no requirement text is stored
+        entry = snapshot["requirements"][first_id]
+        assert entry["code"] == "REQ-000" and entry["version"] == 1
+        assert all(len(key) == 2 for key in entry["questions"])
+        assert "Requirement 0" not in str(snapshot)
+        
+        # Edit one requirement (version bump)
+        edited = db_session.query(Requirement).filter(Requirement.code == "REQ-001").one()
+        edited.data = {"description": "Requirement 1 depends on the billing API"}
+        edited.version = 2
+        db_session.commit()
+        
+        analyzed_codes = []
+        collect = AnalystService._collect_questions
+        
+        def spy(analyst, requirements, workers):
+            analyzed_codes.extend(r.code for r in requirements)
+            return collect(analyst, requirements, workers)
+        
+        with patch.object(AnalystService, "_collect_questions", autospec=True, side_effect=spy):
+            second = self._run_round(db_session, project_id)
+        
+        assert analyzed_codes == ["REQ-001"]
+        assert second["current_round"] == 2
+        
+        # Same result as analyzing every requirement from scratch
+        expected, _ = AnalystService(cache=QuestionCache(maxsize=0)).analyze_requirements(
+            db_session.query(Requirement).filter(
+                Requirement.project_id == project_id
+            ).order_by(Requirement.code).all()
+        )
+        assert [(q["text"], q["context"]) for q in second["open_questions"]] == [
+            (q.text, q.context) for q in expected
+        ]
+        assert first["open_questions"] != second["open_questions"]
+    
+    def test_snapshot_not_stored_without_incremental_rounds(self, db_session: Session, monkeypatch):
+        """Test rounds stream through analyze_requirements and store no snapshot when the feature is off"""
+        from app.core.config import settings
+        
+        monkeypatch.setattr(settings, "ANALYST_INCREMENTAL_ROUNDS", False)
+        project = Project(id=uuid4(), name="Non-incremental Project", status="DRAFT")
+        db_session.add(project)
+        db_session.add(Requirement(id=uuid4(), project_id=project.id, code="REQ-001", version=1,
+                                   data={"description": "The system should be fast"}))
+        db_session.commit()
+        
+        with patch.object(AnalystService, "analyze_incremental", autospec=True) as incremental:
+            result = self._run_round(db_session, project.id)
+        
+        incremental.assert_not_called()
+        assert result["open_questions"]
+        assert db_session.query(QASession.analysis_snapshot).filter(
+            QASession.project_id == project.id
+        ).scalar() is None